@@ -0,0 +1,184 @@
+import argparse
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from orchestrator import upload_variants
+from tvpipe.config import AppConfig, get_config
+from tvpipe.container import ServiceContainer
+from tvpipe.exceptions import DownloadError
+from tvpipe.logging_config import setup_logging
+from tvpipe.schemas import DownloadedEpisode, VideoMetadata
+from tvpipe.services.pipeline import OrderedRelease, Stage, StagedPipeline
+from tvpipe.services.telegram.schemas import UploadedVideo
+
+logger = logging.getLogger("Backfill")
+
+
+@dataclass
+class BackfillJob:
+    """Un episodio atrasado en su paso por el pipeline."""
+
+    position: int
+    episode_number: str
+    url: str
+    title: str
+    meta: Optional[VideoMetadata] = None
+    downloaded: Optional[DownloadedEpisode] = None
+    videos: List[UploadedVideo] = field(default_factory=list)
+
+
+class BackfillRunner:
+    """
+    Descarga y publica un rango de episodios pasados con un pipeline por etapas:
+    descargar -> subir -> publicar. Las descargas y subidas corren en paralelo;
+    la publicación es un solo worker y, con `ordered`, respeta el número de
+    episodio aunque las etapas anteriores terminen desordenadas.
+    """
+
+    def __init__(
+        self,
+        services: ServiceContainer,
+        config: AppConfig,
+        download_workers: int = 2,
+        upload_workers: int = 2,
+        ordered: bool = True,
+    ):
+        self.services = services
+        self.config = config
+        self.download_workers = download_workers
+        self.upload_workers = upload_workers
+        self.release = OrderedRelease() if ordered else None
+
+    def run(self, first: int, last: int) -> None:
+        candidates = self.services.downloader.find_backfill_candidates(
+            first, last, is_done=self.services.publisher.is_published_everywhere
+        )
+        jobs = [
+            BackfillJob(position, episode_number, url, title)
+            for position, (episode_number, url, title) in enumerate(candidates)
+        ]
+        logger.info(
+            f"Episodios a completar ({len(jobs)}): {[j.episode_number for j in jobs]}"
+        )
+        if not jobs:
+            return
+
+        pipeline = StagedPipeline(
+            stages=[
+                Stage("download", self._guarded(self._download), self.download_workers),
+                Stage("upload", self._guarded(self._upload), self.upload_workers),
+                # El álbum y el registro de publicación van de a uno
+                Stage("publish", self._publish, workers=1),
+            ],
+            queue_size=max(self.download_workers, self.upload_workers),
+        )
+        report = pipeline.run(jobs, source_name="channel")
+
+        # Lo que quedó retenido detrás de un episodio fallido sale al final
+        if self.release:
+            for job in self.release.drain():
+                self._publish_job(job)
+
+        logger.info(report.summary())
+
+    def _guarded(self, handler):
+        """Un fallo antes de publicar libera su lugar en el orden de publicación."""
+
+        def run(job: BackfillJob):
+            try:
+                return handler(job)
+            except Exception:
+                if self.release:
+                    self.release.skip(job.position)
+                raise
+
+        return run
+
+    def _download(self, job: BackfillJob) -> List[BackfillJob]:
+        meta = self.services.downloader.fetch_metadata(job.url)
+        if meta.was_live:
+            raise DownloadError(f"{job.title} es una transmisión en vivo.")
+
+        downloaded = self.services.downloader.download_episode(meta)
+        self.services.register.register_downloads(
+            downloaded.episode_number, downloaded.video_paths, downloaded.telemetry
+        )
+        job.meta, job.downloaded = meta, downloaded
+        return [job]
+
+    def _upload(self, job: BackfillJob) -> List[BackfillJob]:
+        meta, downloaded = job.meta, job.downloaded
+        assert meta is not None and downloaded is not None
+
+        thumbnail_path = self.services.downloader.download_thumbnail(meta)
+        with self.services.watermark.temporary_watermarked_image(
+            input_path=thumbnail_path, text=self.config.telegram.watermark_text
+        ) as watermarked_thumb:
+            job.videos = upload_variants(
+                self.services, downloaded.video_paths, watermarked_thumb
+            )
+        return [job]
+
+    def _publish(self, job: BackfillJob) -> None:
+        if self.release is None:
+            self._publish_job(job)
+            return
+        for ready in self.release.push(job.position, job):
+            self._publish_job(ready)
+
+    def _publish_job(self, job: BackfillJob) -> None:
+        # Un fallo aquí no debe frenar a los episodios retenidos detrás de este
+        try:
+            if not self.services.publisher.publish(job.episode_number, job.videos):
+                raise Exception("Fallo en la publicación del álbum")
+        except Exception as e:
+            logger.error(f"Episodio {job.episode_number} no publicado: {e}")
+            return
+
+        logger.info(f"Episodio {job.episode_number} publicado.")
+        if job.meta:
+            self.services.downloader.mark_published(job.meta)
+        self.services.storage.evict()
+
+
+def run_backfill(args: argparse.Namespace):
+    setup_logging(f"logs/{Path(__file__).stem}.log")
+    config = get_config("config.env")
+    services = ServiceContainer(config)
+
+    # Sesión de Telegram abierta en el hilo principal antes de que la use el worker
+    services.tg.start()
+    services.outbox.start_worker()
+    services.yt_client.warm_up()
+
+    try:
+        BackfillRunner(
+            services,
+            config,
+            download_workers=args.download_workers,
+            upload_workers=args.upload_workers,
+            ordered=not args.unordered,
+        ).run(args.first, args.last)
+    finally:
+        services.outbox.stop_worker()
+        services.yt_client.close()
+    logger.info("Backfill finalizado.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Descarga y publica un rango de episodios pasados del canal."
+    )
+    parser.add_argument("first", type=int, help="Primer episodio del rango")
+    parser.add_argument("last", type=int, help="Último episodio del rango")
+    parser.add_argument("--download-workers", type=int, default=2)
+    parser.add_argument("--upload-workers", type=int, default=2)
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="Publica cada episodio apenas está listo, sin respetar la numeración",
+    )
+
+    run_backfill(parser.parse_args())
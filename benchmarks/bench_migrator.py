@@ -0,0 +1,84 @@
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.getcwd())
+from tvpipe.config import MigrationConfig
+from tvpipe.logging_config import setup_logging
+from tvpipe.services.migrator import ContentMigrator
+from tvpipe.services.register import RegistryManager
+from tvpipe.services.telegram.client import TelegramService
+from tvpipe.services.telegram.fake import FakeNetworkProfile, FakeTelegramClient
+
+logger = logging.getLogger("BenchMigrator")
+
+SOURCE_CHAT_ID = -1001
+BACKUP_CHAT_ID = -1002
+
+
+def build_service(profile: FakeNetworkProfile, albums: int) -> TelegramService:
+    client = FakeTelegramClient(profile)
+    client.seed_channel(SOURCE_CHAT_ID, albums=albums, loose_messages_every=10)
+    return TelegramService(
+        session_name="bench",
+        api_id=0,
+        api_hash="",
+        workdir=Path(tempfile.gettempdir()),
+        client=client,  # type: ignore
+    )
+
+
+def bench_migrator(args: argparse.Namespace):
+    profile = FakeNetworkProfile(
+        latency=args.latency,
+        jitter=args.latency / 4,
+        flood_wait_rate=args.flood_wait_rate,
+        flood_wait_seconds=args.flood_wait_seconds,
+        failure_rate=args.failure_rate,
+        seed=42,
+    )
+    tg = build_service(profile, args.albums)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = RegistryManager(
+            registry_file=Path(tmp) / "download_registry.json",
+            migration_file=Path(tmp) / "migration_registry.json",
+        )
+        placeholder = Path(tmp) / "placeholder.jpg"
+        placeholder.write_bytes(os.urandom(64 * 1024))
+        config = MigrationConfig(
+            source_chat_id=SOURCE_CHAT_ID,
+            backup_chat_id=BACKUP_CHAT_ID,
+            placeholder_image_path=placeholder,
+            _env_file=None,  # type: ignore
+        )
+        migrator = ContentMigrator(config, registry, tg)
+
+        start = time.perf_counter()
+        migrator.run_migration_batch()
+        elapsed = time.perf_counter() - start
+
+        migrated = len(registry._load_migration())
+
+    client: FakeTelegramClient = tg.client  # type: ignore
+    logger.info(f"Álbumes: {args.albums} | Videos migrados: {migrated}")
+    logger.info(f"Tiempo total: {elapsed:.2f}s ({migrated / elapsed:.2f} videos/s)")
+    logger.info(f"Llamadas RPC: {dict(client.calls)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mide el migrador contra el backend falso de Telegram."
+    )
+    parser.add_argument("--albums", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--flood-wait-rate", type=float, default=0.0)
+    parser.add_argument("--flood-wait-seconds", type=int, default=1)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+
+    setup_logging(f"logs/{Path(__file__).stem}.log")
+    bench_migrator(parser.parse_args())
@@ -0,0 +1,61 @@
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.getcwd())
+from tvpipe.logging_config import setup_logging
+from tvpipe.services.youtube.client import PROBE_OPTS, YtDlpClient
+
+logger = logging.getLogger("BenchProbe")
+
+
+def measure(client: YtDlpClient, url: str, overrides: dict, rounds: int) -> list:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        meta = client._extract_metadata(url, overrides)
+        timings.append(time.perf_counter() - start)
+    client._validate_probe(meta)
+    logger.info(f"  {len(meta.streams)} streams | {meta.title}")
+    return timings
+
+
+def bench_probe(args: argparse.Namespace):
+    with tempfile.TemporaryDirectory() as tmp:
+        client = YtDlpClient(cache_dir=Path(tmp), pool_size=1)
+        # El primer uso descarga el player JS: se excluye de la medición
+        client.warm_up(sample_url=args.url)
+
+        results = {}
+        for name, overrides in (("completo", {}), ("sondeo", PROBE_OPTS)):
+            logger.info(f"Perfil {name}:")
+            results[name] = measure(client, args.url, overrides, args.rounds)
+        client.close()
+
+    for name, timings in results.items():
+        logger.info(
+            f"{name:<9} mediana={statistics.median(timings):.2f}s "
+            f"min={min(timings):.2f}s max={max(timings):.2f}s"
+        )
+    speedup = statistics.median(results["completo"]) / statistics.median(
+        results["sondeo"]
+    )
+    logger.info(f"El sondeo es {speedup:.2f}x más rápido que la extracción completa.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compara la latencia del sondeo rápido con la extracción completa."
+    )
+    parser.add_argument(
+        "url", help="URL de un video (https://www.youtube.com/watch?v=...)"
+    )
+    parser.add_argument("--rounds", type=int, default=5)
+
+    setup_logging(f"logs/{Path(__file__).stem}.log")
+    bench_probe(parser.parse_args())
@@ -0,0 +1,87 @@
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.append(os.getcwd())
+from tvpipe.logging_config import setup_logging
+from tvpipe.services.youtube.ranged import MB, RangeDownloader
+
+logger = logging.getLogger("BenchRangeDownload")
+
+
+def build_handler(payload: bytes, bytes_per_second: float):
+    """Servidor de rangos que limita cada conexión, como hace YouTube."""
+
+    class ThrottledRangeHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            start, end = self.headers["Range"].split("=")[1].split("-")
+            start, end = int(start), min(int(end), len(payload) - 1)
+            body = payload[start : end + 1]
+
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(payload)}")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+
+            block = 64 * 1024
+            for offset in range(0, len(body), block):
+                self.wfile.write(body[offset : offset + block])
+                time.sleep(block / bytes_per_second)
+
+        def log_message(self, *args):
+            pass
+
+    return ThrottledRangeHandler
+
+
+def bench_range_download(args: argparse.Namespace):
+    payload = os.urandom(args.size_mb * MB)
+    handler = build_handler(payload, args.throttle_mbps * MB)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/stream.mp4"
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for connections in args.connections:
+            target = Path(tmp) / f"stream_{connections}.mp4"
+            downloader = RangeDownloader(
+                connections=connections, chunk_size=args.chunk_mb * MB
+            )
+
+            start = time.perf_counter()
+            downloader.download(url, target, expected_size=len(payload))
+            results[connections] = time.perf_counter() - start
+
+            assert target.read_bytes() == payload, "Contenido corrupto"
+
+    server.shutdown()
+    server.server_close()
+
+    baseline = results[min(results)]
+    for connections, elapsed in results.items():
+        logger.info(
+            f"Conexiones: {connections:>2} | {elapsed:.2f}s | "
+            f"{args.size_mb / elapsed:.2f} MB/s | {baseline / elapsed:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mide el descargador por rangos contra un servidor local limitado."
+    )
+    parser.add_argument("--size-mb", type=int, default=40)
+    parser.add_argument("--chunk-mb", type=int, default=4)
+    parser.add_argument("--throttle-mbps", type=float, default=5.0)
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 2, 4, 8])
+
+    setup_logging(f"logs/{Path(__file__).stem}.log")
+    bench_range_download(parser.parse_args())
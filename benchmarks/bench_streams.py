@@ -0,0 +1,161 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.append(os.getcwd())
+from tvpipe.logging_config import setup_logging
+from tvpipe.schemas import Stream, StreamPair, StreamTable
+from tvpipe.services.youtube.client import YtDlpClient
+
+logger = logging.getLogger("BenchStreams")
+
+
+def synthetic_formats() -> List[dict]:
+    """Lista de formatos con la forma (y el ruido) de una respuesta real de YouTube."""
+    headers = {
+        "User-Agent": "Mozilla/5.0",
+        "Accept": "*/*",
+        "Sec-Fetch-Mode": "navigate",
+    }
+    formats = []
+    for n in range(4):
+        formats.append(
+            {
+                "format_id": f"sb{n}",
+                "format_note": "storyboard",
+                "ext": "mhtml",
+                "vcodec": "none",
+                "acodec": "none",
+                "fragments": [
+                    {"url": f"https://i.ytimg.com/sb/{i}", "duration": 10.0}
+                    for i in range(60)
+                ],
+            }
+        )
+    for itag, abr, codec in (
+        (139, 48, "mp4a.40.5"),
+        (140, 129, "mp4a.40.2"),
+        (249, 50, "opus"),
+        (251, 135, "opus"),
+    ):
+        for lang in range(3):
+            formats.append(
+                {
+                    "format_id": f"{itag}-{lang}",
+                    "ext": "m4a" if codec.startswith("mp4a") else "webm",
+                    "vcodec": "none",
+                    "acodec": codec,
+                    "abr": abr,
+                    "asr": 44100,
+                    "filesize": 20_000_000 + itag,
+                    "url": f"https://rr.googlevideo.com/videoplayback?itag={itag}&"
+                    + "x" * 600,
+                    "http_headers": headers,
+                    "downloader_options": {"http_chunk_size": 10485760},
+                }
+            )
+    for height in (144, 240, 360, 480, 720, 1080, 1440, 2160):
+        for codec in ("avc1.4d401f", "vp9", "av01.0.08M.08"):
+            for protocol in ("https", "m3u8_native"):
+                formats.append(
+                    {
+                        "format_id": f"{height}-{codec[:4]}-{protocol[:4]}",
+                        "ext": "mp4" if codec != "vp9" else "webm",
+                        "vcodec": codec,
+                        "acodec": "none",
+                        "height": height,
+                        "width": height * 16 // 9,
+                        "fps": 30,
+                        "tbr": height * 3.1,
+                        "filesize_approx": height * 400_000,
+                        "protocol": protocol,
+                        "url": f"https://rr.googlevideo.com/videoplayback?h={height}&"
+                        + "x" * 600,
+                        "http_headers": headers,
+                    }
+                )
+    return formats
+
+
+def legacy_probe(client: YtDlpClient, formats: List[dict]) -> StreamPair:
+    """Camino anterior: un Stream validado por formato y selección sobre modelos."""
+    streams = [
+        Stream(**fmt)
+        for fmt in formats
+        if fmt.get("format_id") and fmt.get("format_note") != "storyboard"
+    ]
+    video = client._select_video_track(streams, 720, True)  # type: ignore[arg-type]
+    audio = client._select_smart_audio_track(streams, video.height or 0, True)  # type: ignore[arg-type]
+    return StreamPair(video=video, audio=audio)  # type: ignore[arg-type]
+
+
+def compact_probe(client: YtDlpClient, formats: List[dict]) -> StreamPair:
+    """Camino actual: tabla compacta y solo el par elegido se vuelve Pydantic."""
+    table = StreamTable.from_formats(formats)
+    video = client._select_video_track(table, 720, True)
+    audio = client._select_smart_audio_track(table, video.height or 0, True)
+    return StreamPair(video=video.to_model(), audio=audio.to_model())
+
+
+def measure(probe: Callable, client: YtDlpClient, formats: List[dict], rounds: int):
+    probe(client, formats)  # calentamiento
+
+    start = time.process_time()
+    for _ in range(rounds):
+        pair = probe(client, formats)
+    cpu_us = (time.process_time() - start) / rounds * 1e6
+
+    tracemalloc.start()
+    kept = probe(client, formats)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu_us, peak, pair, kept
+
+
+def bench_streams(args: argparse.Namespace):
+    if args.info_json:
+        formats = json.loads(Path(args.info_json).read_text(encoding="utf-8"))[
+            "formats"
+        ]
+    else:
+        formats = synthetic_formats()
+    logger.info(f"{len(formats)} formatos por sondeo, {args.rounds} rondas")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = YtDlpClient(cache_dir=Path(tmp), pool_size=1)
+        results = {}
+        for name, probe in (("pydantic", legacy_probe), ("compacta", compact_probe)):
+            results[name] = measure(probe, client, formats, args.rounds)
+        client.close()
+
+    legacy, compact = results["pydantic"], results["compacta"]
+    assert legacy[2].video.format_id == compact[2].video.format_id
+    assert legacy[2].audio.format_id == compact[2].audio.format_id
+
+    for name, (cpu_us, peak, _, _) in results.items():
+        logger.info(
+            f"{name:<9} CPU={cpu_us:>8.1f} µs/sondeo  pico={peak / 1024:>7.1f} KiB"
+        )
+    logger.info(
+        f"CPU {legacy[0] / compact[0]:.1f}x menos, memoria pico {legacy[1] / compact[1]:.1f}x menos."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compara la ingesta de formatos con Pydantic y con la tabla compacta."
+    )
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument(
+        "--info-json", help="Usar los formatos de un .info.json real de yt-dlp"
+    )
+
+    setup_logging(f"logs/{Path(__file__).stem}.log")
+    bench_streams(parser.parse_args())
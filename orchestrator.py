@@ -1,9 +1,13 @@
 import logging
 from pathlib import Path
+from typing import List
 
-from tvpipe.config import get_config
+from tvpipe.config import AppConfig, get_config
 from tvpipe.container import ServiceContainer
+from tvpipe.exceptions import IntegrityError
 from tvpipe.logging_config import setup_logging
+from tvpipe.services.integrity import check_file
+from tvpipe.services.telegram.schemas import UploadedVideo
 from tvpipe.utils import (
     ReliabilityGuard,
 )
@@ -11,52 +15,160 @@ from tvpipe.utils import (
 logger = logging.getLogger("Orchestrator")
 
 
+def upload_variants(
+    services: ServiceContainer, video_paths: List[Path], thumbnail_path: Path
+) -> List[UploadedVideo]:
+    """Sube cada versión; las que superan el límite de Telegram se suben por partes."""
+    uploaded = []
+    for video_path in video_paths:
+        # Un archivo dañado va a cuarentena: el próximo ciclo lo descarga de nuevo
+        if not check_file(video_path):
+            raise IntegrityError(f"{video_path.name} está dañado. No se sube.")
+        parts = services.splitter.split_if_needed(video_path)
+        uploaded.extend(
+            services.publisher.prepare_parts(
+                part_paths=parts, thumbnail_path=thumbnail_path
+            )
+        )
+    return uploaded
+
+
+def publish_complete(services: ServiceContainer, config: AppConfig, episode_meta):
+    """Descarga todas las versiones y publica el álbum completo de una vez."""
+    # Descarga de video
+    ep_dled = services.downloader.download_episode(episode_meta)
+    services.register.register_downloads(
+        ep_dled.episode_number, ep_dled.video_paths, ep_dled.telemetry
+    )
+
+    # Descarga de thumbnail
+    thumbnail_path = services.downloader.download_thumbnail(episode_meta)
+    with services.watermark.temporary_watermarked_image(
+        input_path=thumbnail_path, text=config.telegram.watermark_text
+    ) as watermarked_thumb:
+        ready_to_publish_list = upload_variants(
+            services, ep_dled.video_paths, watermarked_thumb
+        )
+
+        succes = services.publisher.publish(
+            ep_dled.episode_number, ready_to_publish_list
+        )
+        if not succes:
+            raise Exception("Fallo en la publicación del álbum")
+        logger.info(
+            f"Episodio {ep_dled.episode_number} publicado (o en cola de reintentos)."
+        )
+
+
+def publish_progressively(services: ServiceContainer, config: AppConfig, episode_meta):
+    """
+    Publica la versión más liviana apenas está lista, con posiciones reservadas
+    en el álbum; las versiones HD se descargan mientras tanto y luego las ocupan.
+    """
+    stages = services.downloader.iter_progressive_downloads(episode_meta)
+    try:
+        preview = next(stages)
+        services.register.register_downloads(
+            preview.episode_number, preview.video_paths, preview.telemetry
+        )
+
+        thumbnail_path = services.downloader.download_thumbnail(episode_meta)
+        with services.watermark.temporary_watermarked_image(
+            input_path=thumbnail_path, text=config.telegram.watermark_text
+        ) as watermarked_thumb:
+            preview_videos = upload_variants(
+                services, preview.video_paths, watermarked_thumb
+            )
+            succes = services.publisher.publish_preview(
+                preview.episode_number,
+                preview_videos,
+                thumbnail_path=watermarked_thumb,
+                pending_slots=preview.pending_variants,
+            )
+            if not succes:
+                raise Exception("Fallo en la publicación del álbum")
+            logger.info(
+                f"Episodio {preview.episode_number}: primera versión publicada."
+            )
+
+            try:
+                for stage in stages:
+                    services.register.register_downloads(
+                        stage.episode_number, stage.video_paths, stage.telemetry
+                    )
+                    new_videos = upload_variants(
+                        services, stage.video_paths, watermarked_thumb
+                    )
+                    if services.publisher.upgrade_album(
+                        stage.episode_number, preview_videos, new_videos
+                    ):
+                        logger.info(
+                            f"Episodio {stage.episode_number}: versiones HD agregadas."
+                        )
+                    else:
+                        logger.warning(
+                            f"Episodio {stage.episode_number}: no se pudo completar el álbum en todos los chats."
+                        )
+            except Exception:
+                # Sin HD, el álbum no puede quedar con las reservas y el aviso "en camino"
+                logger.error(
+                    f"Episodio {preview.episode_number}: fallaron las versiones HD. "
+                    "Se retiran las posiciones reservadas."
+                )
+                services.publisher.cancel_pending_slots(
+                    preview.episode_number, preview_videos
+                )
+                raise
+    finally:
+        # Si algo falla antes de agotar las etapas, el HD en segundo plano se
+        # detiene aquí y no cuando el recolector descarte el generador
+        stages.close()
+
+
 def run_orchestrator():
     setup_logging(f"logs/{Path(__file__).stem}.log")
     config = get_config("config.env")
     services = ServiceContainer(config)
     guard = ReliabilityGuard()
 
-    logger.info(">>> SISTEMA INICIADO: Orquestador en control <<<")
-    consecutive_errors = 0
-    while consecutive_errors < config.youtube.max_consecutive_errors:
-        with guard:
+    # La sesión de Telegram se abre en el hilo principal: el worker del outbox
+    # la usa desde su hilo y Pyrogram solo despacha bien sobre el loop ya iniciado
+    services.tg.start()
+    # Reintenta en segundo plano solo las entregas por chat que fallaron
+    services.outbox.start_worker()
 
-            episode_meta = services.monitor.wait_for_next_episode()
+    try:
+        # Extractores listos antes del primer sondeo del canal
+        services.yt_client.warm_up(sample_url=config.youtube.url)
 
-            logger.info(f"Procesando episodio: {episode_meta.title}")
+        logger.info(">>> SISTEMA INICIADO: Orquestador en control <<<")
+        consecutive_errors = 0
+        while consecutive_errors < config.youtube.max_consecutive_errors:
+            with guard:
 
-            # Descarga de video
-            ep_dled = services.downloader.download_episode(episode_meta)
-            services.register.register_downloads(
-                ep_dled.episode_number, ep_dled.video_paths
-            )
+                episode_meta = services.monitor.wait_for_next_episode()
 
-            # Descarga de thumbnail
-            thumbnail_path = services.downloader.download_thumbnail(episode_meta)
-            with services.watermark.temporary_watermarked_image(
-                input_path=thumbnail_path, text=config.telegram.watermark_text
-            ) as watermarked_thumb:
-                ready_to_publish_list = []
-                for video_path in ep_dled.video_paths:
-                    uploaded = services.publisher.prepare_video(
-                        video_path=video_path, thumbnail_path=watermarked_thumb
-                    )
-                    ready_to_publish_list.append(uploaded)
+                logger.info(f"Procesando episodio: {episode_meta.title}")
 
-                succes = services.publisher.publish(
-                    ep_dled.episode_number, ready_to_publish_list
-                )
-                if succes:
-                    logger.info(f"Episodio {ep_dled.episode_number} publicado.")
-                    consecutive_errors = 0
+                if config.telegram.progressive_publish:
+                    publish_progressively(services, config, episode_meta)
                 else:
-                    raise Exception("Fallo en la publicación del álbum")
+                    publish_complete(services, config, episode_meta)
+
+                # Los siguientes sondeos ya no vuelven a evaluar este video
+                services.downloader.mark_published(episode_meta)
+                consecutive_errors = 0
 
-            if config.youtube.url:
-                logger.info("Modo manual finalizado.")
-                break
+                # Con la publicación confirmada, se libera lo que ya venció
+                services.storage.evict()
+                services.storage.clean_stale_temp()
 
+                if config.youtube.url:
+                    logger.info("Modo manual finalizado.")
+                    break
+    finally:
+        services.outbox.stop_worker()
+        services.yt_client.close()
     logger.info("Orchestrator finalizado.")
 
 
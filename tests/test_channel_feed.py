@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import MagicMock
+
+sys.path.append(os.getcwd())
+from tvpipe.config import DownloaderConfig
+from tvpipe.interfaces import EpisodeParser
+from tvpipe.services.register import RegistryManager
+from tvpipe.services.youtube.client import YtDlpClient
+from tvpipe.services.youtube.feed import ChannelFeedPoller
+from tvpipe.services.youtube.service import YouTubeFetcher
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+YESTERDAY = NOW - timedelta(days=1)
+
+FEED = f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015"
+      xmlns="http://www.w3.org/2005/Atom">
+  <title>Desafío Caracol</title>
+  <entry>
+    <yt:videoId>new50</yt:videoId>
+    <title>Desafío Siglo XXI - Capítulo 50</title>
+    <published>{NOW.isoformat()}</published>
+  </entry>
+  <entry>
+    <yt:videoId>old49</yt:videoId>
+    <title>Desafío Siglo XXI - Capítulo 49</title>
+    <published>{YESTERDAY.isoformat()}</published>
+  </entry>
+</feed>
+""".encode()
+
+
+class RecordedFeedHandler(BaseHTTPRequestHandler):
+    """Sirve el feed grabado y responde 304 si el ETag coincide."""
+
+    requests_seen: list = []
+
+    def do_GET(self):
+        self.requests_seen.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(FEED)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestChannelFeedPoller(unittest.TestCase):
+
+    def setUp(self):
+        RecordedFeedHandler.requests_seen = []
+        self.server = HTTPServer(("127.0.0.1", 0), RecordedFeedHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.feed_url = f"http://127.0.0.1:{self.server.server_port}/feed.xml"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_conditional_get_reuses_entries(self):
+        poller = ChannelFeedPoller(feed_url=self.feed_url)
+
+        first = poller.fetch_entries()
+        second = poller.fetch_entries()
+
+        self.assertEqual([e["id"] for e in first], ["new50", "old49"])  # type: ignore
+        self.assertEqual(first, second)
+        self.assertEqual(first[0]["timestamp"], int(NOW.timestamp()))  # type: ignore
+        self.assertEqual(RecordedFeedHandler.requests_seen, [None, '"v1"'])
+
+    def test_unreachable_feed_returns_none(self):
+        poller = ChannelFeedPoller(feed_url="http://127.0.0.1:9/feed.xml", timeout=1)
+        self.assertIsNone(poller.fetch_entries())
+
+    def test_fetcher_polls_feed_and_probes_only_today(self):
+        """Con feed, yt-dlp solo sondea el video de hoy; sin feed se usa el escaneo."""
+        config = MagicMock(spec=DownloaderConfig)
+        config.url = None
+        config.channel_url = "https://youtube.com/channel"
+        config.probe_workers = 3
+        config.ytdlp_pool_size = 3
+        parser = MagicMock(spec=EpisodeParser)
+        parser.matches_criteria.return_value = True
+        client = MagicMock(spec=YtDlpClient)
+        client.get_metadata.return_value = None
+
+        fetcher = YouTubeFetcher(
+            config=config,
+            registry=MagicMock(spec=RegistryManager),
+            episode_parser=parser,
+            client=client,
+            feed_poller=ChannelFeedPoller(feed_url=self.feed_url),
+        )
+        fetcher.fetch_episode()
+
+        client.get_latest_channel_entries.assert_not_called()
+        client.get_metadata.assert_called_once_with(
+            "https://www.youtube.com/watch?v=new50"
+        )
+
+        fetcher.feed_poller = ChannelFeedPoller(
+            feed_url="http://127.0.0.1:9/feed.xml", timeout=1
+        )
+        client.get_latest_channel_entries.return_value = []
+        fetcher.fetch_episode()
+        client.get_latest_channel_entries.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
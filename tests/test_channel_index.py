@@ -0,0 +1,103 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.path.append(os.getcwd())
+from tvpipe.services.channel_index import ChannelIndex
+from tvpipe.services.youtube.strategies import CaracolDesafioParser
+
+
+def make_message(
+    message_id, caption=None, media_group_id=None, unique_id=None, media=True
+):
+    video = (
+        SimpleNamespace(file_unique_id=unique_id or f"uid_{message_id}")
+        if media
+        else None
+    )
+    return SimpleNamespace(
+        id=message_id,
+        caption=caption,
+        media_group_id=media_group_id,
+        date=datetime(2025, 1, 1),
+        video=video,
+        document=None,
+        photo=None,
+        empty=False,
+        service=None,
+    )
+
+
+class TestChannelIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.tg = MagicMock()
+        self.index = ChannelIndex(
+            self.tg, CaracolDesafioParser(), index_dir=self.test_dir.name
+        )
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_album_parts_inherit_episode(self):
+        """Solo el primer mensaje del álbum tiene caption; todas las partes cuentan."""
+        # get_history devuelve del más nuevo al más viejo
+        self.tg.get_history.return_value = iter(
+            [
+                make_message(11, None, "g1", "uid_hd"),
+                make_message(10, "Capítulo 50 - Desafío", "g1", "uid_sd"),
+            ]
+        )
+
+        self.assertEqual(self.index.sync(-100), 2)
+
+        self.assertTrue(self.index.is_episode_in_chat(-100, "50"))
+        self.assertFalse(self.index.is_episode_in_chat(-100, "51"))
+        self.assertEqual(len(self.index.get_episode_messages(-100, "50")), 2)
+        self.assertEqual(self.index.locate_album("g1"), (-100, [10, 11]))
+        self.assertEqual(self.index.find_by_file_unique_id(-100, "uid_hd"), 11)
+
+    def test_only_episode_media_is_indexed(self):
+        """Un avance o un texto que menciona el capítulo no cuenta como publicado."""
+        self.tg.get_history.return_value = iter(
+            [
+                make_message(12, "Mañana, Capítulo 52 - Desafío", media=False),
+                make_message(11, "Avance Capítulo 51 - Desafío", unique_id="uid_av"),
+                make_message(10, "Capítulo 50 - Desafío"),
+            ]
+        )
+        self.index.sync(-100)
+
+        self.assertTrue(self.index.is_episode_in_chat(-100, "50"))
+        self.assertFalse(self.index.is_episode_in_chat(-100, "51"))
+        self.assertFalse(self.index.is_episode_in_chat(-100, "52"))
+
+    def test_incremental_sync_stops_at_last_seen(self):
+        """La segunda sincronización solo procesa mensajes nuevos y persiste en disco."""
+        self.tg.get_history.return_value = iter([make_message(10, "Capítulo 50")])
+        self.index.sync(-100)
+
+        self.tg.get_history.return_value = iter(
+            [
+                make_message(12, "Capítulo 51"),
+                make_message(10, "Capítulo 50"),
+                make_message(9, "Capítulo 49"),
+            ]
+        )
+        self.assertEqual(self.index.sync(-100), 1)
+
+        # Una instancia nueva lee el índice guardado
+        reloaded = ChannelIndex(
+            MagicMock(), CaracolDesafioParser(), index_dir=self.test_dir.name
+        )
+        self.assertTrue(reloaded.is_episode_in_chat(-100, "51"))
+        self.assertFalse(reloaded.is_episode_in_chat(-100, "49"))
+
+
+if __name__ == "__main__":
+    unittest.main()
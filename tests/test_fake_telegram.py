@@ -0,0 +1,279 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(os.getcwd())
+from pyrogram.errors import FileReferenceExpired, FloodWait, MessageIdInvalid
+
+from tvpipe.config import MigrationConfig
+from tvpipe.exceptions import TelegramError
+from tvpipe.services.migrator import AlbumAssembler, ContentMigrator, ObfuscationTask
+from tvpipe.services.placeholder import PlaceholderCache
+from tvpipe.services.register import RegistryManager
+from tvpipe.services.telegram.client import TelegramService
+from tvpipe.services.telegram.fake import FakeNetworkProfile, FakeTelegramClient
+
+SOURCE, BACKUP = -100, -200
+
+
+def build_service(client: FakeTelegramClient) -> TelegramService:
+    return TelegramService("test", 0, "", Path(tempfile.gettempdir()), client=client)  # type: ignore
+
+
+class TestFakeTelegramBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.test_dir.name)
+        self.registry = RegistryManager(
+            registry_file=self.temp_path / "download_registry.json",
+            migration_file=self.temp_path / "migration_registry.json",
+        )
+        self.placeholder = self.temp_path / "placeholder.jpg"
+        self.placeholder.write_bytes(b"\xff\xd8placeholder")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_history_offsets_follow_telegram_semantics(self):
+        """offset_id devuelve ids menores; un offset negativo desplaza hacia los nuevos."""
+        client = FakeTelegramClient()
+        client.seed_channel(SOURCE, albums=5, album_size=2)  # ids 1..10
+
+        ids = [m.id for m in client.get_chat_history(SOURCE, limit=3, offset_id=6)]
+        self.assertEqual(ids, [5, 4, 3])
+
+        ids = [
+            m.id
+            for m in client.get_chat_history(SOURCE, limit=3, offset_id=4, offset=-3)
+        ]
+        self.assertEqual(ids, [6, 5, 4])
+
+    def test_flood_wait_injection(self):
+        client = FakeTelegramClient(FakeNetworkProfile(flood_wait_rate=1.0))
+        with self.assertRaises(FloodWait):
+            client.get_me()
+
+    def test_migration_runs_offline(self):
+        """El migrador real funciona de punta a punta contra el backend en memoria."""
+        client = FakeTelegramClient()
+        client.seed_channel(SOURCE, albums=3, album_size=2, loose_messages_every=2)
+        tg = build_service(client)
+
+        config = MigrationConfig(
+            source_chat_id=SOURCE,
+            backup_chat_id=BACKUP,
+            placeholder_image_path=self.placeholder,
+            _env_file=None,  # type: ignore
+        )
+        ContentMigrator(config, self.registry, tg).run_migration_batch()
+
+        self.assertEqual(len(self.registry._load_migration()), 6)
+        # Los álbumes se arman desde el historial, sin pedir cada grupo
+        self.assertEqual(client.calls["get_media_group"], 0)
+        # El placeholder se sube una vez y se reutiliza su file_id
+        self.assertEqual(client.calls["send_photo"], 1)
+        originals = list(client.get_chat_history(SOURCE))
+        self.assertTrue(all(m.video is None for m in originals if m.media_group_id))
+        backups = list(client.get_chat_history(BACKUP))
+        self.assertEqual(len(backups), 6)
+        self.assertTrue(all(m.video for m in backups))
+
+    def test_history_pages_oldest_first(self):
+        """Las páginas llegan ordenadas del más viejo al más nuevo desde el cursor."""
+        client = FakeTelegramClient()
+        client.seed_channel(SOURCE, albums=5, album_size=2)  # ids 1..10
+        tg = build_service(client)
+
+        pages = [
+            [m.id for m in page]
+            for page in tg.iter_history_pages(SOURCE, after_id=3, page_size=3)
+        ]
+        self.assertEqual(pages, [[4, 5, 6], [7, 8, 9], [10]])
+
+    def test_history_pages_cost_one_request_each(self):
+        """Cada página, incluida la corta del final del chat, es una sola petición."""
+        client = FakeTelegramClient()
+        client.seed_channel(SOURCE, albums=5, album_size=2)  # ids 1..10
+        tg = build_service(client)
+
+        pages = list(tg.iter_history_pages(SOURCE, after_id=3, page_size=4))
+
+        self.assertEqual([len(page) for page in pages], [4, 3])
+        self.assertEqual(client.calls["get_history_chunk"], 2)
+
+    def test_bulk_restore_batch(self):
+        """La restauración valida, edita y borra respaldos con peticiones en bloque."""
+        client = FakeTelegramClient()
+        client.seed_channel(SOURCE, albums=3, album_size=2)
+        tg = build_service(client)
+
+        config = MigrationConfig(
+            source_chat_id=SOURCE,
+            backup_chat_id=BACKUP,
+            placeholder_image_path=self.placeholder,
+            _env_file=None,  # type: ignore
+        )
+        migrator = ContentMigrator(config, self.registry, tg)
+        migrator.run_migration_batch()
+        (batch_id,) = self.registry.list_available_batches()
+
+        # Un respaldo desaparece: ese mensaje no se restaura
+        lost = self.registry._load_migration()[0]
+        client.delete_messages(BACKUP, lost["backup_message_id"])
+        client.calls.clear()
+
+        migrator.restore_batch(batch_id, delete_backup=True)
+
+        statuses = [e["status"] for e in self.registry._load_migration()]
+        self.assertEqual(statuses.count("restored"), 5)
+        for msg in client.get_chat_history(SOURCE):
+            is_lost = msg.id == lost["source_message_id"]
+            self.assertEqual(msg.video is None, is_lost)
+        self.assertEqual(list(client.get_chat_history(BACKUP)), [])
+
+        self.assertEqual(client.calls["get_messages"], 1)
+        self.assertEqual(client.calls["edit_message_media"], 5)
+        self.assertEqual(client.calls["delete_messages"], 1)
+
+    def test_audit_marks_lost_backups(self):
+        """La auditoría marca backup_lost, deja informe y es incremental."""
+        client = FakeTelegramClient()
+        client.seed_channel(SOURCE, albums=3, album_size=2)
+        tg = build_service(client)
+
+        config = MigrationConfig(
+            source_chat_id=SOURCE,
+            backup_chat_id=BACKUP,
+            placeholder_image_path=self.placeholder,
+            _env_file=None,  # type: ignore
+        )
+        migrator = ContentMigrator(config, self.registry, tg)
+        migrator.run_migration_batch()
+
+        lost = self.registry._load_migration()[0]
+        client.delete_messages(BACKUP, lost["backup_message_id"])
+        client.calls.clear()
+
+        since = datetime.now()
+        report = migrator.audit_backups(since)
+
+        self.assertEqual((report["audited"], report["ok"]), (6, 5))
+        self.assertEqual(report["lost"][0]["migration_id"], lost["migration_id"])
+        self.assertEqual(client.calls["get_messages"], 1)
+        entry = self.registry.get_migration_entry(SOURCE, lost["source_message_id"])
+        self.assertEqual(entry["status"], "backup_lost")  # type: ignore
+        self.assertEqual(len(list((self.temp_path / "audits").glob("*.json"))), 1)
+
+        # Lo ya auditado desde `since` no se vuelve a revisar
+        self.assertEqual(migrator.audit_backups(since)["audited"], 0)
+
+    def test_placeholder_reuploaded_when_image_changes(self):
+        """El file_id en caché se invalida si cambia la imagen o Telegram lo rechaza."""
+        client = FakeTelegramClient()
+        tg = build_service(client)
+        cache_file = self.temp_path / "placeholder_cache.json"
+
+        first = PlaceholderCache(tg, self.placeholder, cache_file).get_file_id()
+        self.assertEqual(
+            PlaceholderCache(tg, self.placeholder, cache_file).get_file_id(), first
+        )
+        self.assertEqual(client.calls["send_photo"], 1)
+
+        self.placeholder.write_bytes(b"\xff\xd8otra imagen")
+        cache = PlaceholderCache(tg, self.placeholder, cache_file)
+        second = cache.get_file_id()
+        self.assertNotEqual(second, first)
+
+        cache.invalidate(second)
+        self.assertNotEqual(cache.get_file_id(), second)
+        self.assertEqual(client.calls["send_photo"], 3)
+
+    def test_placeholder_invalidated_only_on_stale_file_id(self):
+        """Solo un file_id rechazado provoca otra subida; los demás errores se propagan."""
+        client = FakeTelegramClient()
+        client.seed_channel(SOURCE, albums=2, album_size=1)  # ids 1..2
+        tg = build_service(client)
+        config = MigrationConfig(
+            source_chat_id=SOURCE,
+            backup_chat_id=BACKUP,
+            placeholder_image_path=self.placeholder,
+            _env_file=None,  # type: ignore
+        )
+        migrator = ContentMigrator(config, self.registry, tg)
+        first, second = list(client.get_chat_history(SOURCE))
+
+        original = client.edit_message_media
+        errors = [FileReferenceExpired()]
+
+        def failing_edit(*args, **kwargs):
+            if errors:
+                raise errors.pop(0)
+            return original(*args, **kwargs)
+
+        client.edit_message_media = failing_edit  # type: ignore
+
+        migrator._obfuscate(ObfuscationTask(message=first, caption=""))
+        self.assertEqual(client.calls["send_photo"], 2)
+
+        errors.append(MessageIdInvalid())
+        with self.assertRaises(TelegramError):
+            migrator._obfuscate(ObfuscationTask(message=second, caption=""))
+        self.assertEqual(client.calls["send_photo"], 2)
+
+    def test_album_assembler_spans_pages(self):
+        """Los grupos que cruzan páginas se arman completos; el último queda pendiente."""
+        client = FakeTelegramClient()
+        client.seed_channel(SOURCE, albums=3, album_size=3, loose_messages_every=2)
+        tg = build_service(client)
+
+        assembler = AlbumAssembler()
+        albums = []
+        for page in tg.iter_history_pages(SOURCE, page_size=5):
+            albums.extend(a for a in map(assembler.feed, page) if a)
+        albums.append(assembler.flush(complete=False))
+
+        self.assertEqual(
+            [[m.id for m in a.messages] for a in albums],  # type: ignore
+            [[1, 2, 3], [4, 5, 6], [8, 9, 10]],
+        )
+        self.assertEqual([a.complete for a in albums], [True, True, False])  # type: ignore
+
+    def test_migration_resumes_from_checkpoint(self):
+        """Un lote interrumpido deja un checkpoint y el siguiente continúa desde ahí."""
+        client = FakeTelegramClient()
+        client.seed_channel(SOURCE, albums=5, album_size=2)  # ids 1..10
+        tg = build_service(client)
+
+        config = MigrationConfig(
+            source_chat_id=SOURCE,
+            backup_chat_id=BACKUP,
+            batch_size=3,
+            placeholder_image_path=self.placeholder,
+            _env_file=None,  # type: ignore
+        )
+        migrator = ContentMigrator(config, self.registry, tg)
+
+        # El álbum 3-4 queda cortado por el lote: se pide completo a Telegram
+        migrator.run_migration_batch()
+        self.assertEqual(self.registry.get_migration_checkpoint(SOURCE), 3)
+        self.assertEqual(len(self.registry._load_migration()), 4)
+
+        migrator.run_migration_batch()
+        self.assertEqual(self.registry.get_migration_checkpoint(SOURCE), 6)
+        self.assertEqual(len(self.registry._load_migration()), 6)
+
+        config.batch_size = 0
+        migrator.run_migration_batch()
+        self.assertEqual(self.registry.get_migration_checkpoint(SOURCE), 10)
+        self.assertEqual(len(self.registry._load_migration()), 10)
+        self.assertEqual(len(list(client.get_chat_history(BACKUP))), 10)
+        # La caché en disco sobrevive entre lotes
+        self.assertEqual(client.calls["send_photo"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
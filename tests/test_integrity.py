@@ -0,0 +1,128 @@
+import os
+import struct
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.append(os.getcwd())
+from tvpipe.exceptions import IntegrityError
+from tvpipe.schemas import Stream, StreamPair
+from tvpipe.services.integrity import check_file, validate_mp4
+from tvpipe.services.youtube.client import YtDlpClient
+
+
+def _box(box_type: str, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type.encode()) + payload
+
+
+def _duration_header(box_type: str, seconds: float) -> bytes:
+    # versión 0: flags, creación, modificación, timescale, duración
+    return _box(box_type, struct.pack(">IIIII", 0, 0, 0, 1000, int(seconds * 1000)))
+
+
+def build_mp4(
+    seconds: float = 2.0,
+    track_seconds: tuple = (2.0, 2.0),
+    media_bytes: int = 16_000,
+    chunk_offset: int = 0,
+) -> bytes:
+    """
+    MP4 mínimo: ftyp + moov (mvhd y una pista por duración) + mdat.
+    `chunk_offset` desplaza el offset del primer chunk respecto al inicio del mdat.
+    """
+    ftyp = _box("ftyp", b"isom" + struct.pack(">I", 512) + b"isomavc1")
+
+    def moov_with(offset: int) -> bytes:
+        traks = b""
+        for track in track_seconds:
+            stco = _box("stco", struct.pack(">III", 0, 1, offset))
+            minf = _box("minf", _box("stbl", stco))
+            mdia = _box("mdia", _duration_header("mdhd", track) + minf)
+            traks += _box("trak", mdia)
+        return _box("moov", _duration_header("mvhd", seconds) + traks)
+
+    # El moov no cambia de tamaño con el offset: se calcula dos veces
+    data_start = len(ftyp) + len(moov_with(0)) + 8
+    mdat = _box("mdat", b"\0" * media_bytes)
+    return ftyp + moov_with(data_start + chunk_offset) + mdat
+
+
+class TestMp4Integrity(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.folder = Path(self.test_dir.name)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def _write(self, data: bytes, name: str = "video.mp4") -> Path:
+        path = self.folder / name
+        path.write_bytes(data)
+        return path
+
+    def test_valid_file_passes(self):
+        report = validate_mp4(self._write(build_mp4()), expected_duration=2)
+        self.assertEqual(report.boxes, ["ftyp", "moov", "mdat"])
+        self.assertEqual(report.track_durations, [2.0, 2.0])
+
+    def test_broken_files_are_rejected(self):
+        """Truncado, pista corta, duración distinta a YouTube y chunks fuera del mdat."""
+        cases = {
+            "truncado": build_mp4()[:-100],
+            "pista corta": build_mp4(
+                seconds=60, track_seconds=(60, 20), media_bytes=300_000
+            ),
+            "mdat escaso": build_mp4(seconds=60, track_seconds=(60, 60)),
+            "chunk fuera": build_mp4(chunk_offset=20_000),
+            "sin moov": build_mp4()[:24] + _box("mdat", b"\0" * 100),
+        }
+        for name, data in cases.items():
+            with self.subTest(name), self.assertRaises(IntegrityError):
+                validate_mp4(self._write(data))
+
+        with self.assertRaises(IntegrityError):
+            validate_mp4(self._write(build_mp4()), expected_duration=3600)
+
+    def test_damaged_file_goes_to_quarantine(self):
+        path = self._write(build_mp4()[:-100])
+
+        self.assertFalse(check_file(path))
+        self.assertFalse(path.exists())
+        self.assertEqual(len(list((self.folder / ".quarantine").iterdir())), 1)
+
+    def test_leftover_temp_is_not_promoted(self):
+        """
+        Escenario: un .temp truncado quedó de un proceso interrumpido.
+        Result: va a cuarentena y se descarga de nuevo en lugar de renombrarse.
+        """
+        output = self.folder / "capitulo.mp4"
+        leftover = self.folder / ".temp" / "capitulo.mp4"
+        leftover.parent.mkdir()
+        leftover.write_bytes(build_mp4()[:-100])
+
+        pair = StreamPair(
+            video=Stream(format_id="137", ext="mp4", height=1080),
+            audio=Stream(format_id="140", ext="m4a"),
+        )
+        client = YtDlpClient(pool_size=1)
+        with patch.object(
+            YtDlpClient,
+            "_run_download",
+            side_effect=lambda opts, *args: Path(opts["outtmpl"]).write_bytes(
+                build_mp4()
+            ),
+        ) as run_download:
+            client.download_stream(
+                pair, output, "https://www.youtube.com/watch?v=video123"
+            )
+
+        run_download.assert_called_once()
+        validate_mp4(output, expected_duration=2)
+        self.assertEqual(len(list((self.folder / ".quarantine").iterdir())), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
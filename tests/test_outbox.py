@@ -0,0 +1,137 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.path.append(os.getcwd())
+from tvpipe.services.outbox import PublishOutbox
+from tvpipe.services.publisher import EpisodePublisher
+from tvpipe.services.register import RegistryManager
+from tvpipe.services.telegram.client import TelegramService
+from tvpipe.services.telegram.fake import FakeTelegramClient
+from tvpipe.services.telegram.schemas import UploadedVideo
+
+
+class TestPublishOutbox(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.test_dir.name)
+
+        self.registry = RegistryManager(self.temp_path / "download_registry.json")
+        self.tg = MagicMock()
+        self.outbox = PublishOutbox(
+            self.tg,
+            self.registry,
+            outbox_file=self.temp_path / "outbox.json",
+            base_delay=0,
+        )
+        self.video = UploadedVideo(
+            file_id="file_1",
+            message_id=1,
+            chat_id=1,
+            file_path=Path("video.mp4"),
+            file_name="video.mp4",
+            size_bytes=100,
+            width=640,
+            height=360,
+            duration=60,
+        )
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_only_failed_chat_is_retried(self):
+        """Si un destino falla, el reintento solo vuelve a enviar a ese destino."""
+
+        def send(files, caption, chat_id, **kwargs):
+            if chat_id == -200 and self.tg.send_album_to_chat.call_count <= 2:
+                raise ConnectionError("red caída")
+            return [SimpleNamespace(id=10)]
+
+        self.tg.send_album_to_chat.side_effect = send
+
+        job_ids = self.outbox.enqueue("50", [self.video], "Capítulo 50", [-100, -200])
+        results = [self.outbox.deliver(job_id) for job_id in job_ids]
+
+        self.assertEqual(results, [True, False])
+        self.assertTrue(self.registry.was_episode_published("50"))
+        self.assertTrue(self.registry.was_episode_published_in("50", -100))
+        self.assertFalse(self.registry.was_episode_published_in("50", -200))
+        self.assertTrue(self.outbox.has_pending("50"))
+
+        self.assertEqual(self.outbox.deliver_due(), 1)
+
+        sent_to = [c.args[2] for c in self.tg.send_album_to_chat.call_args_list]
+        self.assertEqual(sent_to, [-100, -200, -200])
+        self.assertTrue(self.registry.was_episode_published_in("50", -200))
+        self.assertFalse(self.outbox.has_pending("50"))
+
+    def test_job_fails_after_max_attempts(self):
+        """Tras agotar los intentos, la entrega queda marcada como fallida."""
+        self.outbox.max_attempts = 2
+        self.tg.send_album_to_chat.side_effect = RuntimeError("sin permisos")
+
+        (job_id,) = self.outbox.enqueue("51", [self.video], "Capítulo 51", [-100])
+        self.outbox.deliver(job_id)
+        self.outbox.deliver(job_id)
+
+        job = self.outbox.get_job(job_id)
+        self.assertEqual(job["status"], "failed")  # type: ignore
+        self.assertEqual(job["attempts"], 2)  # type: ignore
+        self.assertFalse(self.outbox.has_pending("51"))
+
+    def test_large_album_resumes_from_unsent_chunk(self):
+        """Si falla un bloque del álbum, el reintento no repite los bloques ya enviados."""
+        client = FakeTelegramClient()
+        tg = TelegramService("test", 0, "", self.temp_path, client=client)  # type: ignore
+        outbox = PublishOutbox(
+            tg, self.registry, outbox_file=self.temp_path / "big.json", base_delay=0
+        )
+        videos = [
+            self.video.model_copy(update={"file_id": f"file_{i}"}) for i in range(12)
+        ]
+
+        original = client.send_media_group
+        calls = []
+
+        def flaky_send(*args, **kwargs):
+            calls.append(len(args[1]))
+            if len(calls) == 2:
+                raise ConnectionError("red caída")
+            return original(*args, **kwargs)
+
+        client.send_media_group = flaky_send  # type: ignore
+
+        (job_id,) = outbox.enqueue("52", videos, "Capítulo 52", [-100])
+        self.assertFalse(outbox.deliver(job_id))
+        self.assertEqual(len(outbox.get_job(job_id)["message_ids"]), 10)  # type: ignore
+
+        self.assertTrue(outbox.deliver(job_id))
+        self.assertEqual(calls, [10, 2, 2])
+        self.assertEqual(len(list(client.get_chat_history(-100))), 12)
+        self.assertEqual(
+            len(self.registry.get_chat_publications("52")[0]["message_ids"]), 12
+        )
+
+    def test_chat_without_permissions_is_not_enqueued(self):
+        """Los destinos sin permisos de escritura no entran a la cola de reintentos."""
+        config = MagicMock(chat_ids=[-100, -200], caption="Capítulo {episode}\n")
+        self.tg.verify_permissions.side_effect = lambda chat_id: chat_id == -100
+        self.tg.send_album_to_chat.return_value = [SimpleNamespace(id=10)]
+        publisher = EpisodePublisher(
+            config=config,
+            telegram_client=self.tg,
+            registry=self.registry,
+            outbox=self.outbox,
+        )
+
+        self.assertTrue(publisher.publish("53", [self.video]))
+        self.assertEqual([j["chat_id"] for j in self.outbox.get_jobs("53")], [-100])
+
+
+if __name__ == "__main__":
+    unittest.main()
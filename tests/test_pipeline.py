@@ -0,0 +1,69 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.append(os.getcwd())
+from tvpipe.services.pipeline import OrderedRelease, Stage, StagedPipeline
+from tvpipe.utils import RateLimiter
+
+
+class TestStagedPipeline(unittest.TestCase):
+
+    def test_items_flow_through_all_stages(self):
+        """Cada elemento pasa por todas las etapas y los fallos no detienen el resto."""
+        results = []
+        lock = threading.Lock()
+
+        def double(n):
+            if n == 3:
+                raise ValueError("falla controlada")
+            return [n * 2]
+
+        def collect(n):
+            with lock:
+                results.append(n)
+
+        pipeline = StagedPipeline(
+            [Stage("double", double, workers=3), Stage("collect", collect)],
+            queue_size=2,
+        )
+        report = pipeline.run(range(10), source_name="numbers")
+
+        self.assertEqual(sorted(results), [n * 2 for n in range(10) if n != 3])
+        self.assertEqual(report.stages["numbers"].emitted, 10)
+        self.assertEqual(report.stages["double"].failed, 1)
+        self.assertEqual(report.stages["collect"].processed, 9)
+
+    def test_workers_overlap_slow_calls(self):
+        """Con varios workers las llamadas lentas se solapan en lugar de sumarse."""
+        pipeline = StagedPipeline([Stage("slow", lambda _: time.sleep(0.1), workers=5)])
+
+        start = time.perf_counter()
+        pipeline.run(range(5))
+        self.assertLess(time.perf_counter() - start, 0.4)
+
+    def test_ordered_release_waits_for_gaps(self):
+        """Un elemento sale solo cuando los anteriores salieron o fallaron."""
+        release = OrderedRelease()
+
+        self.assertEqual(release.push(2, "c"), [])
+        self.assertEqual(release.push(0, "a"), ["a"])
+        release.skip(1)
+        self.assertEqual(release.push(4, "e"), ["c"])
+        # La posición 3 nunca llegó: lo retenido sale al final, en orden
+        self.assertEqual(release.drain(), ["e"])
+
+    def test_rate_limiter_spaces_calls(self):
+        limiter = RateLimiter(rate=20)
+
+        start = time.perf_counter()
+        for _ in range(5):
+            limiter.acquire()
+        # La primera llamada es inmediata; las otras 4 esperan 1/20 s cada una
+        self.assertGreaterEqual(time.perf_counter() - start, 0.18)
+
+
+if __name__ == "__main__":
+    unittest.main()
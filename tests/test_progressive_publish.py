@@ -0,0 +1,129 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.append(os.getcwd())
+from tvpipe.config import TelegramConfig
+from tvpipe.services.outbox import PublishOutbox
+from tvpipe.services.publisher import PENDING_HD_LINE, EpisodePublisher
+from tvpipe.services.register import RegistryManager
+from tvpipe.services.telegram.client import TelegramService
+from tvpipe.services.telegram.fake import FakeTelegramClient
+from tvpipe.services.telegram.schemas import UploadedVideo
+
+CHATS = [-100, -200]
+
+
+class TestProgressivePublish(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.test_dir.name)
+
+        self.client = FakeTelegramClient()
+        self.tg = TelegramService(
+            "test", 0, "", self.temp_path, client=self.client  # type: ignore
+        )
+        self.registry = RegistryManager(self.temp_path / "download_registry.json")
+        config = TelegramConfig(
+            api_id=0,
+            api_hash="",
+            session_name="test",
+            to_telegram_working=self.temp_path,
+            chat_ids=CHATS,
+            _env_file=None,  # type: ignore
+        )
+        self.publisher = EpisodePublisher(
+            config=config,
+            telegram_client=self.tg,
+            registry=self.registry,
+            outbox=PublishOutbox(
+                self.tg, self.registry, outbox_file=self.temp_path / "outbox.json"
+            ),
+        )
+        self.thumbnail = self.temp_path / "thumb.jpg"
+        self.thumbnail.write_bytes(b"\xff\xd8thumb")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def _uploaded(self, name: str, height: int, size_mb: int) -> UploadedVideo:
+        path = self.temp_path / name
+        path.write_bytes(b"0" * 16)
+        msg = self.client.send_video("me", str(path), height=height)
+        return UploadedVideo(
+            file_id=msg.video.file_id,  # type: ignore
+            message_id=msg.id,
+            chat_id=0,
+            file_path=path,
+            file_name=name,
+            size_bytes=size_mb * 1024 * 1024,
+            width=height * 16 // 9,
+            height=height,
+            duration=3600,
+        )
+
+    def test_preview_slot_is_replaced_by_hd(self):
+        sd = [self._uploaded("50_360p.mp4", 360, 300)]
+        hd = [self._uploaded("50_1080p.mp4", 1080, 1500)]
+
+        self.assertTrue(
+            self.publisher.publish_preview("50", sd, self.thumbnail, pending_slots=1)
+        )
+        self.assertTrue(self.registry.was_episode_published("50"))
+
+        self.assertTrue(self.publisher.upgrade_album("50", sd, hd))
+
+        publications = self.registry.get_chat_publications("50")
+        self.assertEqual(len(publications), len(CHATS))
+        for publication in publications:
+            first, slot = [
+                self.client._chat(publication["chat_id"])[i]
+                for i in publication["message_ids"]
+            ]
+            self.assertEqual(first.video.file_id, sd[0].file_id)  # type: ignore
+            self.assertEqual(slot.video.file_id, hd[0].file_id)  # type: ignore
+            self.assertIsNone(slot.photo)
+            self.assertIn("HD: 1500 MB", first.caption)  # type: ignore
+            self.assertNotIn(PENDING_HD_LINE, first.caption)  # type: ignore
+
+        # El HD no se vuelve a subir: se reutiliza el file_id
+        self.assertEqual(self.client.calls["send_video"], 2)
+        self.assertEqual(self.client.calls["edit_message_media"], len(CHATS))
+
+    def test_upgrade_skips_chats_without_slots(self):
+        """Un chat que ya tenía el álbum completo no se edita al llegar el HD."""
+        sd = [self._uploaded("50_360p.mp4", 360, 300)]
+        hd = [self._uploaded("50_1080p.mp4", 1080, 1500)]
+        complete = self.tg.send_album_to_chat(sd + hd, "Capítulo 50", -200)
+        self.registry.register_chat_publication("50", -200, [m.id for m in complete])
+
+        self.publisher.publish_preview("50", sd, self.thumbnail, pending_slots=1)
+        self.assertTrue(self.publisher.upgrade_album("50", sd, hd))
+
+        self.assertEqual(self.client.calls["edit_message_media"], 1)
+        album = [self.client._chat(-200)[m.id] for m in complete]
+        self.assertEqual([m.video.file_id for m in album], [sd[0].file_id, hd[0].file_id])  # type: ignore
+        self.assertEqual(self.registry.get_pending_slot_publications("50"), [])
+
+    def test_failed_hd_removes_slots(self):
+        """Si el HD falla, se borran las reservas y el caption pierde el aviso."""
+        sd = [self._uploaded("50_360p.mp4", 360, 300)]
+        self.publisher.publish_preview("50", sd, self.thumbnail, pending_slots=1)
+
+        self.publisher.cancel_pending_slots("50", sd)
+
+        for publication in self.registry.get_chat_publications("50"):
+            chat = self.client._chat(publication["chat_id"])
+            self.assertEqual(len(publication["message_ids"]), 1)
+            self.assertFalse(any(m.photo for m in chat.values()))
+            first = chat[publication["message_ids"][0]]
+            self.assertNotIn(PENDING_HD_LINE, first.caption)  # type: ignore
+            self.assertIn("SD: 300 MB", first.caption)  # type: ignore
+        self.assertEqual(self.registry.get_pending_slot_publications("50"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
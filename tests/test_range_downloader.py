@@ -0,0 +1,126 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.append(os.getcwd())
+from tvpipe.exceptions import DownloadError
+from tvpipe.services.youtube.ranged import RangeDownloader
+
+PAYLOAD = os.urandom(256 * 1024 + 123)
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """
+    Sirve PAYLOAD con soporte de Range. '/expired' simula una URL vencida y
+    '/short' responde 206 sin cuerpo para todo rango salvo el sondeo de tamaño.
+    """
+
+    ranges_seen: list = []
+
+    def do_GET(self):
+        if self.path == "/expired":
+            self.send_response(403)
+            self.end_headers()
+            return
+
+        start, end = self.headers["Range"].split("=")[1].split("-")
+        start, end = int(start), min(int(end), len(PAYLOAD) - 1)
+        self.ranges_seen.append((start, end))
+
+        body = PAYLOAD[start : end + 1]
+        if self.path == "/short" and end > 0:
+            body = b""
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(PAYLOAD)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRangeDownloader(unittest.TestCase):
+
+    def setUp(self):
+        RangeHandler.ranges_seen = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.target = Path(self.tmp.name) / "137.mp4"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def test_ranges_are_written_in_place(self):
+        downloader = RangeDownloader(connections=4, chunk_size=64 * 1024)
+
+        downloader.download(
+            f"{self.base_url}/video", self.target, expected_size=len(PAYLOAD)
+        )
+
+        self.assertEqual(self.target.read_bytes(), PAYLOAD)
+        # Sondeo del tamaño + 5 rangos de 64 KB
+        self.assertEqual(len(RangeHandler.ranges_seen), 1 + 5)
+
+    def test_expired_url_is_resolved_again(self):
+        downloader = RangeDownloader(connections=2, chunk_size=64 * 1024)
+        resolved = []
+
+        def resolve_url():
+            resolved.append(True)
+            return f"{self.base_url}/video"
+
+        downloader.download(
+            f"{self.base_url}/expired", self.target, resolve_url=resolve_url
+        )
+
+        self.assertEqual(self.target.read_bytes(), PAYLOAD)
+        self.assertEqual(len(resolved), 1)
+
+    def test_size_mismatch_is_rejected(self):
+        downloader = RangeDownloader()
+
+        with self.assertRaises(DownloadError):
+            downloader.download(
+                f"{self.base_url}/video", self.target, expected_size=len(PAYLOAD) + 1
+            )
+        self.assertFalse(self.target.exists())
+
+    def test_short_responses_count_as_attempts(self):
+        """Un 206 que termina antes de tiempo se reintenta, pero no indefinidamente."""
+        downloader = RangeDownloader(connections=1, max_retries=2)
+        retries = []
+
+        with self.assertRaises(DownloadError):
+            downloader.download(
+                f"{self.base_url}/short",
+                self.target,
+                on_retry=lambda: retries.append(True),
+            )
+        self.assertEqual(len(retries), 3)
+        self.assertFalse(self.target.exists())
+
+    def test_approximate_size_uses_tolerance(self):
+        downloader = RangeDownloader(size_tolerance=0.1)
+
+        downloader.download(
+            f"{self.base_url}/video", self.target, approx_size=len(PAYLOAD) * 105 // 100
+        )
+        self.assertEqual(self.target.read_bytes(), PAYLOAD)
+
+        with self.assertRaises(DownloadError):
+            downloader.download(
+                f"{self.base_url}/video", self.target, approx_size=len(PAYLOAD) * 2
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -128,6 +128,11 @@ class TestRegistryManager(unittest.TestCase):
         updated_entry = self.manager.get_migration_entry(src_chat, src_msg)
         self.assertEqual(updated_entry["status"], "restored")  # type: ignore
 
+        # Filtrado por estado
+        self.assertEqual(len(self.manager.get_migration_entries()), 1)
+        self.assertEqual(self.manager.get_migration_entries(status="migrated"), [])
+        self.assertEqual(len(self.manager.get_migration_entries(status="restored")), 1)
+
     def test_corrupt_json_handling(self):
         """
         Si el JSON está corrupto (ej: corte de luz a mitad de escritura),
@@ -0,0 +1,95 @@
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.path.append(os.getcwd())
+from tvpipe.exceptions import SplitError
+from tvpipe.services.publisher import EpisodePublisher
+from tvpipe.services.splitter import VideoSplitter, plan_cut_points
+from tvpipe.services.telegram.schemas import UploadedVideo
+
+MB = 1024 * 1024
+
+
+class TestPlanCutPoints(unittest.TestCase):
+
+    def test_no_cut_when_file_fits(self):
+        """Si el total cabe en una parte, no hay cortes."""
+        keyframes = [(0.0, 0), (10.0, 5 * MB), (20.0, 10 * MB)]
+        self.assertEqual(plan_cut_points(keyframes, 15 * MB, 20 * MB), [])
+
+    def test_cuts_at_last_fitting_keyframe(self):
+        """
+        Cada corte debe caer en el último keyframe que mantiene la parte bajo el límite.
+        Keyframes cada 10s con 4 MB por GOP y límite de 10 MB -> 2 GOPs por parte.
+        """
+        keyframes = [(t * 10.0, t * 4 * MB) for t in range(10)]
+        cuts = plan_cut_points(keyframes, 40 * MB, 10 * MB)
+
+        self.assertEqual(cuts, [20.0, 40.0, 60.0, 80.0])
+
+    def test_gop_larger_than_limit_raises(self):
+        """Un GOP mayor que el límite no puede cortarse sin recodificar."""
+        keyframes = [(0.0, 0), (10.0, 30 * MB)]
+        with self.assertRaises(SplitError):
+            plan_cut_points(keyframes, 40 * MB, 10 * MB)
+
+
+class TestSplitterPartNaming(unittest.TestCase):
+
+    def test_small_file_is_not_split(self):
+        splitter = VideoSplitter(max_part_size=10 * MB)
+        video = MagicMock(spec=Path)
+        video.stat.return_value.st_size = 5 * MB
+
+        self.assertEqual(splitter.split_if_needed(video), [video])
+
+    def test_part_path(self):
+        splitter = VideoSplitter(max_part_size=10 * MB)
+        part = splitter.part_path(Path("/tmp/serie.capitulo.10.yt.1080p.mp4"), 2, 3)
+        self.assertEqual(part.name, "serie.capitulo.10.yt.1080p.parte2de3.mp4")
+
+
+class TestPartsCaption(unittest.TestCase):
+
+    def _video(self, height, size_mb, part=None, total=None):
+        return UploadedVideo(
+            file_id=f"f{height}{part}",
+            message_id=1,
+            chat_id=1,
+            file_path=Path("x.mp4"),
+            file_name="x.mp4",
+            size_bytes=size_mb * MB,
+            width=height * 16 // 9,
+            height=height,
+            duration=60,
+            part_number=part,
+            total_parts=total,
+        )
+
+    def test_caption_lists_parts_in_order(self):
+        """El caption ordena SD antes que HD y numera las partes."""
+        config = MagicMock()
+        config.caption = "Capítulo {episode}\n\n"
+        publisher = EpisodePublisher(config, MagicMock(), MagicMock())
+
+        videos = [
+            self._video(1080, 1500, part=2, total=2),
+            self._video(1080, 1900, part=1, total=2),
+            self._video(360, 400),
+        ]
+        caption = publisher._build_caption("10", videos)
+
+        self.assertEqual(
+            caption,
+            "Capítulo 10\n\n"
+            "SD: 400 MB\n"
+            "HD (parte 1/2): 1900 MB\n"
+            "HD (parte 2/2): 1500 MB\n",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
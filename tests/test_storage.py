@@ -0,0 +1,102 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.getcwd())
+from tvpipe.exceptions import InsufficientStorageError
+from tvpipe.services.register import RegistryManager
+from tvpipe.services.storage import StorageManager
+
+
+class TestStorageManager(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.folder = Path(self.test_dir.name) / "downloads"
+        self.folder.mkdir()
+        self.registry = RegistryManager(
+            registry_file=Path(self.test_dir.name) / "download_registry.json"
+        )
+        self.storage = StorageManager(
+            self.folder, self.registry, min_free_bytes=0, retention_days=7
+        )
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def _make_file(self, name: str, size: int, age_days: float) -> Path:
+        path = self.folder / name
+        path.write_bytes(b"\0" * size)
+        stamp = time.time() - age_days * 86400
+        os.utime(path, (stamp, stamp))
+        return path
+
+    def test_evict_only_removes_expired_published_files(self):
+        """Solo se borran los videos publicados que superan la retención."""
+        old_published = self._make_file("serie.capitulo.10.yt.720p.mp4", 10, age_days=9)
+        thumbnail = self._make_file("serie.capitulo.10.yt.jpg", 5, age_days=9)
+        recent_published = self._make_file(
+            "serie.capitulo.11.yt.720p.mp4", 10, age_days=1
+        )
+        old_unpublished = self._make_file(
+            "serie.capitulo.12.yt.720p.mp4", 10, age_days=9
+        )
+
+        self.registry.register_episode_downloaded("10", old_published)
+        self.registry.register_episode_downloaded("11", recent_published)
+        self.registry.register_episode_downloaded("12", old_unpublished)
+        self.registry.register_episode_publication("10")
+        self.registry.register_episode_publication("11")
+
+        freed = self.storage.evict()
+
+        self.assertEqual(freed, 15)
+        self.assertFalse(old_published.exists())
+        self.assertFalse(thumbnail.exists())
+        self.assertTrue(recent_published.exists())
+        self.assertTrue(old_unpublished.exists(), "Nunca se borra lo no publicado")
+
+    def test_admit_evicts_lru_then_rejects(self):
+        """Bajo presión libera lo menos usado y, si no alcanza, rechaza la descarga."""
+        published = self._make_file("serie.capitulo.10.yt.720p.mp4", 100, age_days=1)
+        self.registry.register_episode_downloaded("10", published)
+        self.registry.register_episode_publication("10")
+
+        usage = MagicMock(free=50)
+        with patch("tvpipe.services.storage.shutil.disk_usage", return_value=usage):
+            with self.assertRaises(InsufficientStorageError):
+                self.storage.admit(1000)
+
+        # Se intentó liberar espacio antes de rechazar
+        self.assertFalse(published.exists())
+
+    def test_clean_stale_temp(self):
+        """Los restos viejos de .temp y de la caché de formatos se eliminan."""
+        temp_dir = self.folder / ".temp"
+        temp_dir.mkdir()
+        stale = temp_dir / "capitulo_10.f137.mp4.part"
+        fresh = temp_dir / "capitulo_11.f137.mp4.part"
+        stale.touch()
+        fresh.touch()
+        old = time.time() - 2 * 86400
+        os.utime(stale, (old, old))
+
+        cache = self.folder / ".cache" / "video123"
+        cache.mkdir(parents=True)
+        cached = cache / "137.mp4"
+        cached.touch()
+        os.utime(cached, (old, old))
+
+        self.storage.clean_stale_temp()
+
+        self.assertFalse(stale.exists())
+        self.assertTrue(fresh.exists())
+        self.assertFalse(cache.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,18 +1,26 @@
 import os
 import sys
+import tempfile
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 sys.path.append(os.getcwd())
 from tvpipe.config import DownloaderConfig
+from tvpipe.exceptions import DownloadError
 from tvpipe.interfaces import EpisodeParser
-from tvpipe.schemas import Stream, StreamPair, VideoMetadata
+from tvpipe.schemas import Stream, StreamPair, StreamTable, VideoMetadata
 from tvpipe.services.register import RegisterPublication, RegistryManager
+from tvpipe.services.youtube.cache import MetadataCache
 from tvpipe.services.youtube.client import YtDlpClient
+from tvpipe.services.youtube.seen import SeenVideos
 from tvpipe.services.youtube.service import YouTubeFetcher
 from tvpipe.services.youtube.strategies import CaracolDesafioParser
+from tests.test_integrity import build_mp4
 
 
 class TestYouTubeFetcher(unittest.TestCase):
@@ -22,6 +30,9 @@ class TestYouTubeFetcher(unittest.TestCase):
         self.mock_config.channel_url = "https://youtube.com/channel"
         self.mock_config.qualities = ["1080p"]
         self.mock_config.output_as_mp4 = True
+        self.mock_config.download_workers = 2
+        self.mock_config.probe_workers = 3
+        self.mock_config.ytdlp_pool_size = 3
         self.mock_config.download_folder = Path("/tmp/downloads")
         self.mock_config.url = None
 
@@ -103,6 +114,447 @@ class TestYouTubeFetcher(unittest.TestCase):
         self.mock_client.get_latest_channel_entries.assert_called_once()
         self.mock_client.download_stream.assert_called_once()
 
+    def _pair_for(self, meta, quality_preference, require_mp4):
+        height = int(quality_preference.replace("p", ""))
+        return StreamPair(
+            video=Stream(format_id=f"v{height}", ext="mp4", height=height),
+            audio=Stream(format_id="a", ext="m4a"),
+        )
+
+    def test_variants_download_concurrently_in_quality_order(self):
+        """Las versiones se descargan a la vez y se devuelven en el orden configurado."""
+        self.mock_config.qualities = ["1080p", "360p", "720p"]
+        self.mock_config.generate_video_filename.side_effect = (
+            lambda num, height: f"{num}_{height}.mp4"
+        )
+        self.mock_config.download_workers = 3
+        self.mock_parser.extract_number.return_value = "50"
+        self.mock_client.select_best_pair.side_effect = self._pair_for
+
+        def slow_download(stream, output_path, url, **_):
+            # La de mayor calidad es la que más tarda
+            time.sleep(stream.height / 10000)
+            return output_path
+
+        self.mock_client.download_stream.side_effect = slow_download
+
+        start = time.perf_counter()
+        dled = self.fetcher.download_episode(self._create_dummy_metadata())
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(
+            [p.name for p in dled.video_paths],
+            ["50_1080.mp4", "50_360.mp4", "50_720.mp4"],
+        )
+        self.assertLess(elapsed, 0.2)
+
+    def test_progressive_downloads_yield_smallest_first(self):
+        """La versión más liviana se entrega sola; el resto llega en una segunda etapa."""
+        self.mock_config.qualities = ["1080p", "360p", "720p"]
+        self.mock_config.generate_video_filename.side_effect = (
+            lambda num, height: f"{num}_{height}.mp4"
+        )
+        self.mock_parser.extract_number.return_value = "50"
+        self.mock_client.select_best_pair.side_effect = self._pair_for
+        self.mock_client.download_stream.side_effect = (
+            lambda stream, output_path, url, **_: output_path
+        )
+
+        stages = self.fetcher.iter_progressive_downloads(self._create_dummy_metadata())
+
+        preview = next(stages)
+        self.assertEqual([p.name for p in preview.video_paths], ["50_360.mp4"])
+        self.assertEqual(preview.pending_variants, 2)
+
+        (rest,) = list(stages)
+        self.assertEqual(
+            [p.name for p in rest.video_paths], ["50_720.mp4", "50_1080.mp4"]
+        )
+        self.assertEqual(self.mock_client.download_stream.call_count, 3)
+
+    def test_variant_errors_are_aggregated(self):
+        """Si fallan varias versiones, el error las menciona todas."""
+        self.mock_config.qualities = ["1080p", "360p", "720p"]
+        self.mock_parser.extract_number.return_value = "50"
+        self.mock_client.select_best_pair.side_effect = self._pair_for
+
+        def flaky_download(stream, output_path, url, **_):
+            if stream.height != 720:
+                raise RuntimeError("HTTP 403")
+            return output_path
+
+        self.mock_client.download_stream.side_effect = flaky_download
+
+        with self.assertRaises(DownloadError) as ctx:
+            self.fetcher.download_episode(self._create_dummy_metadata())
+
+        self.assertIn("1080p", str(ctx.exception))
+        self.assertIn("360p", str(ctx.exception))
+        self.assertEqual(self.mock_client.download_stream.call_count, 3)
+
+    def test_metadata_cache_skips_rejected_probe(self):
+        """Un video que no es de hoy se sondea una sola vez entre sondeos del canal."""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = MetadataCache(Path(tmp) / "metadata_cache.json")
+            self.fetcher.metadata_cache = cache
+
+            self.mock_client.get_latest_channel_entries.return_value = [
+                {"id": "video123", "title": "Desafio Cap 49", "url": "url_old"}
+            ]
+            self.mock_parser.matches_criteria.return_value = True
+            self.mock_client.get_metadata.return_value = self._create_dummy_metadata(
+                days_offset=1
+            )
+
+            self.assertIsNone(self.fetcher.fetch_episode())
+            self.assertIsNone(self.fetcher.fetch_episode())
+            self.mock_client.get_metadata.assert_called_once()
+
+            # La caché sobrevive a un reinicio
+            restarted = MetadataCache(Path(tmp) / "metadata_cache.json")
+            self.assertEqual(restarted.get("video123").title, "Capitulo 50")  # type: ignore
+
+    def test_seen_videos_skip_rejected_entries(self):
+        """Tras un sondeo, las entradas rechazadas no vuelven a costar un get_metadata."""
+        with tempfile.TemporaryDirectory() as tmp:
+            self.fetcher.seen_videos = SeenVideos(Path(tmp) / "seen.json")
+
+            self.mock_client.get_latest_channel_entries.return_value = [
+                {"id": "avance", "title": "Avance Cap 51", "url": "url_avance"},
+                {"id": "old", "title": "Desafio Cap 49", "url": "url_old"},
+                {"id": "live", "title": "Desafio Cap 50", "url": "url_live"},
+            ]
+            self.mock_parser.matches_criteria.side_effect = lambda t: "Avance" not in t
+
+            old = self._create_dummy_metadata(days_offset=1)
+            live = self._create_dummy_metadata().model_copy(update={"was_live": True})
+            self.mock_client.get_metadata.side_effect = lambda url: (
+                old if url == "url_old" else live
+            )
+
+            self.assertIsNone(self.fetcher.fetch_episode())
+            self.assertIsNone(self.fetcher.fetch_episode())
+            self.assertEqual(self.mock_client.get_metadata.call_count, 2)
+
+            verdicts = [
+                self.fetcher.seen_videos.get_verdict(i) for i in ("avance", "old", "live")
+            ]
+            self.assertEqual(verdicts, ["wrong_title", "not_today", "live"])
+
+            # Lo publicado tampoco se vuelve a detectar
+            self.fetcher.mark_published(self._create_dummy_metadata())
+            self.assertEqual(
+                self.fetcher.seen_videos.get_verdict("video123"), "already_published"
+            )
+
+    def test_live_video_rechecked_after_broadcast_ends(self):
+        """Un live no queda en la caché: el nuevo sondeo ve que ya terminó."""
+        with tempfile.TemporaryDirectory() as tmp:
+            self.fetcher.metadata_cache = MetadataCache(Path(tmp) / "cache.json")
+            self.fetcher.seen_videos = SeenVideos(
+                Path(tmp) / "seen.json", live_recheck=0
+            )
+            self.mock_client.get_latest_channel_entries.return_value = [
+                {"id": "video123", "title": "Desafio Cap 50", "url": "url_50"}
+            ]
+            self.mock_parser.matches_criteria.return_value = True
+
+            finished = self._create_dummy_metadata()
+            live = finished.model_copy(update={"was_live": True})
+            self.mock_client.get_metadata.side_effect = [live, finished]
+
+            self.assertIsNone(self.fetcher.fetch_episode())
+            # Pasado live_recheck (aquí 0 s) el video se vuelve a sondear
+            self.assertEqual(self.fetcher.fetch_episode(), finished)
+            self.assertEqual(self.mock_client.get_metadata.call_count, 2)
+
+    def test_candidates_probed_concurrently_in_channel_order(self):
+        """Los sondeos se solapan, pero gana el candidato válido más reciente del canal."""
+        self.mock_client.get_latest_channel_entries.return_value = [
+            {"id": "clip", "title": "Desafio resumen", "url": "url_clip"},
+            {"id": "ep51", "title": "Desafio Cap 51", "url": "url_51"},
+            {"id": "ep50", "title": "Desafio Cap 50", "url": "url_50"},
+        ]
+        self.mock_parser.matches_criteria.return_value = True
+
+        old = self._create_dummy_metadata(days_offset=1)
+        ep51 = self._create_dummy_metadata(title="Capitulo 51")
+        ep50 = self._create_dummy_metadata(title="Capitulo 50")
+        delays = {"url_clip": 0.3, "url_51": 0.3, "url_50": 0.05}
+
+        def get_metadata(url):
+            time.sleep(delays[url])
+            return {"url_clip": old, "url_51": ep51, "url_50": ep50}[url]
+
+        self.mock_client.get_metadata.side_effect = get_metadata
+
+        start = time.perf_counter()
+        meta = self.fetcher.fetch_episode()
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(meta.title, "Capitulo 51")  # type: ignore
+        self.assertLess(elapsed, 0.55)
+
+    def test_running_probes_abandoned_after_winner(self):
+        """Con un ganador, los sondeos en curso no validan y queda un lease libre."""
+        with tempfile.TemporaryDirectory() as tmp:
+            self.fetcher.seen_videos = SeenVideos(Path(tmp) / "seen.json")
+            self.mock_client.get_latest_channel_entries.return_value = [
+                {"id": "ep51", "title": "Desafio Cap 51", "url": "url_51"},
+                {"id": "old1", "title": "Desafio Cap 49", "url": "url_old1"},
+                {"id": "old2", "title": "Desafio Cap 48", "url": "url_old2"},
+            ]
+            self.mock_parser.matches_criteria.return_value = True
+
+            ep51 = self._create_dummy_metadata(title="Capitulo 51")
+            old = self._create_dummy_metadata(days_offset=1)
+            running, peak = [], []
+            lock = threading.Lock()
+
+            def get_metadata(url):
+                with lock:
+                    running.append(url)
+                    peak.append(len(running))
+                time.sleep(0.05 if url == "url_51" else 0.2)
+                with lock:
+                    running.remove(url)
+                return ep51 if url == "url_51" else old
+
+            self.mock_client.get_metadata.side_effect = get_metadata
+
+            meta = self.fetcher.fetch_episode()
+            time.sleep(0.3)
+
+            self.assertEqual(meta.title, "Capitulo 51")  # type: ignore
+            # Con un pool de 3, los sondeos usan como máximo 2 instancias
+            self.assertLessEqual(max(peak), 2)
+            self.assertIsNone(self.fetcher.seen_videos.get_verdict("old1"))
+            self.assertIsNone(self.fetcher.seen_videos.get_verdict("old2"))
+
+    def test_metadata_cache_ttls(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = MetadataCache(
+                Path(tmp) / "metadata_cache.json", positive_ttl=0, negative_ttl=60
+            )
+            meta = self._create_dummy_metadata()
+
+            cache.put(meta, negative=False)
+            self.assertIsNone(cache.get(meta.id))
+
+            cache.put(meta, negative=True)
+            self.assertIsNotNone(cache.get(meta.id))
+
+    @patch("tvpipe.services.youtube.client.yt_dlp.YoutubeDL")
+    def test_shared_audio_downloaded_once(self, mock_ydl_cls):
+        """Dos versiones con el mismo audio lo descargan una sola vez desde la caché."""
+
+        downloaded = []
+
+        def fake_ydl(opts):
+            ydl = MagicMock()
+            ydl.params = dict(opts)
+
+            def download(urls):
+                downloaded.append(ydl.params["format"])
+                Path(ydl.params["outtmpl"]).write_bytes(ydl.params["format"].encode())
+
+            ydl.download.side_effect = download
+            return ydl
+
+        mock_ydl_cls.side_effect = fake_ydl
+
+        client = YtDlpClient(pool_size=2)
+        audio = Stream(format_id="140", ext="m4a")
+        pairs = [
+            StreamPair(video=Stream(format_id=vid, ext="mp4", height=h), audio=audio)
+            for vid, h in (("137", 1080), ("134", 360))
+        ]
+
+        with tempfile.TemporaryDirectory() as tmp, patch.object(
+            YtDlpClient,
+            "_mux",
+            side_effect=lambda v, a, out: out.write_bytes(build_mp4()),
+        ):
+            folder = Path(tmp)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                outputs = list(
+                    executor.map(
+                        lambda pair: client.download_stream(
+                            pair,
+                            folder / f"{pair.height}.mp4",
+                            "https://www.youtube.com/watch?v=video123",
+                            cache_dir=folder / ".cache",
+                        ),
+                        pairs,
+                    )
+                )
+
+            self.assertTrue(all(p.exists() for p in outputs))
+            self.assertEqual(sorted(downloaded), ["134", "137", "140"])
+            # Las instancias de yt-dlp se reutilizan entre descargas
+            self.assertLessEqual(mock_ydl_cls.call_count, 2)
+
+    @patch("tvpipe.services.youtube.client.yt_dlp.YoutubeDL")
+    def test_download_telemetry_is_recorded(self, mock_ydl_cls):
+        """Los hooks de yt-dlp alimentan la telemetría que queda en el registro."""
+
+        def fake_ydl(opts):
+            ydl = MagicMock()
+            ydl.params = dict(opts)
+            ydl._progress_hooks = []
+            ydl._postprocessor_hooks = []
+
+            def download(urls):
+                target = ydl.params["outtmpl"]
+                ydl.params["logger"].warning("HTTP Error 503. Retrying (1/10)...")
+                for hook in ydl._progress_hooks:
+                    hook(
+                        {
+                            "status": "downloading",
+                            "filename": target,
+                            "tmpfilename": target + ".part",
+                            "downloaded_bytes": 512,
+                            "speed": 2048.0,
+                            "eta": 4,
+                        }
+                    )
+                    hook({"status": "finished", "filename": target, "total_bytes": 1000})
+                Path(target).write_bytes(b"0" * 1024)
+
+            ydl.download.side_effect = download
+            return ydl
+
+        mock_ydl_cls.side_effect = fake_ydl
+
+        client = YtDlpClient(pool_size=1)
+        audio = Stream(format_id="140", ext="m4a")
+        self.mock_config.qualities = ["1080p", "360p"]
+        self.mock_config.download_workers = 1
+        self.mock_config.generate_video_filename.side_effect = (
+            lambda num, height: f"{num}_{height}.mp4"
+        )
+        self.mock_parser.extract_number.return_value = "50"
+        self.mock_client.select_best_pair.side_effect = lambda meta, **kw: StreamPair(
+            video=Stream(
+                format_id=kw["quality_preference"],
+                ext="mp4",
+                height=int(kw["quality_preference"][:-1]),
+            ),
+            audio=audio,
+        )
+        self.mock_client.download_stream.side_effect = client.download_stream
+
+        meta = self._create_dummy_metadata().model_copy(
+            update={"url": "https://www.youtube.com/watch?v=video123", "duration": 2}
+        )
+        with tempfile.TemporaryDirectory() as tmp, patch.object(
+            YtDlpClient,
+            "_mux",
+            side_effect=lambda v, a, out: out.write_bytes(build_mp4()),
+        ):
+            self.mock_config.download_folder = Path(tmp)
+            dled = self.fetcher.download_episode(meta)
+
+            hd, sd = dled.telemetry
+            self.assertEqual(hd.height, 1080)
+            self.assertEqual(hd.bytes_downloaded, 2000)
+            self.assertEqual(hd.fragment_retries, 2)
+            self.assertEqual((hd.peak_speed, hd.initial_eta), (2048.0, 4))
+            # El audio ya estaba en la caché: la versión SD solo baja su video
+            self.assertEqual(sd.reused_formats, ["140"])
+            self.assertEqual(sd.bytes_downloaded, 1000)
+
+            registry = RegistryManager(Path(tmp) / "download_registry.json")
+            registry.register_downloads("50", dled.video_paths, dled.telemetry)
+            recorded = registry.get_download_telemetry("50")
+            self.assertEqual(
+                [t["file_name"] for t in recorded], ["50_1080.mp4", "50_360.mp4"]
+            )
+
+    @patch("tvpipe.services.youtube.client.yt_dlp.YoutubeDL")
+    def test_fast_probe_falls_back_to_full_extraction(self, mock_ydl_cls):
+        """Si el sondeo rápido no trae audio AAC, se repite la extracción completa."""
+        probes = []
+
+        def fake_ydl(opts):
+            ydl = MagicMock()
+            ydl.params = dict(opts)
+
+            def extract_info(url, download=False):
+                youtube_args = ydl.params.get("extractor_args", {}).get("youtube", {})
+                probes.append(youtube_args.get("player_client"))
+                formats = [
+                    {"format_id": "137", "ext": "mp4", "vcodec": "avc1.640028"},
+                    {"format_id": "sb0", "ext": "mhtml", "format_note": "storyboard"},
+                ]
+                if not youtube_args:
+                    formats.append(
+                        {"format_id": "140", "ext": "m4a", "acodec": "mp4a.40.2"}
+                    )
+                return {
+                    "id": "video123",
+                    "title": "Capitulo 50",
+                    "timestamp": int(datetime.now().timestamp()),
+                    "is_live": False,
+                    "formats": formats,
+                }
+
+            ydl.extract_info.side_effect = extract_info
+            ydl.sanitize_info.side_effect = lambda info: info
+            return ydl
+
+        mock_ydl_cls.side_effect = fake_ydl
+
+        meta = YtDlpClient(pool_size=1).get_metadata(
+            "https://www.youtube.com/watch?v=video123"
+        )
+
+        self.assertEqual(probes, [["tv"], None])
+        self.assertEqual([s.format_id for s in meta.streams], ["137", "140"])
+
+    @patch("tvpipe.services.youtube.client.yt_dlp.YoutubeDL")
+    def test_fast_probe_must_cover_configured_qualities(self, mock_ydl_cls):
+        """Si al sondeo rápido le falta una calidad configurada, no se acepta."""
+        probes = []
+
+        def fake_ydl(opts):
+            ydl = MagicMock()
+            ydl.params = dict(opts)
+
+            def extract_info(url, download=False):
+                youtube_args = ydl.params.get("extractor_args", {}).get("youtube", {})
+                probes.append(youtube_args.get("player_client"))
+                formats = [
+                    {"format_id": "136", "height": 720, "vcodec": "avc1.4d401f"},
+                    {"format_id": "140", "ext": "m4a", "acodec": "mp4a.40.2"},
+                ]
+                if not youtube_args:
+                    formats.append(
+                        {"format_id": "137", "height": 1080, "vcodec": "avc1.640028"}
+                    )
+                return {
+                    "id": "video123",
+                    "title": "Capitulo 50",
+                    "timestamp": int(datetime.now().timestamp()),
+                    "is_live": False,
+                    "formats": formats,
+                }
+
+            ydl.extract_info.side_effect = extract_info
+            ydl.sanitize_info.side_effect = lambda info: info
+            return ydl
+
+        mock_ydl_cls.side_effect = fake_ydl
+        url = "https://www.youtube.com/watch?v=video123"
+
+        YtDlpClient(pool_size=1, qualities=["best", "720p"]).get_metadata(url)
+        self.assertEqual(probes, [["tv"]])
+
+        probes.clear()
+        meta = YtDlpClient(pool_size=1, qualities=["1080p", "720p"]).get_metadata(url)
+        self.assertEqual(probes, [["tv"], None])
+        self.assertIn("137", [s.format_id for s in meta.streams])
+
     @patch(
         "tvpipe.services.register.RegistryManager._load",
         return_value=[
@@ -142,6 +594,69 @@ class TestYouTubeFetcher(unittest.TestCase):
         self.assertTrue(is_episode_published)
 
 
+    def test_backfill_candidates_in_range(self):
+        """
+        Escenario: El historial del canal llega en páginas (más nuevo primero).
+        Result: Solo los episodios del rango, sin los ya publicados, del más viejo
+        al más nuevo; se deja de paginar al pasar el inicio del rango.
+        """
+        self.fetcher.strategy = CaracolDesafioParser()
+        pages = [
+            [
+                {"title": "Capítulo 13", "url": "url_13"},
+                {"title": "Avance Capítulo 12", "url": "url_avance"},
+                {"title": "Capítulo 012", "url": "url_12"},
+            ],
+            [
+                {"title": "Capítulo 11", "url": "url_11"},
+                {"title": "Capítulo 10", "url": "url_10"},
+                {"title": "Capítulo 9", "url": "url_9"},
+            ],
+            [{"title": "Capítulo 8", "url": "url_8"}],
+        ]
+        requested = []
+
+        def iter_pages(*args, **kwargs):
+            for page in pages:
+                requested.append(page)
+                yield page
+
+        self.mock_client.iter_channel_pages.side_effect = iter_pages
+
+        candidates = self.fetcher.find_backfill_candidates(
+            10, 12, is_done=lambda number: number == "11"
+        )
+
+        self.assertEqual(
+            candidates,
+            [("10", "url_10", "Capítulo 10"), ("012", "url_12", "Capítulo 012")],
+        )
+        # La tercera página nunca se pidió
+        self.assertEqual(len(requested), 2)
+
+    def test_stream_table_filters_at_ingestion(self):
+        """
+        Escenario: yt-dlp devuelve storyboards, formatos sin códecs y formatos útiles.
+        Result: La tabla solo guarda los útiles; los Stream se crean al pedirlos.
+        """
+        formats = [
+            {"format_id": "sb0", "format_note": "storyboard", "ext": "mhtml"},
+            {"format_id": "x", "ext": "mp4", "vcodec": "none", "acodec": "none"},
+            {"format_id": "137", "ext": "mp4", "vcodec": "avc1.640028", "height": 1080},
+            {"format_id": "140", "ext": "m4a", "acodec": "mp4a.40.2", "abr": 129.5},
+        ]
+        table = StreamTable.from_formats(formats)
+        self.assertEqual([row.format_id for row in table], ["137", "140"])
+
+        meta = self._create_dummy_metadata()
+        meta = VideoMetadata(**meta.model_dump(exclude={"streams"}), streams=table)
+        self.assertIsNone(meta._stream_models)
+
+        pair = YtDlpClient().select_best_pair(meta, "1080p")
+        self.assertIsInstance(pair.video, Stream)
+        self.assertEqual((pair.video.format_id, pair.audio.format_id), ("137", "140"))
+        self.assertEqual(len(meta.model_dump()["streams"]), 2)
+
     # def test_skip_old_videos(self):
     #     """
     #     Escenario: Encuentra un video que coincide con el título, pero es de AYER.
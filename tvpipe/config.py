@@ -1,7 +1,7 @@
 from datetime import time
 from functools import lru_cache
 from pathlib import Path
-from typing import List, Literal, Union
+from typing import List, Literal, Optional, Union
 
 from pydantic import computed_field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -17,7 +17,18 @@ class MigrationConfig(BaseSettings):
     backup_chat_id: Union[int, str]
     placeholder_image_path: Path = Path("assets/placeholder.jpg")
 
+    # Mensajes a escanear por lote desde el último checkpoint (0 = todos)
     batch_size: int = 0
+
+    # Pipeline de migración: concurrencia y ritmo (operaciones/segundo) por etapa
+    copy_workers: int = 2
+    obfuscate_workers: int = 4
+    copy_rate: float = 1.0
+    obfuscate_rate: float = 3.0
+    queue_size: int = 50
+    # Restauraciones simultáneas (siguen sujetas al límite global de Telegram)
+    restore_workers: int = 4
+
     obfuscation_caption: str = "<b>Este contenido ya no esta disponible.</b>\n\n"
 
     model_config = SettingsConfigDict(
@@ -44,6 +55,20 @@ class TelegramConfig(BaseSettings):
     caption: str = "Capítulo {episode} - Desafío Siglo XXI\n\n"
     watermark_text: str = "LeinScript"
 
+    # Límite por archivo de Telegram (2 GB en cuentas normales).
+    # Los videos que lo superen se dividen en partes antes de subirse.
+    max_upload_size: int = 2000 * 1024 * 1024
+    upload_workers: int = 3
+
+    # Publica primero la versión más liviana y agrega el HD al álbum cuando esté lista
+    progressive_publish: bool = False
+
+    # "fake" usa el backend en memoria (pruebas de carga sin cuenta real)
+    backend: Literal["pyrogram", "fake"] = "pyrogram"
+
+    # Límite global de llamadas a la API (0 = sin límite)
+    requests_per_second: float = 10.0
+
     model_config = SettingsConfigDict(
         env_file="config.env",
         env_file_encoding="utf-8",
@@ -83,8 +108,20 @@ class DownloaderConfig(BaseSettings):
     qualities: Union[List[Union[int, str]], str] = ["best", "360"]
 
     channel_url: str = "https://www.youtube.com/@desafiocaracol/videos"
+    # ID del canal (UC...) para sondear su feed Atom. Si falta, se resuelve con yt-dlp
+    channel_id: Optional[str] = None
 
     output_as_mp4: bool = True
+    # Versiones (calidades) que se descargan a la vez
+    download_workers: int = 2
+    # Motor de descarga de cada formato: yt-dlp o rangos con varias conexiones
+    download_engine: Literal["yt-dlp", "ranged"] = "yt-dlp"
+    range_connections: int = 4
+    # Espacio en disco: reserva mínima libre y días que se conservan los videos publicados
+    min_free_space_mb: int = 2048
+    retention_days: float = 7
+    # Candidatos del canal que se sondean a la vez (como máximo ytdlp_pool_size - 1)
+    probe_workers: int = 3
     skip_weekends: bool = True
     check_episode_publication: bool = True
 
@@ -96,6 +133,16 @@ class DownloaderConfig(BaseSettings):
     forbidden_keyword: str = "avance"
     max_consecutive_errors: int = 15
 
+    # Caché de metadatos (segundos): lo que ya se descartó se recuerda más tiempo
+    metadata_positive_ttl: int = 1800
+    metadata_negative_ttl: int = 86400
+
+    # Instancias de yt-dlp reutilizadas y su caché en disco (player JS, firmas)
+    ytdlp_pool_size: int = 3
+    ytdlp_cache_dir: Path = Path("registry/yt_dlp_cache")
+    # Sondeo liviano de candidatos (menos clientes, sin subtítulos ni storyboards)
+    fast_probe: bool = True
+
     model_config = SettingsConfigDict(
         env_file="config.env",
         env_file_encoding="utf-8",
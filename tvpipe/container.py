@@ -1,13 +1,22 @@
 from tvpipe.config import AppConfig
 from tvpipe.services.caracoltv import CaracolTVSchedule
+from tvpipe.services.channel_index import ChannelIndex
 from tvpipe.services.monitor import ProgramMonitor
+from tvpipe.services.outbox import PublishOutbox
 from tvpipe.services.publisher import EpisodePublisher
 from tvpipe.services.register import RegistryManager
+from tvpipe.services.splitter import VideoSplitter
+from tvpipe.services.storage import StorageManager
 from tvpipe.services.telegram import TelegramService
+from tvpipe.services.telegram.fake import FakeTelegramClient
 from tvpipe.services.watermark import WatermarkService
+from tvpipe.services.youtube.cache import MetadataCache
 from tvpipe.services.youtube.client import YtDlpClient
+from tvpipe.services.youtube.feed import ChannelFeedPoller
+from tvpipe.services.youtube.seen import SeenVideos
 from tvpipe.services.youtube.service import YouTubeFetcher
 from tvpipe.services.youtube.strategies import CaracolDesafioParser
+from tvpipe.utils import RateLimiter
 
 
 class ServiceContainer:
@@ -18,36 +27,82 @@ class ServiceContainer:
 
     def __init__(self, config: AppConfig):
         self.register = RegistryManager()
+        self.strategy = CaracolDesafioParser()
 
         self.tg = TelegramService(
             session_name=config.telegram.session_name,
             api_id=config.telegram.api_id,
             api_hash=config.telegram.api_hash,
             workdir=config.telegram.to_telegram_working,
+            client=self._build_telegram_backend(config),
+            rate_limiter=(
+                RateLimiter(config.telegram.requests_per_second)
+                if config.telegram.requests_per_second > 0
+                else None
+            ),
+        )
+
+        self.channel_index = ChannelIndex(
+            telegram_service=self.tg, episode_parser=self.strategy
         )
 
         self.watermark = WatermarkService()
 
+        self.splitter = VideoSplitter(max_part_size=config.telegram.max_upload_size)
+
         self.schedule = CaracolTVSchedule()
 
-        self.monitor = ProgramMonitor(
-            client=self.schedule,
-            program_url_keyword=config.youtube.program_keyword,
-            fetcher=self.downloader,
-            config=config.youtube,
-        )
+        self.outbox = PublishOutbox(telegram_service=self.tg, registry=self.register)
 
         self.publisher = EpisodePublisher(
-            config=config.telegram, telegram_client=self.tg, registry=self.register
+            config=config.telegram,
+            telegram_client=self.tg,
+            registry=self.register,
+            channel_index=self.channel_index,
+            outbox=self.outbox,
         )
 
         # 3. Servicios de Descarga
-        self.yt_client = YtDlpClient()
-        self.strategy = CaracolDesafioParser()
+        self.yt_client = YtDlpClient(
+            cache_dir=config.youtube.ytdlp_cache_dir,
+            pool_size=config.youtube.ytdlp_pool_size,
+            fast_probe=config.youtube.fast_probe,
+            engine=config.youtube.download_engine,
+            range_connections=config.youtube.range_connections,
+            qualities=config.youtube.qualities,
+        )
+
+        self.storage = StorageManager(
+            download_folder=config.youtube.download_folder,
+            registry=self.register,
+            min_free_bytes=config.youtube.min_free_space_mb * 1024 * 1024,
+            retention_days=config.youtube.retention_days,
+        )
 
         self.downloader = YouTubeFetcher(
             config=config.youtube,
             registry=self.register,
             episode_parser=self.strategy,
             client=self.yt_client,
+            metadata_cache=MetadataCache(
+                positive_ttl=config.youtube.metadata_positive_ttl,
+                negative_ttl=config.youtube.metadata_negative_ttl,
+            ),
+            seen_videos=SeenVideos(),
+            feed_poller=ChannelFeedPoller(channel_id=config.youtube.channel_id),
+            storage=self.storage,
+        )
+
+        # El monitor depende del downloader, por eso se crea al final
+        self.monitor = ProgramMonitor(
+            client=self.schedule,
+            program_url_keyword=config.youtube.program_keyword,
+            fetcher=self.downloader,
+            config=config.youtube,
         )
+
+    def _build_telegram_backend(self, config: AppConfig):
+        """Devuelve el backend alternativo configurado o None para usar Pyrogram."""
+        if config.telegram.backend == "fake":
+            return FakeTelegramClient()
+        return None
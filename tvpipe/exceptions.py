@@ -11,6 +11,18 @@ class DownloadError(TVPipeError):
     pass
 
 
+class InsufficientStorageError(DownloadError):
+    """No hay espacio libre suficiente para descargar el episodio."""
+
+    pass
+
+
+class IntegrityError(DownloadError):
+    """El archivo descargado está truncado o mal unido."""
+
+    pass
+
+
 class EpisodeNotFoundError(TVPipeError):
     """No se encontró el episodio o los metadatos son inválidos."""
 
@@ -36,7 +48,19 @@ class ContentNotFoundError(TelegramError):
     pass
 
 
+class MediaReferenceError(TelegramError):
+    """Telegram rechazó el file_id usado (referencia vencida o medio inválido)."""
+
+    pass
+
+
 class UploadError(TelegramError):
     """Fallo al subir un archivo."""
 
     pass
+
+
+class SplitError(TVPipeError):
+    """No se pudo dividir un video en partes aptas para Telegram."""
+
+    pass
@@ -1,10 +1,34 @@
 from pathlib import Path
-from typing import List, Literal, Optional, cast
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Optional, Union, cast
 
-from pydantic import BaseModel, Field, computed_field
+from pydantic import BaseModel, Field, PrivateAttr, computed_field
 
 
-class Stream(BaseModel):
+class _StreamTraits:
+    """Clasificación de un formato, común a `Stream` y `StreamRow`."""
+
+    __slots__ = ()
+
+    @property
+    def is_video(self) -> bool:
+        return self.vcodec != "none" and "video" not in self.vcodec
+
+    @property
+    def is_audio_only(self) -> bool:
+        return self.acodec != "none" and self.vcodec == "none"
+
+    @property
+    def is_h264(self) -> bool:
+        """Verifica si es compatible con MP4 estándar (avc1)."""
+        return "avc1" in (self.vcodec or "").lower()
+
+    @property
+    def is_aac(self) -> bool:
+        """Verifica si es audio compatible con MP4 estándar (mp4a)."""
+        return "mp4a" in (self.acodec or "").lower()
+
+
+class Stream(_StreamTraits, BaseModel):
     format_id: str
     url: Optional[str] = None
     ext: str
@@ -25,23 +49,120 @@ class Stream(BaseModel):
         """Devuelve el tamaño real o aproximado, o 0 si no existe."""
         return self.filesize or self.filesize_approx or 0
 
-    @property
-    def is_video(self) -> bool:
-        return self.vcodec != "none" and "video" not in self.vcodec
 
-    @property
-    def is_audio_only(self) -> bool:
-        return self.acodec != "none" and self.vcodec == "none"
+# yt-dlp marca con "none" (o deja en None) el códec que un formato no trae
+_NO_CODEC = ("none", None)
+
+
+class StreamRow(_StreamTraits):
+    """
+    Formato en su forma compacta: solo los campos que usan la selección
+    (`select_best_pair`) y la descarga. Sin validación ni copia de Pydantic.
+    """
+
+    __slots__ = (
+        "format_id",
+        "url",
+        "ext",
+        "vcodec",
+        "acodec",
+        "height",
+        "abr",
+        "filesize",
+        "filesize_approx",
+    )
+
+    def __init__(
+        self,
+        format_id: str,
+        ext: str,
+        url: Optional[str] = None,
+        vcodec: Optional[str] = None,
+        acodec: Optional[str] = None,
+        height: Optional[int] = None,
+        abr: Optional[float] = None,
+        filesize: Optional[int] = None,
+        filesize_approx: Optional[int] = None,
+    ):
+        self.format_id = str(format_id)
+        self.ext = ext
+        self.url = url
+        self.vcodec = vcodec or "none"
+        self.acodec = acodec or "none"
+        self.height = height
+        self.abr = abr
+        self.filesize = int(filesize) if filesize else None
+        self.filesize_approx = int(filesize_approx) if filesize_approx else None
+
+    @classmethod
+    def from_format(cls, fmt: Any) -> "StreamRow":
+        """Desde un formato de yt-dlp (o un Stream ya serializado) o un Stream."""
+        get = (fmt.__dict__ if isinstance(fmt, Stream) else fmt).get
+        return cls(
+            get("format_id"),
+            get("ext"),
+            get("url"),
+            get("vcodec"),
+            get("acodec"),
+            get("height"),
+            get("abr"),
+            get("filesize"),
+            get("filesize_approx"),
+        )
 
     @property
-    def is_h264(self) -> bool:
-        """Verifica si es compatible con MP4 estándar (avc1)."""
-        return "avc1" in (self.vcodec or "").lower()
+    def size_bytes(self) -> int:
+        return self.filesize or self.filesize_approx or 0
 
-    @property
-    def is_aac(self) -> bool:
-        """Verifica si es audio compatible con MP4 estándar (mp4a)."""
-        return "mp4a" in (self.acodec or "").lower()
+    def to_model(self) -> Stream:
+        return Stream.model_construct(
+            **{name: getattr(self, name) for name in self.__slots__}
+        )
+
+
+class StreamTable:
+    """
+    Formatos de un video en filas compactas. La conversión a `Stream` (Pydantic)
+    se hace solo al cruzar un límite: serializar o entregar el par elegido.
+    """
+
+    __slots__ = ("rows",)
+
+    def __init__(self, rows: Iterable[StreamRow] = ()):
+        self.rows: List[StreamRow] = list(rows)
+
+    @classmethod
+    def from_formats(cls, formats: Iterable[dict]) -> "StreamTable":
+        """
+        Ingesta de `info["formats"]`: descarta sin construir nada los storyboards,
+        los formatos sin ID y los que no traen ni video ni audio.
+        """
+        rows = []
+        for fmt in formats:
+            get = fmt.get
+            if not get("format_id") or get("ext") == "mhtml":
+                continue
+            if get("format_note") == "storyboard":
+                continue
+            if (
+                get("vcodec", "none") in _NO_CODEC
+                and get("acodec", "none") in _NO_CODEC
+            ):
+                continue
+            rows.append(StreamRow.from_format(fmt))
+        return cls(rows)
+
+    def __iter__(self) -> Iterator[StreamRow]:
+        return iter(self.rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def find(self, format_id: str) -> Optional[StreamRow]:
+        return next((r for r in self.rows if r.format_id == format_id), None)
+
+    def to_models(self) -> List[Stream]:
+        return [row.to_model() for row in self.rows]
 
 
 class StreamPair(BaseModel):
@@ -53,11 +174,35 @@ class StreamPair(BaseModel):
         return cast(int, self.video.height)
 
 
+class DownloadTelemetry(BaseModel):
+    """Métricas de la descarga de una versión (StreamPair)."""
+
+    file_name: str
+    height: Optional[int] = None
+    video_format_id: str
+    audio_format_id: str
+
+    bytes_downloaded: int = 0
+    avg_speed: Optional[float] = None  # bytes/segundo
+    peak_speed: Optional[float] = None
+    initial_eta: Optional[int] = None  # segundos estimados al empezar
+    fragment_retries: int = 0
+    # Formatos tomados de la caché compartida (no se descargaron para esta versión)
+    reused_formats: List[str] = Field(default_factory=list)
+
+    download_seconds: float = 0.0
+    merge_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+
 class DownloadedEpisode(BaseModel):
     episode_number: str
     video_paths: List[Path]
     # thumbnail_path: Path
     source: Literal["youtube"]
+    # Publicación progresiva: versiones que todavía se están descargando
+    pending_variants: int = 0
+    telemetry: List[DownloadTelemetry] = Field(default_factory=list)
 
 
 class VideoMetadata(BaseModel):
@@ -65,7 +210,34 @@ class VideoMetadata(BaseModel):
     title: str
     thumbnail_url: Optional[str] = None
     duration: Optional[int] = None
-    streams: List[Stream] = Field(default_factory=list)
     timestamp: int
     was_live: bool
     url: str
+    # Respuesta completa (saneada) de yt-dlp: permite descargar sin volver a sondear
+    raw_info: Optional[Dict[str, Any]] = Field(default=None, repr=False)
+
+    # Los formatos viven en una tabla compacta; `streams` se arma al pedirlo
+    _stream_table: StreamTable = PrivateAttr(default_factory=StreamTable)
+    _stream_models: Optional[List[Stream]] = PrivateAttr(default=None)
+
+    def __init__(
+        self,
+        streams: Union[StreamTable, Iterable[Union[Stream, dict]]] = (),
+        **data: Any,
+    ):
+        super().__init__(**data)
+        if isinstance(streams, StreamTable):
+            self._stream_table = streams
+        else:
+            self._stream_table = StreamTable(StreamRow.from_format(s) for s in streams)
+
+    @property
+    def stream_table(self) -> StreamTable:
+        return self._stream_table
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def streams(self) -> List[Stream]:
+        if self._stream_models is None:
+            self._stream_models = self._stream_table.to_models()
+        return self._stream_models
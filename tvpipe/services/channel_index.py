@@ -0,0 +1,230 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, TypedDict, Union
+
+from pyrogram.types import Message  # type: ignore
+
+from tvpipe.interfaces import EpisodeParser
+from tvpipe.services.telegram.client import TelegramService
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_INDEX_DIR = Path.cwd() / "registry/channel_index"
+
+
+class IndexedMessage(TypedDict):
+    message_id: int
+    media_group_id: Optional[str]
+    date: Optional[str]
+    episode_number: Optional[str]
+    file_unique_id: Optional[str]
+
+
+class _ChatIndex:
+    """Índice en memoria de un chat, con búsquedas O(1) por episodio, álbum y archivo."""
+
+    def __init__(self, chat_id: Union[int, str], last_message_id: int = 0):
+        self.chat_id = chat_id
+        self.last_message_id = last_message_id
+        self.messages: Dict[int, IndexedMessage] = {}
+        self.by_episode: Dict[str, List[int]] = {}
+        self.by_media_group: Dict[str, List[int]] = {}
+        self.by_file_unique_id: Dict[str, int] = {}
+
+    def add(self, item: IndexedMessage) -> None:
+        message_id = item["message_id"]
+        self.messages[message_id] = item
+        self.last_message_id = max(self.last_message_id, message_id)
+
+        if item["media_group_id"]:
+            group = self.by_media_group.setdefault(item["media_group_id"], [])
+            if message_id not in group:
+                group.append(message_id)
+                group.sort()
+        if item["file_unique_id"]:
+            self.by_file_unique_id[item["file_unique_id"]] = message_id
+        if item["episode_number"]:
+            ids = self.by_episode.setdefault(item["episode_number"], [])
+            if message_id not in ids:
+                ids.append(message_id)
+
+    def propagate_album_episodes(self, media_group_ids: List[str]) -> None:
+        """
+        En un álbum solo el primer mensaje lleva caption.
+        Se hereda el número de episodio al resto de partes.
+        """
+        for group_id in media_group_ids:
+            ids = self.by_media_group.get(group_id, [])
+            episode = next(
+                (
+                    self.messages[i]["episode_number"]
+                    for i in ids
+                    if self.messages[i]["episode_number"]
+                ),
+                None,
+            )
+            if not episode:
+                continue
+            for i in ids:
+                if not self.messages[i]["episode_number"]:
+                    self.messages[i]["episode_number"] = episode
+                    self.by_episode.setdefault(episode, []).append(i)
+
+    def to_json(self) -> dict:
+        return {
+            "chat_id": self.chat_id,
+            "last_message_id": self.last_message_id,
+            "messages": list(self.messages.values()),
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "_ChatIndex":
+        index = cls(data["chat_id"], data.get("last_message_id", 0))
+        for item in data.get("messages", []):
+            index.add(item)
+        return index
+
+
+class ChannelIndex:
+    """
+    Copia local e incremental del historial de los canales.
+    Permite responder "¿está el episodio N en el chat X?" o "¿dónde está el álbum Y?"
+    sin recorrer `get_history` cada vez.
+    """
+
+    def __init__(
+        self,
+        telegram_service: TelegramService,
+        episode_parser: EpisodeParser,
+        index_dir: Optional[Union[str, Path]] = None,
+    ):
+        self.tg = telegram_service
+        self.parser = episode_parser
+        self.index_dir = CHANNEL_INDEX_DIR if index_dir is None else Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+
+        self._chats: Dict[str, _ChatIndex] = {}
+        self._lock = threading.RLock()
+
+    def _index_file(self, chat_id: Union[int, str]) -> Path:
+        return self.index_dir / f"{chat_id}.json"
+
+    def _get_chat(self, chat_id: Union[int, str]) -> _ChatIndex:
+        key = str(chat_id)
+        with self._lock:
+            if key not in self._chats:
+                self._chats[key] = self._load(chat_id)
+            return self._chats[key]
+
+    def _load(self, chat_id: Union[int, str]) -> _ChatIndex:
+        path = self._index_file(chat_id)
+        if path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return _ChatIndex.from_json(json.load(f))
+            except json.JSONDecodeError as e:
+                logger.warning(f"Índice de {chat_id} corrupto ({e}). Se reconstruirá.")
+        return _ChatIndex(chat_id)
+
+    def _save(self, index: _ChatIndex) -> None:
+        with open(self._index_file(index.chat_id), "w", encoding="utf-8") as f:
+            json.dump(index.to_json(), f, indent=2, ensure_ascii=False)
+
+    def _extract_episode(self, message: Message) -> Optional[str]:
+        # Solo un video o documento publica un episodio: un avance o un texto
+        # que menciona "Capítulo N" no debe marcarlo como presente
+        caption = message.caption
+        if not caption or not (message.video or message.document):
+            return None
+        if not self.parser.matches_criteria(caption):
+            return None
+        try:
+            return self.parser.extract_number(caption)
+        except ValueError:
+            return None
+
+    def _to_entry(self, message: Message) -> IndexedMessage:
+        media = message.video or message.document or message.photo
+        return {
+            "message_id": message.id,
+            "media_group_id": message.media_group_id,
+            "date": message.date.isoformat() if message.date else None,
+            "episode_number": self._extract_episode(message),
+            "file_unique_id": media.file_unique_id if media else None,
+        }
+
+    def sync(self, chat_id: Union[int, str], full: bool = False) -> int:
+        """
+        Trae del historial solo los mensajes posteriores al último visto.
+        Con `full=True` se reconstruye el índice completo (ej: tras ediciones).
+
+        Returns:
+            Cantidad de mensajes nuevos indexados.
+        """
+        with self._lock:
+            index = _ChatIndex(chat_id) if full else self._get_chat(chat_id)
+            last_seen = index.last_message_id
+
+            new_entries = []
+            # El historial llega del más nuevo al más viejo: paramos al llegar a lo conocido
+            for message in self.tg.get_history(chat_id, limit=0):
+                if message.id <= last_seen:
+                    break
+                if message.empty or message.service:
+                    continue
+                new_entries.append(self._to_entry(message))
+
+            for entry in reversed(new_entries):
+                index.add(entry)
+            index.propagate_album_episodes(
+                list({e["media_group_id"] for e in new_entries if e["media_group_id"]})
+            )
+
+            self._chats[str(chat_id)] = index
+            self._save(index)
+
+        logger.info(
+            f"Índice de {chat_id} sincronizado: {len(new_entries)} mensajes nuevos "
+            f"(último ID {index.last_message_id})."
+        )
+        return len(new_entries)
+
+    def is_episode_in_chat(self, chat_id: Union[int, str], episode_number: str) -> bool:
+        return bool(self._get_chat(chat_id).by_episode.get(str(episode_number)))
+
+    def get_episode_messages(
+        self, chat_id: Union[int, str], episode_number: str
+    ) -> List[IndexedMessage]:
+        index = self._get_chat(chat_id)
+        return [
+            index.messages[i] for i in index.by_episode.get(str(episode_number), [])
+        ]
+
+    def get_album(
+        self, chat_id: Union[int, str], media_group_id: str
+    ) -> List[IndexedMessage]:
+        index = self._get_chat(chat_id)
+        return [index.messages[i] for i in index.by_media_group.get(media_group_id, [])]
+
+    def locate_album(
+        self, media_group_id: str
+    ) -> Optional[Tuple[Union[int, str], List[int]]]:
+        """Busca un álbum en los chats ya indexados. Devuelve (chat_id, ids)."""
+        with self._lock:
+            for index in self._chats.values():
+                ids = index.by_media_group.get(media_group_id)
+                if ids:
+                    return index.chat_id, list(ids)
+        return None
+
+    def get_message(
+        self, chat_id: Union[int, str], message_id: int
+    ) -> Optional[IndexedMessage]:
+        return self._get_chat(chat_id).messages.get(message_id)
+
+    def find_by_file_unique_id(
+        self, chat_id: Union[int, str], file_unique_id: str
+    ) -> Optional[int]:
+        return self._get_chat(chat_id).by_file_unique_id.get(file_unique_id)
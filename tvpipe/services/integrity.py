@@ -0,0 +1,260 @@
+import io
+import logging
+import shutil
+import struct
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from tvpipe.exceptions import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+# Contenedores que se validan (ffmpeg/yt-dlp los escriben con cajas ISO BMFF)
+MP4_SUFFIXES = (".mp4", ".m4a", ".m4v", ".mov")
+
+# El moov de un capítulo de una hora pesa unos pocos MB; más que esto es basura
+MAX_MOOV_SIZE = 64 * 1024 * 1024
+
+# Por debajo de ~32 kbit/s el mdat no alcanza para la duración que declara el moov
+MIN_BYTES_PER_SECOND = 4000
+
+# Diferencia tolerada entre duraciones: la mayor entre segundos fijos y proporción
+DURATION_TOLERANCE_SECONDS = 2.0
+DURATION_TOLERANCE_RATIO = 0.02
+
+QUARANTINE_DIR = ".quarantine"
+
+Box = Tuple[str, int, int, int]  # (tipo, inicio, largo de la cabecera, tamaño total)
+
+
+@dataclass
+class Mp4Report:
+    size: int
+    boxes: List[str] = field(default_factory=list)
+    fragmented: bool = False
+    movie_duration: Optional[float] = None
+    track_durations: List[float] = field(default_factory=list)
+    media_bytes: int = 0
+
+
+def iter_boxes(stream: BinaryIO, start: int, end: int) -> Iterator[Box]:
+    """
+    Recorre las cajas entre `start` y `end` leyendo solo sus cabeceras.
+    Una caja que declara más bytes de los que hay es un archivo truncado.
+    """
+    offset = start
+    while offset < end:
+        if end - offset < 8:
+            raise IntegrityError(f"Cabecera de caja incompleta en el byte {offset}.")
+        stream.seek(offset)
+        size, raw_type = struct.unpack(">I4s", stream.read(8))
+        box_type = raw_type.decode("latin-1")
+        header = 8
+        if size == 1:
+            if end - offset < 16:
+                raise IntegrityError(f"Caja '{box_type}' sin tamaño extendido.")
+            (size,) = struct.unpack(">Q", stream.read(8))
+            header = 16
+        elif size == 0:
+            # Tamaño 0: la caja llega hasta el final del contenedor
+            size = end - offset
+
+        if size < header:
+            raise IntegrityError(
+                f"Caja '{box_type}' con tamaño inválido ({size}) en el byte {offset}."
+            )
+        if offset + size > end:
+            raise IntegrityError(
+                f"La caja '{box_type}' declara {size} bytes desde el byte {offset}, "
+                f"pero el contenedor termina en {end}: archivo truncado."
+            )
+        yield box_type, offset, header, size
+        offset += size
+
+
+def inspect_mp4(path: Union[str, Path]) -> Mp4Report:
+    """
+    Lee la estructura de un MP4 sin cargar el mdat: cajas de primer nivel,
+    duración del moov (mvhd), duración de cada pista (mdhd) y que los
+    offsets de los chunks (stco/co64) caigan dentro de algún mdat.
+    """
+    path = Path(path)
+    report = Mp4Report(size=path.stat().st_size)
+    mdat_ranges: List[Tuple[int, int]] = []
+    moov: Optional[bytes] = None
+
+    with open(path, "rb") as f:
+        for box_type, start, header, size in iter_boxes(f, 0, report.size):
+            report.boxes.append(box_type)
+            if box_type == "mdat":
+                mdat_ranges.append((start + header, start + size))
+                report.media_bytes += size - header
+            elif box_type == "moof":
+                report.fragmented = True
+            elif box_type == "moov":
+                if size > MAX_MOOV_SIZE:
+                    raise IntegrityError(f"Caja moov desproporcionada ({size} bytes).")
+                f.seek(start + header)
+                moov = f.read(size - header)
+
+    if not report.boxes or report.boxes[0] != "ftyp":
+        raise IntegrityError("El archivo no empieza con una caja ftyp.")
+    if moov is None:
+        raise IntegrityError("Falta la caja moov (la unión no terminó).")
+    if not mdat_ranges or report.media_bytes == 0:
+        raise IntegrityError("Falta la caja mdat o está vacía.")
+
+    _inspect_moov(moov, report, mdat_ranges)
+    return report
+
+
+def _inspect_moov(
+    moov: bytes, report: Mp4Report, mdat_ranges: List[Tuple[int, int]]
+) -> None:
+    stream = io.BytesIO(moov)
+    for box_type, start, header, size in iter_boxes(stream, 0, len(moov)):
+        payload = moov[start + header : start + size]
+        if box_type == "mvhd":
+            report.movie_duration = _header_duration(payload, "mvhd")
+        elif box_type == "trak":
+            duration, offsets = _inspect_trak(payload)
+            if duration is not None:
+                report.track_durations.append(duration)
+            for offset in offsets:
+                if not any(lo <= offset < hi for lo, hi in mdat_ranges):
+                    raise IntegrityError(
+                        f"Un chunk apunta al byte {offset}, fuera de los datos (mdat)."
+                    )
+
+    if report.movie_duration is None:
+        raise IntegrityError("El moov no tiene cabecera mvhd.")
+    if not report.track_durations:
+        raise IntegrityError("El moov no tiene pistas.")
+
+
+def _inspect_trak(trak: bytes) -> Tuple[Optional[float], List[int]]:
+    """Duración de la pista (mdhd) y offsets de sus chunks (stco/co64)."""
+    boxes = _children(trak)
+    mdia = boxes.get("mdia")
+    if mdia is None:
+        return None, []
+    mdia_boxes = _children(mdia)
+
+    duration = None
+    if "mdhd" in mdia_boxes:
+        duration = _header_duration(mdia_boxes["mdhd"], "mdhd")
+
+    stbl = _children(_children(mdia_boxes.get("minf", b"")).get("stbl", b""))
+    offsets: List[int] = []
+    if "stco" in stbl:
+        offsets = _chunk_offsets(stbl["stco"], ">I")
+    elif "co64" in stbl:
+        offsets = _chunk_offsets(stbl["co64"], ">Q")
+    return duration, offsets
+
+
+def _children(data: bytes) -> Dict[str, bytes]:
+    """Cajas hijas (primera de cada tipo) de un contenedor ya en memoria."""
+    children: Dict[str, bytes] = {}
+    for box_type, start, header, size in iter_boxes(io.BytesIO(data), 0, len(data)):
+        children.setdefault(box_type, data[start + header : start + size])
+    return children
+
+
+def _header_duration(payload: bytes, name: str) -> float:
+    """Duración en segundos de una cabecera mvhd/mdhd (versión 0 o 1)."""
+    try:
+        if payload[0] == 1:
+            timescale, duration = struct.unpack_from(">IQ", payload, 20)
+        else:
+            timescale, duration = struct.unpack_from(">II", payload, 12)
+    except (IndexError, struct.error):
+        raise IntegrityError(f"Cabecera {name} incompleta.")
+    if timescale == 0:
+        raise IntegrityError(f"Cabecera {name} con timescale 0.")
+    return duration / timescale
+
+
+def _chunk_offsets(payload: bytes, entry_format: str) -> List[int]:
+    try:
+        (count,) = struct.unpack_from(">I", payload, 4)
+        entry_size = struct.calcsize(entry_format)
+        entries = payload[8 : 8 + count * entry_size]
+        if len(entries) != count * entry_size:
+            raise IntegrityError("Tabla de chunks incompleta.")
+        return [value for (value,) in struct.iter_unpack(entry_format, entries)]
+    except struct.error:
+        raise IntegrityError("Tabla de chunks ilegible.")
+
+
+def _tolerance(duration: float) -> float:
+    return max(DURATION_TOLERANCE_SECONDS, duration * DURATION_TOLERANCE_RATIO)
+
+
+def validate_mp4(
+    path: Union[str, Path], expected_duration: Optional[float] = None
+) -> Mp4Report:
+    """
+    Valida que el MP4 esté completo: estructura de cajas, pistas de la misma
+    duración que el moov, la duración esperada (la de YouTube) y un mdat con
+    bytes suficientes para esa duración. Lanza IntegrityError si algo no cuadra.
+    """
+    report = inspect_mp4(path)
+    movie = report.movie_duration or 0.0
+
+    # Un MP4 fragmentado puede no declarar duración en el moov
+    if not (report.fragmented and movie == 0):
+        for track in report.track_durations:
+            if abs(track - movie) > _tolerance(movie):
+                raise IntegrityError(
+                    f"Una pista dura {track:.1f}s y el video {movie:.1f}s."
+                )
+        if movie > 0 and report.media_bytes / movie < MIN_BYTES_PER_SECOND:
+            raise IntegrityError(
+                f"Solo {report.media_bytes} bytes de datos para {movie:.1f}s."
+            )
+
+    if expected_duration and not report.fragmented:
+        if abs(movie - expected_duration) > _tolerance(expected_duration):
+            raise IntegrityError(
+                f"El archivo dura {movie:.1f}s y se esperaban {expected_duration:.1f}s."
+            )
+    return report
+
+
+def check_file(
+    path: Union[str, Path],
+    expected_duration: Optional[float] = None,
+    quarantine_dir: Optional[Path] = None,
+) -> bool:
+    """
+    True si el archivo es válido (o no es un contenedor MP4 que se sepa revisar).
+    Si está dañado, lo mueve a cuarentena y devuelve False.
+    """
+    path = Path(path)
+    if path.suffix.lower() not in MP4_SUFFIXES:
+        return True
+    try:
+        validate_mp4(path, expected_duration)
+        return True
+    except (IntegrityError, OSError) as e:
+        logger.error(f"{path.name} está dañado: {e}")
+        quarantine(path, quarantine_dir)
+        return False
+
+
+def quarantine(path: Union[str, Path], quarantine_dir: Optional[Path] = None) -> Path:
+    """
+    Aparta un archivo dañado para revisarlo; al no estar en su ruta final,
+    la siguiente corrida lo descarga de nuevo en lugar de subirlo.
+    """
+    path = Path(path)
+    target_dir = quarantine_dir or path.parent / QUARANTINE_DIR
+    target_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    target = target_dir / f"{path.stem}.{stamp}{path.suffix}"
+    shutil.move(str(path), target)
+    logger.warning(f"{path.name} movido a cuarentena: {target}")
+    return target
@@ -1,82 +1,307 @@
+import json
 import logging
-import random
-import time
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from pathlib import Path
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    TypedDict,
+    Union,
+)
 
 from pyparsing import cast
 from pyrogram.types import Message  # type: ignore
 
 from tvpipe.config import MigrationConfig
-from tvpipe.services.register import RegistryManager, VideoMeta
-from tvpipe.services.telegram.client import TelegramService
-from tvpipe.utils import sleep_progress
+from tvpipe.exceptions import MediaReferenceError, TelegramError
+from tvpipe.services.channel_index import ChannelIndex
+from tvpipe.services.placeholder import PlaceholderCache
+from tvpipe.services.pipeline import PipelineReport, Stage, StagedPipeline
+from tvpipe.services.register import MigrationEntry, RegistryManager, VideoMeta
+from tvpipe.services.telegram.client import HISTORY_PAGE_LIMIT, TelegramService
 
 logger = logging.getLogger(__name__)
 
 
+class LostBackup(TypedDict):
+    migration_id: str
+    source_message_id: int
+    backup_chat_id: int
+    backup_message_id: int
+    reason: Literal["missing", "mismatch"]
+
+
+class BackupAuditReport(TypedDict):
+    started_at: str
+    finished_at: str
+    since: Optional[str]
+    audited: int
+    ok: int
+    lost: List[LostBackup]
+
+
+@dataclass
+class PendingAlbum:
+    """
+    Álbum armado a partir del historial.
+    `complete` es False cuando pudo quedar cortado (inicio tras un checkpoint o
+    fin del lote) y hay que pedir el grupo completo a Telegram.
+    """
+
+    media_group_id: str
+    messages: List[Message]
+    complete: bool = True
+
+    @property
+    def album_id(self) -> int:
+        return self.messages[0].id
+
+
+class AlbumAssembler:
+    """
+    Agrupa en memoria los mensajes consecutivos del historial por media_group_id.
+    Un grupo se cierra cuando aparece un mensaje que no le pertenece, así los
+    álbumes que cruzan el límite entre páginas se arman sin peticiones extra.
+    """
+
+    def __init__(self, first_group_complete: bool = True):
+        self._open: Optional[PendingAlbum] = None
+        self._first_group_complete = first_group_complete
+
+    @property
+    def open_from(self) -> Optional[int]:
+        """ID del primer mensaje del grupo aún abierto (si lo hay)."""
+        return self._open.album_id if self._open else None
+
+    def feed(self, message: Message) -> Optional[PendingAlbum]:
+        """Agrega un mensaje; devuelve el álbum anterior si este mensaje lo cerró."""
+        if self._open and message.media_group_id == self._open.media_group_id:
+            self._open.messages.append(message)
+            return None
+
+        closed = self._open
+        self._open = None
+        if message.media_group_id:
+            self._open = PendingAlbum(
+                media_group_id=message.media_group_id,
+                messages=[message],
+                complete=self._first_group_complete,
+            )
+        self._first_group_complete = True
+        return closed
+
+    def flush(self, complete: bool) -> Optional[PendingAlbum]:
+        """Cierra el grupo abierto al terminar el escaneo."""
+        closed = self._open
+        self._open = None
+        if closed and not complete:
+            closed.complete = False
+        return closed
+
+
+@dataclass
+class AlbumCopy:
+    """Álbum ya copiado al respaldo: pares (original, copia) ordenados por ID."""
+
+    album_id: int
+    pairs: List[Tuple[Message, Message]]
+
+
+@dataclass
+class ObfuscationTask:
+    message: Message
+    caption: str
+
+
+class ScanCheckpoint:
+    """
+    Cursor persistente del escaneo de un chat origen.
+    Avanza como marca de agua baja: nunca pasa del álbum más viejo que sigue en
+    proceso (o que falló), así un reinicio retoma sin saltarse nada.
+    """
+
+    def __init__(self, registry: RegistryManager, source_chat_id: Union[int, str]):
+        self.registry = registry
+        self.source_chat_id = source_chat_id
+        self.committed = registry.get_migration_checkpoint(source_chat_id)
+        self._scanned = self.committed
+        self._pending: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def track(self, album_id: int) -> None:
+        with self._lock:
+            self._pending.add(album_id)
+
+    def done(self, album_id: int) -> None:
+        with self._lock:
+            self._pending.discard(album_id)
+            self._advance()
+
+    def page_scanned(self, last_message_id: int) -> None:
+        with self._lock:
+            self._scanned = max(self._scanned, last_message_id)
+            self._advance()
+
+    def _advance(self) -> None:
+        mark = min(self._pending) - 1 if self._pending else self._scanned
+        if mark > self.committed:
+            self.committed = mark
+            self.registry.save_migration_checkpoint(self.source_chat_id, mark)
+
+
+@dataclass
+class MigrationRun:
+    """Estado compartido por las etapas de un lote de migración."""
+
+    batch_id: str
+    checkpoint: ScanCheckpoint
+    migrated_ids: Set[int]
+
+
 class ContentMigrator:
     def __init__(
         self,
         config: MigrationConfig,
         registry: RegistryManager,
         telegram_service: TelegramService,
+        channel_index: Optional[ChannelIndex] = None,
+        placeholder: Optional[PlaceholderCache] = None,
     ):
         self.config = config
         self.registry = registry
         self.tg = telegram_service
+        self.channel_index = channel_index
+        self.placeholder = placeholder or PlaceholderCache(
+            telegram_service,
+            config.placeholder_image_path,
+            cache_file=registry.migration_file.with_name("placeholder_cache.json"),
+        )
 
         self.obfuscation_caption = self.config.obfuscation_caption
 
-    def run_migration_batch(self):
+    def run_migration_batch(self) -> Optional[PipelineReport]:
+        """
+        Migra los álbumes del canal origen con un pipeline por etapas:
+        descubrir -> copiar al respaldo -> registrar -> ofuscar.
+        Cada etapa tiene su propia concurrencia y ritmo (ver MigrationConfig).
+        El historial se lee por páginas desde el último checkpoint del chat origen.
+        """
         logger.info(
             f"Iniciando migración de ÁLBUMES desde {self.config.source_chat_id}..."
         )
-        current_batch_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        run = MigrationRun(
+            batch_id=datetime.now().strftime("%Y%m%d_%H%M%S"),
+            checkpoint=ScanCheckpoint(self.registry, self.config.source_chat_id),
+            # Una sola lectura del registro para todo el lote
+            migrated_ids=self.registry.get_migrated_message_ids(
+                self.config.source_chat_id
+            ),
+        )
         self.tg.start()
 
-        # Cache para no procesar el mismo grupo varias veces
-        processed_media_groups = set()
-        count = 0
-
         try:
-            history_generator = self.tg.get_history(
-                self.config.source_chat_id, limit=self.config.batch_size
+            pipeline = StagedPipeline(
+                stages=[
+                    Stage(
+                        "copy",
+                        lambda album: self._copy_album(album, run),
+                        workers=self.config.copy_workers,
+                        rate_limit=self.config.copy_rate,
+                    ),
+                    Stage(
+                        "register",
+                        lambda album: self._register_album(album, run),
+                        # El registro es un JSON: un solo escritor
+                        workers=1,
+                    ),
+                    Stage(
+                        "obfuscate",
+                        self._obfuscate,
+                        workers=self.config.obfuscate_workers,
+                        rate_limit=self.config.obfuscate_rate,
+                    ),
+                ],
+                queue_size=self.config.queue_size,
+            )
+            report = pipeline.run(
+                self._discover_albums(run.checkpoint), source_name="discover"
             )
-            history_list = list(history_generator)
-
-            for message in reversed(history_list):
-                # FILTRO: Solo procesar si es parte de un álbum
-                if not message.media_group_id:
-                    logger.info(f"Mensaje {message.id} ignorado (no es álbum).")
-                    continue
-
-                # CACHÉ: Si ya procesamos este grupo, saltar
-                if message.media_group_id in processed_media_groups:
-                    logger.info(f"Mensaje {message.id} ignorado (álbum ya procesado).")
-                    continue
-
-                if not message.video:
-                    logger.info(f"Mensaje {message.id} ignorado (álbum sin video).")
-                    continue
-
-                # PROCESAR EL GRUPO ENTERO
-                success = self._process_album_batch(message, current_batch_id)
-
-                # Marcar grupo como procesado (éxito o fallo, para no reintentar en este loop)
-                processed_media_groups.add(message.media_group_id)
-
-                if success:
-                    count += 1
-                    time.sleep(3)
 
-            logger.info(f"Lote finalizado. Álbumes migrados: {count}")
+            logger.info(
+                f"Lote finalizado. Álbumes migrados: {report.stages['register'].processed}"
+            )
+            logger.info(
+                f"Checkpoint del chat origen: mensaje {run.checkpoint.committed}"
+            )
+            logger.info(report.summary())
+            return report
 
         except Exception as e:
             logger.error(f"Error en batch: {e}", exc_info=True)
+            return None
         finally:
             self.tg.stop()
 
+    def _discover_albums(self, checkpoint: ScanCheckpoint) -> Iterator[PendingAlbum]:
+        """
+        Recorre el historial del más viejo al más nuevo, página a página, y emite
+        los álbumes ya agrupados. Solo se mantiene en memoria la página actual.
+        """
+        remaining = self.config.batch_size or None
+        # Tras un checkpoint, el primer grupo pudo empezar antes del cursor
+        assembler = AlbumAssembler(first_group_complete=checkpoint.committed == 0)
+
+        def accept(album: Optional[PendingAlbum]) -> Optional[PendingAlbum]:
+            if album is None:
+                return None
+            if not any(m.video for m in album.messages):
+                logger.info(f"Álbum {album.media_group_id} ignorado (álbum sin video).")
+                return None
+            checkpoint.track(album.album_id)
+            return album
+
+        pages = self.tg.iter_history_pages(
+            self.config.source_chat_id,
+            after_id=checkpoint.committed,
+            page_size=min(remaining or HISTORY_PAGE_LIMIT, HISTORY_PAGE_LIMIT),
+        )
+        last_seen = checkpoint.committed
+        for page in pages:
+            if remaining is not None:
+                page = page[:remaining]
+                remaining -= len(page)
+
+            for message in page:
+                if not message.media_group_id:
+                    logger.info(f"Mensaje {message.id} ignorado (no es álbum).")
+                album = accept(assembler.feed(message))
+                if album:
+                    yield album
+
+            # El grupo abierto sigue pendiente: el cursor no puede pasarlo
+            last_seen = page[-1].id
+            open_from = assembler.open_from
+            checkpoint.page_scanned(
+                open_from - 1 if open_from is not None else last_seen
+            )
+            if remaining == 0:
+                break
+
+        # Si el lote se cortó por tamaño, el último grupo puede estar incompleto
+        album = accept(assembler.flush(complete=remaining != 0))
+        checkpoint.page_scanned(last_seen)
+        if album:
+            yield album
+
     def _should_migrate(self, message: Message) -> bool:
         if not message.video:
             return False
@@ -109,82 +334,57 @@ class ContentMigrator:
             if success:
                 logger.info(f"Mensaje {message_id} restaurado exitosamente.")
 
-    def _process_album_batch(self, trigger_message: Message, batch_id: str) -> bool:
-        """
-        Maneja la lógica de migrar un álbum completo.
-        trigger_message es cualquiera de los mensajes del grupo.
-        """
-        group_id = trigger_message.media_group_id
-        chat_id = trigger_message.chat.id
+    def _copy_album(self, album: PendingAlbum, run: MigrationRun) -> List[AlbumCopy]:
+        """Copia un álbum completo al respaldo."""
+        chat_id = self.config.source_chat_id
         logger.info(
-            f"Procesando Media Group ID: {group_id} detectado en msg {trigger_message.id}"
+            f"Procesando Media Group ID: {album.media_group_id} desde msg {album.album_id}"
         )
 
-        # Obtener todas las partes ORIGINALES del álbum
-        # Pyrogram las devuelve ordenadas por ID
-        source_messages = self.tg.get_media_group(chat_id, trigger_message.id)
-        if not source_messages:
-            return False
+        source_messages = album.messages
+        if not album.complete:
+            # Solo los grupos que pudieron quedar cortados se piden a Telegram
+            source_messages = self.tg.get_media_group(chat_id, album.album_id)
+            if not source_messages:
+                raise TelegramError(f"No se pudo leer el álbum {album.media_group_id}")
 
         # Verificar si ALGUNO de los mensajes ya fue migrado para evitar duplicados parciales
-        for msg in source_messages:
-            if self.registry.is_message_migrated(chat_id, msg.id):
-                logger.warning(
-                    f"El grupo {group_id} ya contiene partes migradas. Saltando."
-                )
-                return False
+        if any(msg.id in run.migrated_ids for msg in source_messages):
+            logger.warning(
+                f"El grupo {album.media_group_id} ya contiene partes migradas. Saltando."
+            )
+            run.checkpoint.done(album.album_id)
+            return []
 
-        # Copiar todo el bloque al Respaldo
-        backup_messages = self.tg.copy_media_group(
-            target_chat_id=self.config.backup_chat_id,
-            from_chat_id=chat_id,
-            message_id=trigger_message.id,
+        # Ordenamos por ID para asegurar correspondencia 1:1 con las copias
+        source_messages = sorted(source_messages, key=lambda m: m.id)
+        backup_messages = self.tg.copy_album_messages(
+            target_chat_id=self.config.backup_chat_id, messages=source_messages
         )
 
         if not backup_messages or len(backup_messages) != len(source_messages):
-            logger.error(
+            raise TelegramError(
                 "Error crítico: La cantidad de mensajes copiados no coincide con los originales."
             )
-            return False
-
-        # Emparejar (Zip) y Procesar Individualmente
-        # Asumimos que el orden se mantiene (Telegram suele garantizar esto por ID incremental)
-        # Ordenamos ambas listas por ID para asegurar correspondencia 1:1
-        source_messages.sort(key=lambda m: m.id)
         backup_messages.sort(key=lambda m: m.id)
 
-        all_success = True
-
-        for i, (src_msg, bkp_msg) in enumerate(zip(source_messages, backup_messages)):
-            # LÓGICA DE CAPTION ÚNICO:
-            # Solo el primer elemento (índice 0) lleva el texto de aviso.
-
-            if i == 0:
-                caption_to_use = self.obfuscation_caption
-            else:
-                caption_to_use = ""
-
-            if src_msg.video:
-
-                step_success = self._register_and_obfuscate(
-                    src_msg, bkp_msg, batch_id, caption_override=caption_to_use
-                )
-
-                if not step_success:
-                    all_success = False
-            else:
-                pass
-
-        return all_success
+        return [
+            AlbumCopy(
+                album_id=album.album_id,
+                pairs=list(zip(source_messages, backup_messages)),
+            )
+        ]
+
+    def _register_album(
+        self, album: AlbumCopy, run: MigrationRun
+    ) -> List[ObfuscationTask]:
+        """Registra cada video del álbum y genera las tareas de ofuscación."""
+        entries = []
+        tasks = []
+        for i, (src_msg, bkp_msg) in enumerate(album.pairs):
+            if not src_msg.video:
+                continue
 
-    def _register_and_obfuscate(
-        self, src_msg: Message, bkp_msg: Message, batch_id: str, caption_override: str
-    ) -> bool:
-        """
-        Lógica extraída para manejar el par Source <-> Backup individualmente.
-        Igual que antes, pero recibe los objetos ya listos.
-        """
-        try:
             vid = src_msg.video
             meta: VideoMeta = {
                 "file_unique_id": vid.file_unique_id,
@@ -194,37 +394,61 @@ class ContentMigrator:
                 "file_name": vid.file_name,
                 "file_size": vid.file_size,
             }
-
-            self.registry.register_migration(
-                source_chat_id=src_msg.chat.id,
-                source_msg_id=src_msg.id,
-                backup_chat_id=bkp_msg.chat.id,
-                backup_msg_id=bkp_msg.id,
-                video_meta=meta,
-                original_caption=src_msg.caption,
-                media_group_id=src_msg.media_group_id,
-                batch_id=batch_id,
+            entries.append(
+                self.registry.build_migration_entry(
+                    source_chat_id=src_msg.chat.id,
+                    source_msg_id=src_msg.id,
+                    backup_chat_id=bkp_msg.chat.id,
+                    backup_msg_id=bkp_msg.id,
+                    video_meta=meta,
+                    original_caption=src_msg.caption,
+                    media_group_id=src_msg.media_group_id,
+                    batch_id=run.batch_id,
+                )
             )
 
-            # Ofuscar
-            # Al editar un mensaje dentro de un álbum, se mantiene en el álbum visualmente
-            # pero el contenido cambia a foto.
-            return self.tg.replace_video_with_photo(
-                chat_id=src_msg.chat.id,
-                message_id=src_msg.id,
-                photo_path=self.config.placeholder_image_path,
-                caption=caption_override,
+            # LÓGICA DE CAPTION ÚNICO:
+            # Solo el primer elemento (índice 0) lleva el texto de aviso.
+            caption = self.obfuscation_caption if i == 0 else ""
+            tasks.append(ObfuscationTask(message=src_msg, caption=caption))
+
+        # Una sola escritura del registro por álbum
+        self.registry.register_migrations(entries)
+        run.migrated_ids.update(src.id for src, _ in album.pairs)
+        run.checkpoint.done(album.album_id)
+        return tasks
+
+    def _obfuscate(self, task: ObfuscationTask) -> None:
+        # Al editar un mensaje dentro de un álbum, se mantiene en el álbum visualmente
+        # pero el contenido cambia a foto. La foto ya está en Telegram: solo se
+        # edita la referencia (file_id), sin volver a subir la imagen.
+        file_id = self.placeholder.get_file_id()
+        try:
+            success = self._replace_with_placeholder(task, file_id)
+        except MediaReferenceError as e:
+            # Solo un file_id rechazado justifica subir de nuevo la imagen
+            logger.warning(f"{e}. Se vuelve a subir el placeholder.")
+            self.placeholder.invalidate(file_id)
+            success = self._replace_with_placeholder(
+                task, self.placeholder.get_file_id()
             )
-        except Exception as e:
-            logger.error(f"Error procesando item individual {src_msg.id}: {e}")
-            return False
+
+        if not success:
+            raise TelegramError(f"No se pudo ofuscar el mensaje {task.message.id}")
+
+    def _replace_with_placeholder(self, task: ObfuscationTask, file_id: str) -> bool:
+        return self.tg.replace_video_with_photo(
+            chat_id=task.message.chat.id,
+            message_id=task.message.id,
+            photo=file_id,
+            caption=task.caption,
+        )
 
     def restore_album(self, media_group_id: str):
         """
         Restaura un álbum completo usando el ID de grupo.
         """
         logger.info(f"Iniciando restauración del álbum {media_group_id}...")
-        self.tg.start()
 
         entries = self.registry.get_entries_by_media_group(media_group_id)
 
@@ -234,38 +458,15 @@ class ContentMigrator:
             )
             return
 
-        success_count = 0
-
-        for entry in entries:
-            if entry["status"] == "restored":
-                logger.info(
-                    f"Mensaje {entry['source_message_id']} ya estaba restaurado."
-                )
-                continue
-
-            logger.info(f"Restaurando parte: {entry['source_message_id']}...")
-
-            restored = self.tg.restore_video_from_backup(
-                source_chat_id=entry["source_chat_id"],
-                source_message_id=entry["source_message_id"],
-                backup_chat_id=entry["backup_chat_id"],
-                backup_message_id=entry["backup_message_id"],
-                expected_unique_id=entry["video_meta"]["file_unique_id"],
-                caption=entry["original_caption"],
-            )
-
-            if restored:
-                self.registry.update_migration_status(
-                    entry["source_chat_id"], entry["source_message_id"], "restored"
-                )
-                success_count += 1
-            else:
-                logger.error(f"Fallo al restaurar mensaje {entry['source_message_id']}")
+        self.tg.start()
+        try:
+            success_count = self._restore_entries(entries)
+        finally:
+            self.tg.stop()
 
         logger.info(
             f"Restauración de álbum completada. {success_count}/{len(entries)} mensajes recuperados."
         )
-        self.tg.stop()
 
     def restore_batch(self, batch_id: str, delete_backup: bool = False):
         """
@@ -284,63 +485,201 @@ class ContentMigrator:
             f"Iniciando restauración masiva del lote {batch_id} ({len(entries)} elementos)..."
         )
         self.tg.start()
+        try:
+            restored_count = self._restore_entries(entries, delete_backup)
+        finally:
+            self.tg.stop()
+
+        logger.info(
+            f"Restauración de lote completada. {restored_count}/{len(entries)} recuperados."
+        )
+
+    def _inspect_backups(
+        self, entries: List[MigrationEntry]
+    ) -> Tuple[Dict[str, Message], Dict[str, str]]:
+        """
+        Lee los respaldos de todas las entradas en lotes de 200 por chat.
+        Devuelve, por migration_id, los respaldos vivos e íntegros y el motivo
+        de cada respaldo con problemas.
+        """
+        by_chat: Dict[Union[int, str], List[MigrationEntry]] = defaultdict(list)
+        for entry in entries:
+            by_chat[entry["backup_chat_id"]].append(entry)
+
+        valid: Dict[str, Message] = {}
+        problems: Dict[str, str] = {}
+        for backup_chat_id, chat_entries in by_chat.items():
+            found = self.tg.get_messages(
+                backup_chat_id, [e["backup_message_id"] for e in chat_entries]
+            )
+            for entry in chat_entries:
+                backup_msg = found.get(entry["backup_message_id"])
+                if not backup_msg or not backup_msg.video:
+                    logger.error(
+                        f"Respaldo perdido o inválido para msg {entry['source_message_id']}"
+                    )
+                    problems[entry["migration_id"]] = "missing"
+                    continue
+
+                # Validar integridad (file_unique_id)
+                expected = entry["video_meta"]["file_unique_id"]
+                if backup_msg.video.file_unique_id != expected:
+                    logger.critical(
+                        f"INTEGRIDAD COMPROMETIDA: El video en respaldo ({backup_msg.video.file_unique_id}) "
+                        f"no coincide con el registro ({expected})."
+                    )
+                    problems[entry["migration_id"]] = "mismatch"
+                    continue
+                valid[entry["migration_id"]] = backup_msg
+        return valid, problems
+
+    def audit_backups(
+        self, since: Optional[datetime] = None, chunk_size: int = 2000
+    ) -> BackupAuditReport:
+        """
+        Verifica contra el canal de respaldo cada migración activa que no se haya
+        auditado desde `since` (todas si es None). Marca `backup_lost` las que ya
+        no tienen respaldo íntegro y guarda un informe en registry/audits.
+        El registro se actualiza por bloques, así una auditoría cortada no se repite.
+        """
+        started_at = datetime.now()
+        entries = [
+            e
+            for e in self.registry.get_migration_entries(status="migrated")
+            if (
+                since is None
+                or "audited_at" not in e
+                or datetime.fromisoformat(e["audited_at"]) < since
+            )
+        ]
+        logger.info(f"Auditando {len(entries)} respaldos...")
+
+        lost: List[LostBackup] = []
+        self.tg.start()
+        try:
+            for i in range(0, len(entries), chunk_size):
+                chunk = entries[i : i + chunk_size]
+                valid, problems = self._inspect_backups(chunk)
 
-        restored_count = 0
+                self.registry.record_backup_audit(
+                    {e["migration_id"]: e["migration_id"] in valid for e in chunk}
+                )
+                lost.extend(
+                    {
+                        "migration_id": e["migration_id"],
+                        "source_message_id": e["source_message_id"],
+                        "backup_chat_id": e["backup_chat_id"],
+                        "backup_message_id": e["backup_message_id"],
+                        "reason": problems[e["migration_id"]],
+                    }
+                    for e in chunk
+                    if e["migration_id"] in problems
+                )
+                logger.info(
+                    f"Auditoría: {min(i + chunk_size, len(entries))}/{len(entries)} revisados."
+                )
+        finally:
+            self.tg.stop()
 
+        report: BackupAuditReport = {
+            "started_at": started_at.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "since": since.isoformat() if since else None,
+            "audited": len(entries),
+            "ok": len(entries) - len(lost),
+            "lost": lost,
+        }
+        report_path = self._write_audit_report(report, started_at)
+        logger.info(
+            f"Auditoría finalizada: {report['ok']}/{report['audited']} respaldos íntegros. "
+            f"Informe: {report_path}"
+        )
+        return report
+
+    def _write_audit_report(
+        self, report: BackupAuditReport, started_at: datetime
+    ) -> Path:
+        audit_dir = self.registry.migration_file.with_name("audits")
+        audit_dir.mkdir(parents=True, exist_ok=True)
+        path = audit_dir / f"audit_{started_at.strftime('%Y%m%d_%H%M%S')}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return path
+
+    def _restore_entries(
+        self, entries: List[MigrationEntry], delete_backup: bool = False
+    ) -> int:
+        """
+        Motor de restauración masiva: valida los respaldos en bloque, restaura en
+        paralelo (bajo el limitador de TelegramService), registra todos los
+        cambios en una escritura y borra los respaldos con una petición por chat.
+        """
+        pending = [e for e in entries if e["status"] != "restored"]
         for entry in entries:
             if entry["status"] == "restored":
-                continue
+                logger.info(
+                    f"Mensaje {entry['source_message_id']} ya estaba restaurado."
+                )
+        if not pending:
+            return 0
 
-            logger.info(f"Restaurando msg {entry['source_message_id']}...")
+        backups, _ = self._inspect_backups(pending)
+        restorable = [e for e in pending if e["migration_id"] in backups]
 
-            success = self.tg.restore_video_from_backup(
+        def restore(entry: MigrationEntry) -> bool:
+            logger.info(f"Restaurando msg {entry['source_message_id']}...")
+            return self.tg.restore_video(
                 source_chat_id=entry["source_chat_id"],
                 source_message_id=entry["source_message_id"],
-                backup_chat_id=entry["backup_chat_id"],
-                backup_message_id=entry["backup_message_id"],
-                expected_unique_id=entry["video_meta"]["file_unique_id"],
+                video=backups[entry["migration_id"]].video,
                 caption=entry["original_caption"],
             )
 
-            if success:
-                # ACTUALIZAR REGISTRO
-                self.registry.update_migration_status(
-                    entry["source_chat_id"], entry["source_message_id"], "restored"
-                )
-
-                # ELIMINAR RESPALDO (LIMPIEZA OPCIONAL)
-                # Solo si la restauración fue exitosa, borramos la copia.
-                if delete_backup:
-                    del_success = self.tg.delete_messages(
-                        entry["backup_chat_id"], entry["backup_message_id"]
-                    )
-                    if del_success:
-                        logger.info(
-                            f"Msg {entry['source_message_id']} restaurado y respaldo eliminado."
-                        )
-                    else:
-                        logger.warning(
-                            f"Msg {entry['source_message_id']} restaurado, pero falló el borrado del respaldo."
-                        )
-                else:
-                    logger.info(
-                        f"Msg {entry['source_message_id']} restaurado. Respaldo conservado."
-                    )
+        restored: List[MigrationEntry] = []
+        if restorable:
+            workers = max(1, min(self.config.restore_workers, len(restorable)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(restore, restorable))
+            restored = [e for e, ok in zip(restorable, results) if ok]
 
-                restored_count += 1
-                sleep_ = random.randint(1, 4)
-                sleep_progress(sleep_)
-            else:
+        restored_ids = {e["migration_id"] for e in restored}
+        for entry in pending:
+            if entry["migration_id"] not in restored_ids:
                 logger.error(
                     f"Falló restauración de {entry['source_message_id']}. El respaldo NO se ha borrado."
                 )
 
-        self.tg.stop()
-        logger.info(
-            f"Restauración de lote completada. {restored_count}/{len(entries)} recuperados."
+        # ACTUALIZAR REGISTRO (una sola escritura)
+        self.registry.update_migration_statuses(
+            [e["migration_id"] for e in restored], "restored"
         )
 
+        # ELIMINAR RESPALDO (LIMPIEZA OPCIONAL)
+        # Solo se borran las copias cuya restauración fue exitosa.
+        if delete_backup and restored:
+            to_delete: Dict[Union[int, str], List[int]] = defaultdict(list)
+            for entry in restored:
+                to_delete[entry["backup_chat_id"]].append(entry["backup_message_id"])
+            for backup_chat_id, message_ids in to_delete.items():
+                if self.tg.delete_messages(backup_chat_id, message_ids):
+                    logger.info(
+                        f"{len(message_ids)} respaldos eliminados en {backup_chat_id}."
+                    )
+                else:
+                    logger.warning(
+                        f"Mensajes restaurados, pero falló el borrado de respaldos en {backup_chat_id}."
+                    )
+
+        return len(restored)
+
     def get_media_group_id(self, message_id: str) -> Optional[str]:
+        if self.channel_index:
+            indexed = self.channel_index.get_message(
+                self.config.source_chat_id, int(message_id)
+            )
+            if indexed:
+                return indexed["media_group_id"]
+
         self.tg.start()
         message = cast(
             List[Message],
@@ -0,0 +1,295 @@
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Literal, Optional, TypedDict, Union
+
+from typing_extensions import NotRequired
+
+from tvpipe.services.register import RegistryManager
+from tvpipe.services.telegram.client import TelegramService
+from tvpipe.services.telegram.schemas import UploadedVideo
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_FILE = Path.cwd() / "registry/publish_outbox.json"
+
+JobStatus = Literal["pending", "sent", "failed"]
+
+
+class OutboxJob(TypedDict):
+    job_id: str
+    episode_number: str
+    chat_id: Union[int, str]
+    caption: str
+    files: List[dict]
+    status: JobStatus
+    attempts: int
+    next_attempt_at: str
+    last_error: Optional[str]
+    # Mensajes publicados; en un álbum por bloques, los enviados hasta ahora
+    message_ids: List[int]
+    created_at: str
+    updated_at: str
+    # Publicación progresiva: file_ids de fotos que reservan posiciones del álbum
+    placeholders: NotRequired[List[str]]
+
+
+class PublishOutbox:
+    """
+    Cola persistente de entregas (episodio, chat).
+    Cada entrega se reintenta por separado con backoff exponencial, sin
+    repetir descargas ni subidas cuando solo falla un destino.
+    """
+
+    def __init__(
+        self,
+        telegram_service: TelegramService,
+        registry: RegistryManager,
+        outbox_file: Optional[Union[str, Path]] = None,
+        max_attempts: int = 8,
+        base_delay: int = 60,
+        max_delay: int = 3600,
+    ):
+        self.tg = telegram_service
+        self.registry = registry
+        self.outbox_file = OUTBOX_FILE if outbox_file is None else Path(outbox_file)
+        self.outbox_file.parent.mkdir(parents=True, exist_ok=True)
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.RLock()
+        self._in_flight: set[str] = set()
+        self._stop_event = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    def _load(self) -> List[OutboxJob]:
+        if self.outbox_file.exists():
+            try:
+                with open(self.outbox_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except json.JSONDecodeError as e:
+                logger.error(f"Error leyendo el outbox de publicaciones: {e}")
+        return []
+
+    def _save(self, data: List[OutboxJob]) -> None:
+        with open(self.outbox_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    def _update_job(self, job_id: str, **changes) -> None:
+        with self._lock:
+            data = self._load()
+            for job in data:
+                if job["job_id"] == job_id:
+                    job.update(changes)  # type: ignore
+                    job["updated_at"] = datetime.now().isoformat()
+                    break
+            self._save(data)
+
+    def get_job(self, job_id: str) -> Optional[OutboxJob]:
+        return next((j for j in self._load() if j["job_id"] == job_id), None)
+
+    def get_jobs(self, episode_number: Optional[str] = None) -> List[OutboxJob]:
+        data = self._load()
+        if episode_number is None:
+            return data
+        return [j for j in data if j["episode_number"] == episode_number]
+
+    def has_pending(self, episode_number: str) -> bool:
+        return any(j["status"] == "pending" for j in self.get_jobs(episode_number))
+
+    def enqueue(
+        self,
+        episode_number: str,
+        files: List[UploadedVideo],
+        caption: str,
+        chat_ids: List[Union[int, str]],
+        placeholders: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Crea (o reactiva) un trabajo por cada chat de destino.
+        Los trabajos ya entregados no se duplican; los pendientes se actualizan
+        con el contenido nuevo.
+        """
+        now = datetime.now().isoformat()
+        serialized = [f.model_dump(mode="json") for f in files]
+        job_ids = []
+
+        with self._lock:
+            data = self._load()
+            by_id = {j["job_id"]: j for j in data}
+
+            for chat_id in chat_ids:
+                job_id = f"{episode_number}_{chat_id}"
+                job_ids.append(job_id)
+                existing = by_id.get(job_id)
+
+                if existing and existing["status"] == "sent":
+                    continue
+
+                if existing:
+                    # Un nuevo intento del orquestador reactiva entregas fallidas.
+                    # Conserva los message_ids: los bloques ya enviados no se repiten.
+                    existing.update(
+                        {
+                            "caption": caption,
+                            "files": serialized,
+                            "placeholders": placeholders or [],
+                            "status": "pending",
+                            "attempts": 0,
+                            "next_attempt_at": now,
+                            "updated_at": now,
+                        }
+                    )
+                    continue
+
+                job: OutboxJob = {
+                    "job_id": job_id,
+                    "episode_number": episode_number,
+                    "chat_id": chat_id,
+                    "caption": caption,
+                    "files": serialized,
+                    "status": "pending",
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                    "last_error": None,
+                    "message_ids": [],
+                    "created_at": now,
+                    "updated_at": now,
+                    "placeholders": placeholders or [],
+                }
+                data.append(job)
+
+            self._save(data)
+
+        return job_ids
+
+    def _backoff(self, attempts: int) -> int:
+        return min(self.base_delay * (2 ** (attempts - 1)), self.max_delay)
+
+    def deliver(self, job_id: str) -> bool:
+        """Intenta entregar un trabajo. Devuelve True si quedó entregado."""
+        with self._lock:
+            if job_id in self._in_flight:
+                return False
+            job = self.get_job(job_id)
+            if job is None or job["status"] != "pending":
+                return bool(job and job["status"] == "sent")
+            self._in_flight.add(job_id)
+
+        sent_ids = list(job["message_ids"])
+
+        def checkpoint(messages):
+            # Cada bloque enviado queda guardado para reanudar desde el siguiente
+            sent_ids.extend(m.id for m in messages)
+            self._update_job(job_id, message_ids=list(sent_ids))
+
+        try:
+            files = [UploadedVideo(**f) for f in job["files"]]
+            extra = (
+                {"placeholders": job["placeholders"]} if job.get("placeholders") else {}
+            )
+            messages = self.tg.send_album_to_chat(
+                files,
+                job["caption"],
+                job["chat_id"],
+                already_sent=len(job["message_ids"]),
+                on_chunk_sent=checkpoint,
+                **extra,
+            )
+        except Exception as e:
+            attempts = job["attempts"] + 1
+            # FloodWait trae la espera exigida por Telegram
+            delay = max(self._backoff(attempts), int(getattr(e, "value", 0) or 0))
+
+            if attempts >= self.max_attempts:
+                logger.error(
+                    f"Entrega {job_id} descartada tras {attempts} intentos: {e}"
+                )
+                self._update_job(
+                    job_id, status="failed", attempts=attempts, last_error=str(e)
+                )
+            else:
+                logger.warning(
+                    f"Fallo entregando {job_id} (intento {attempts}). Reintento en {delay}s: {e}"
+                )
+                self._update_job(
+                    job_id,
+                    attempts=attempts,
+                    last_error=str(e),
+                    next_attempt_at=(
+                        datetime.now() + timedelta(seconds=delay)
+                    ).isoformat(),
+                )
+            return False
+        else:
+            message_ids = job["message_ids"] + [m.id for m in messages]
+            self._update_job(
+                job_id,
+                status="sent",
+                attempts=job["attempts"] + 1,
+                last_error=None,
+                message_ids=message_ids,
+            )
+            self._record_publication(
+                job["episode_number"],
+                job["chat_id"],
+                message_ids,
+                pending_slots=len(job.get("placeholders") or []),
+            )
+            logger.info(f"Entrega {job_id} completada.")
+            return True
+        finally:
+            with self._lock:
+                self._in_flight.discard(job_id)
+
+    def _record_publication(
+        self,
+        episode_number: str,
+        chat_id: Union[int, str],
+        message_ids: List[int],
+        pending_slots: int = 0,
+    ) -> None:
+        self.registry.register_chat_publication(
+            episode_number, chat_id, message_ids, pending_slots=pending_slots
+        )
+        if not self.registry.was_episode_published(episode_number):
+            self.registry.register_episode_publication(episode_number)
+
+    def deliver_due(self) -> int:
+        """Procesa los trabajos pendientes cuyo momento de reintento ya llegó."""
+        now = datetime.now()
+        due = [
+            j["job_id"]
+            for j in self._load()
+            if j["status"] == "pending"
+            and datetime.fromisoformat(j["next_attempt_at"]) <= now
+        ]
+        return sum(1 for job_id in due if self.deliver(job_id))
+
+    def start_worker(self, interval: int = 30) -> None:
+        """Lanza un hilo que reintenta las entregas pendientes cada `interval` segundos."""
+        if self._worker and self._worker.is_alive():
+            return
+
+        self._stop_event.clear()
+
+        def _run():
+            while not self._stop_event.wait(interval):
+                try:
+                    self.deliver_due()
+                except Exception as e:
+                    logger.error(f"Error en el worker del outbox: {e}", exc_info=True)
+
+        self._worker = threading.Thread(target=_run, name="outbox-worker", daemon=True)
+        self._worker.start()
+        logger.info("Worker del outbox de publicaciones iniciado.")
+
+    def stop_worker(self) -> None:
+        self._stop_event.set()
+        if self._worker:
+            self._worker.join(timeout=10)
+            self._worker = None
@@ -0,0 +1,209 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from tvpipe.utils import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+_SENTINEL = object()
+
+
+@dataclass
+class Stage:
+    """
+    Etapa de un pipeline.
+    `handler` recibe un elemento y devuelve los elementos para la etapa siguiente
+    (o None). Una excepción cuenta como fallo del elemento.
+    """
+
+    name: str
+    handler: Callable[[Any], Optional[Iterable[Any]]]
+    workers: int = 1
+    rate_limit: Optional[float] = None  # operaciones por segundo
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    emitted: int = 0
+    busy_seconds: float = 0.0
+
+
+@dataclass
+class PipelineReport:
+    elapsed: float = 0.0
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+
+    def throughput(self, stage_name: str) -> float:
+        """Elementos por minuto completados en una etapa."""
+        stats = self.stages.get(stage_name)
+        if not stats or self.elapsed <= 0:
+            return 0.0
+        return stats.processed * 60 / self.elapsed
+
+    def summary(self) -> str:
+        lines = [f"Pipeline finalizado en {self.elapsed:.1f}s"]
+        for stats in self.stages.values():
+            lines.append(
+                f"  {stats.name:<10} workers={stats.workers} ok={stats.processed} "
+                f"fallos={stats.failed} salida={stats.emitted} "
+                f"ritmo={self.throughput(stats.name):.1f}/min "
+                f"ocupado={stats.busy_seconds:.1f}s"
+            )
+        return "\n".join(lines)
+
+
+class OrderedRelease:
+    """
+    Reordena la salida de etapas concurrentes: cada elemento trae su posición
+    (0, 1, 2...) y solo se libera cuando todos los anteriores ya salieron o
+    se descartaron por fallo. Así una etapa final puede publicar en orden
+    aunque las anteriores terminen desordenadas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next = 0
+        self._ready: Dict[int, Any] = {}
+        self._skipped: set = set()
+
+    def push(self, position: int, item: Any) -> List[Any]:
+        """Agrega un elemento y devuelve los que ya pueden salir, en orden."""
+        with self._lock:
+            self._ready[position] = item
+            return self._release()
+
+    def skip(self, position: int) -> None:
+        """
+        Marca una posición que no llegará (falló antes) para no bloquear al resto.
+        Lo que destrabe sale en el siguiente `push` o en `drain`.
+        """
+        with self._lock:
+            self._skipped.add(position)
+
+    def drain(self) -> List[Any]:
+        """Al terminar el pipeline: todo lo retenido, en orden."""
+        with self._lock:
+            released = self._release()
+            released.extend(self._ready[p] for p in sorted(self._ready))
+            self._ready.clear()
+            return released
+
+    def _release(self) -> List[Any]:
+        released = []
+        while True:
+            if self._next in self._ready:
+                released.append(self._ready.pop(self._next))
+            elif self._next in self._skipped:
+                self._skipped.discard(self._next)
+            else:
+                return released
+            self._next += 1
+
+
+class StagedPipeline:
+    """
+    Encadena etapas con colas acotadas. Cada etapa tiene su propia concurrencia
+    y límite de ritmo, así la etapa más lenta marca el paso sin esperas fijas.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 50):
+        if not stages:
+            raise ValueError("El pipeline necesita al menos una etapa")
+        self.stages = stages
+        self.queue_size = queue_size
+        self._stats_lock = threading.Lock()
+
+    def run(self, source: Iterable[Any], source_name: str = "source") -> PipelineReport:
+        report = PipelineReport()
+        report.stages[source_name] = StageStats(name=source_name, workers=1)
+        for stage in self.stages:
+            report.stages[stage.name] = StageStats(
+                name=stage.name, workers=stage.workers
+            )
+
+        queues: List[queue.Queue] = [
+            queue.Queue(maxsize=self.queue_size) for _ in self.stages
+        ]
+        threads: List[List[threading.Thread]] = []
+        started = time.perf_counter()
+
+        for index, stage in enumerate(self.stages):
+            out_q = queues[index + 1] if index + 1 < len(queues) else None
+            limiter = RateLimiter(stage.rate_limit) if stage.rate_limit else None
+            stage_threads = [
+                threading.Thread(
+                    target=self._worker,
+                    args=(stage, queues[index], out_q, limiter, report),
+                    name=f"{stage.name}-{n}",
+                    daemon=True,
+                )
+                for n in range(stage.workers)
+            ]
+            for t in stage_threads:
+                t.start()
+            threads.append(stage_threads)
+
+        source_stats = report.stages[source_name]
+        try:
+            for item in source:
+                queues[0].put(item)
+                source_stats.processed += 1
+                source_stats.emitted += 1
+        except Exception as e:
+            source_stats.failed += 1
+            logger.error(f"Error en la etapa '{source_name}': {e}", exc_info=True)
+        finally:
+            source_stats.busy_seconds = time.perf_counter() - started
+            # Cierre ordenado: cada etapa termina cuando la anterior ya no produce más
+            for index, stage_threads in enumerate(threads):
+                for _ in stage_threads:
+                    queues[index].put(_SENTINEL)
+                for t in stage_threads:
+                    t.join()
+
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def _worker(
+        self,
+        stage: Stage,
+        in_q: queue.Queue,
+        out_q: Optional[queue.Queue],
+        limiter: Optional[RateLimiter],
+        report: PipelineReport,
+    ):
+        stats = report.stages[stage.name]
+        while True:
+            item = in_q.get()
+            if item is _SENTINEL:
+                return
+
+            if limiter:
+                limiter.acquire()
+
+            start = time.perf_counter()
+            try:
+                outputs = list(stage.handler(item) or [])
+            except Exception as e:
+                logger.error(f"Fallo en la etapa '{stage.name}': {e}")
+                with self._stats_lock:
+                    stats.failed += 1
+                    stats.busy_seconds += time.perf_counter() - start
+                continue
+
+            with self._stats_lock:
+                stats.processed += 1
+                stats.emitted += len(outputs)
+                stats.busy_seconds += time.perf_counter() - start
+
+            if out_q is not None:
+                for output in outputs:
+                    out_q.put(output)
@@ -0,0 +1,90 @@
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, TypedDict, Union
+
+from tvpipe.services.telegram.client import TelegramService
+from tvpipe.utils import create_md5sum_by_hashlib
+
+logger = logging.getLogger(__name__)
+
+
+class PlaceholderCacheEntry(TypedDict):
+    md5: str
+    file_id: str
+    uploaded_at: str
+
+
+class PlaceholderCache:
+    """
+    Sube la imagen de ofuscación una sola vez y reutiliza su file_id.
+    El file_id se guarda en disco junto al hash de la imagen: si la imagen
+    cambia, o Telegram deja de aceptar el file_id, se vuelve a subir.
+    """
+
+    def __init__(
+        self,
+        telegram_service: TelegramService,
+        image_path: Union[str, Path],
+        cache_file: Union[str, Path],
+        upload_chat_id: Union[int, str] = "me",
+    ):
+        self.tg = telegram_service
+        self.image_path = Path(image_path)
+        self.cache_file = Path(cache_file)
+        self.upload_chat_id = upload_chat_id
+
+        self._file_id: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Optional[PlaceholderCacheEntry]:
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except json.JSONDecodeError as e:
+                logger.error(f"Error leyendo la caché del placeholder: {e}")
+        return None
+
+    def _save(self, entry: PlaceholderCacheEntry) -> None:
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_file, "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=2, ensure_ascii=False)
+
+    def get_file_id(self) -> str:
+        """Devuelve el file_id del placeholder, subiéndolo solo si hace falta."""
+        with self._lock:
+            if self._file_id:
+                return self._file_id
+
+            md5 = create_md5sum_by_hashlib(self.image_path)
+            cached = self._load()
+            if cached and cached["md5"] == md5:
+                self._file_id = cached["file_id"]
+                return self._file_id
+
+            self._file_id = self._upload(md5)
+            return self._file_id
+
+    def invalidate(self, file_id: str) -> None:
+        """Descarta un file_id rechazado; el siguiente get_file_id vuelve a subir."""
+        with self._lock:
+            if self._file_id == file_id:
+                self._file_id = None
+            cached = self._load()
+            if cached and cached["file_id"] == file_id:
+                self.cache_file.unlink(missing_ok=True)
+
+    def _upload(self, md5: str) -> str:
+        logger.info(f"Subiendo placeholder de ofuscación: {self.image_path.name}")
+        file_id = self.tg.upload_photo(self.upload_chat_id, self.image_path)
+        self._save(
+            {
+                "md5": md5,
+                "file_id": file_id,
+                "uploaded_at": datetime.now().isoformat(),
+            }
+        )
+        return file_id
@@ -1,14 +1,20 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Union, cast
 
 from tvpipe.config import TelegramConfig
+from tvpipe.services.channel_index import ChannelIndex
+from tvpipe.services.outbox import PublishOutbox
 from tvpipe.services.register import RegistryManager
 from tvpipe.services.telegram.client import TelegramService
+from tvpipe.services.telegram.exceptions import PermissionDeniedError
 from tvpipe.services.telegram.schemas import UploadedVideo
 
 logger = logging.getLogger(__name__)
 
+PENDING_HD_LINE = "HD: en camino...\n"
+
 
 class EpisodePublisher:
     def __init__(
@@ -16,10 +22,14 @@ class EpisodePublisher:
         config: TelegramConfig,
         telegram_client: TelegramService,
         registry: RegistryManager,
+        channel_index: Optional[ChannelIndex] = None,
+        outbox: Optional[PublishOutbox] = None,
     ):
         self.config = config
         self.client = telegram_client
         self.registry = registry
+        self.channel_index = channel_index
+        self.outbox = outbox
 
     def prepare_video(self, video_path: Path, thumbnail_path: Path) -> UploadedVideo:
         """
@@ -54,17 +64,55 @@ class EpisodePublisher:
 
         return uploaded_video
 
+    def prepare_parts(
+        self, part_paths: List[Path], thumbnail_path: Path
+    ) -> List[UploadedVideo]:
+        """
+        Sube en paralelo las partes de un mismo video y las numera en orden.
+        Si solo hay una ruta, equivale a `prepare_video`.
+        """
+        total = len(part_paths)
+        workers = max(1, min(self.config.upload_workers, total))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            uploaded = list(
+                executor.map(
+                    lambda path: self.prepare_video(path, thumbnail_path), part_paths
+                )
+            )
+
+        if total > 1:
+            for number, video in enumerate(uploaded, start=1):
+                video.part_number = number
+                video.total_parts = total
+
+        return uploaded
+
     def publish(self, episode_number: str, videos: List[UploadedVideo]) -> bool:
         """
         Publica el álbum final con el caption formateado.
         """
         caption = self._build_caption(episode_number, videos)
+
+        pending_chats = self._pending_chats(episode_number)
+        if not pending_chats:
+            logger.info(
+                f"El episodio {episode_number} ya está en todos los chats de destino."
+            )
+            self.registry.register_episode_publication(episode_number)
+            return True
+
         logger.info(f"Publicando álbum episodio {episode_number}...")
 
+        if self.outbox is not None:
+            return self._publish_through_outbox(
+                episode_number, videos, caption, pending_chats
+            )
+
         target_chats = self.client.send_album(
             files=videos,
             caption=caption,
-            dest_chat_ids=self.config.chat_ids,
+            dest_chat_ids=pending_chats,
         )
 
         success = bool(target_chats)
@@ -73,12 +121,223 @@ class EpisodePublisher:
 
         return success
 
+    def publish_preview(
+        self,
+        episode_number: str,
+        videos: List[UploadedVideo],
+        thumbnail_path: Path,
+        pending_slots: int,
+    ) -> bool:
+        """
+        Publicación progresiva, primera etapa: publica las versiones ya listas
+        y reserva `pending_slots` posiciones del álbum con la miniatura.
+        `upgrade_album` las reemplaza cuando las versiones HD terminan de subirse.
+        """
+        if pending_slots <= 0:
+            return self.publish(episode_number, videos)
+
+        pending_chats = self._pending_chats(episode_number)
+        if not pending_chats:
+            logger.info(
+                f"El episodio {episode_number} ya está en todos los chats de destino."
+            )
+            self.registry.register_episode_publication(episode_number)
+            return True
+
+        placeholder = self.client.upload_photo(
+            self.config.chat_id_temporary, thumbnail_path
+        )
+        slots = [placeholder] * pending_slots
+        caption = self._build_caption(episode_number, videos) + PENDING_HD_LINE
+
+        logger.info(
+            f"Publicando avance del episodio {episode_number} "
+            f"({pending_slots} posiciones reservadas para HD)..."
+        )
+
+        if self.outbox is not None:
+            return self._publish_through_outbox(
+                episode_number, videos, caption, pending_chats, placeholders=slots
+            )
+
+        delivered = 0
+        for chat_id in pending_chats:
+            try:
+                messages = self.client.send_album_to_chat(
+                    videos, caption, chat_id, placeholders=slots
+                )
+            except Exception as e:
+                logger.error(f"Error enviando a destino {chat_id}: {e}")
+                continue
+            self.registry.register_chat_publication(
+                episode_number,
+                chat_id,
+                [m.id for m in messages],
+                pending_slots=pending_slots,
+            )
+            delivered += 1
+
+        if delivered:
+            self.registry.register_episode_publication(episode_number)
+        return bool(delivered)
+
+    def upgrade_album(
+        self,
+        episode_number: str,
+        preview_videos: List[UploadedVideo],
+        new_videos: List[UploadedVideo],
+    ) -> bool:
+        """
+        Publicación progresiva, segunda etapa: reemplaza las posiciones reservadas
+        por las versiones nuevas y reescribe el caption con todos los tamaños.
+        Si hay más partes que posiciones, las sobrantes se envían como otro álbum.
+        Solo toca los chats que recibieron el avance con posiciones reservadas.
+        """
+        caption = self._build_caption(episode_number, preview_videos + new_videos)
+        ordered = sorted(new_videos, key=lambda v: v.album_sort_key)
+
+        success = True
+        for publication in self.registry.get_pending_slot_publications(episode_number):
+            chat_id = publication["chat_id"]
+            message_ids = publication["message_ids"]
+            # El álbum se envió con las versiones ya listas primero y las reservas al final
+            pending = publication["pending_slots"]
+            kept_ids, slot_ids = message_ids[:-pending], message_ids[-pending:]
+
+            try:
+                for video, slot_id in zip(ordered, slot_ids):
+                    self.client.edit_album_video(chat_id, slot_id, video.file_id)
+                final_ids = kept_ids + slot_ids[: len(ordered)]
+                if len(slot_ids) > len(ordered):
+                    self.client.delete_messages(chat_id, slot_ids[len(ordered) :])
+                if len(ordered) > len(slot_ids):
+                    extra = self.client.send_album_to_chat(
+                        ordered[len(slot_ids) :], "", chat_id
+                    )
+                    final_ids += [m.id for m in extra]
+                self.client.edit_caption(chat_id, message_ids[0], caption)
+                self.registry.resolve_pending_slots(episode_number, chat_id, final_ids)
+                logger.info(
+                    f"Álbum del episodio {episode_number} actualizado en {chat_id}."
+                )
+            except Exception as e:
+                logger.error(f"Error actualizando el álbum en {chat_id}: {e}")
+                success = False
+
+        self._requeue_pending(episode_number, preview_videos + new_videos, caption)
+        return success
+
+    def cancel_pending_slots(
+        self, episode_number: str, preview_videos: List[UploadedVideo]
+    ) -> None:
+        """
+        Publicación progresiva fallida: las versiones HD no van a llegar.
+        Borra las posiciones reservadas y deja el caption sin el aviso del HD.
+        """
+        caption = self._build_caption(episode_number, preview_videos)
+
+        for publication in self.registry.get_pending_slot_publications(episode_number):
+            chat_id = publication["chat_id"]
+            message_ids = publication["message_ids"]
+            pending = publication["pending_slots"]
+            try:
+                self.client.delete_messages(chat_id, message_ids[-pending:])
+                self.client.edit_caption(chat_id, message_ids[0], caption)
+                self.registry.resolve_pending_slots(
+                    episode_number, chat_id, message_ids[:-pending]
+                )
+                logger.info(
+                    f"Posiciones reservadas del episodio {episode_number} retiradas de {chat_id}."
+                )
+            except Exception as e:
+                logger.error(f"Error retirando las posiciones en {chat_id}: {e}")
+
+        self._requeue_pending(episode_number, preview_videos, caption)
+
+    def _requeue_pending(
+        self, episode_number: str, videos: List[UploadedVideo], caption: str
+    ) -> None:
+        """Las entregas que siguen en cola salen directamente con el álbum definitivo."""
+        if self.outbox is None:
+            return
+        still_pending = [
+            job["chat_id"]
+            for job in self.outbox.get_jobs(episode_number)
+            if job["status"] == "pending"
+        ]
+        if still_pending:
+            self.outbox.enqueue(episode_number, videos, caption, still_pending)
+
+    def _publish_through_outbox(
+        self,
+        episode_number: str,
+        videos: List[UploadedVideo],
+        caption: str,
+        chat_ids: List[Union[int, str]],
+        placeholders: Optional[List[str]] = None,
+    ) -> bool:
+        """
+        Encola una entrega por chat y hace el primer intento de inmediato.
+        Los destinos que fallen quedan en el outbox para el worker de reintentos.
+        """
+        # Un chat sin permisos no entra a la cola: solo gastaría los reintentos
+        valid_chats = [c for c in chat_ids if self.client.verify_permissions(c)]
+        if not valid_chats:
+            raise PermissionDeniedError("No hay chats de destino válidos con permisos.")
+
+        outbox = cast(PublishOutbox, self.outbox)
+        job_ids = outbox.enqueue(
+            episode_number, videos, caption, valid_chats, placeholders=placeholders
+        )
+        delivered = [job_id for job_id in job_ids if outbox.deliver(job_id)]
+
+        if len(delivered) < len(job_ids):
+            logger.warning(
+                f"Episodio {episode_number}: {len(delivered)}/{len(job_ids)} destinos entregados. "
+                "El resto queda en cola de reintentos."
+            )
+
+        return bool(delivered) or outbox.has_pending(episode_number)
+
+    def is_published_everywhere(self, episode_number: str) -> bool:
+        """True si el episodio ya está en todos los chats de destino."""
+        return not self._pending_chats(episode_number)
+
+    def _pending_chats(self, episode_number: str) -> List[Union[int, str]]:
+        """Chats de destino donde el episodio todavía no aparece según el índice local."""
+        chat_ids = self.config.chat_ids
+        if isinstance(chat_ids, str):
+            chat_ids = [chat_ids]
+        if self.channel_index is None:
+            return [
+                chat_id
+                for chat_id in chat_ids
+                if not self.registry.was_episode_published_in(episode_number, chat_id)
+            ]
+
+        pending = []
+        for chat_id in chat_ids:
+            if self.registry.was_episode_published_in(episode_number, chat_id):
+                logger.info(f"Episodio {episode_number} ya entregado en {chat_id}.")
+                continue
+            try:
+                self.channel_index.sync(chat_id)
+            except Exception as e:
+                logger.warning(f"No se pudo sincronizar el índice de {chat_id}: {e}")
+            if self.channel_index.is_episode_in_chat(chat_id, episode_number):
+                logger.info(f"Episodio {episode_number} ya publicado en {chat_id}.")
+                continue
+            pending.append(chat_id)
+        return pending
+
     def _build_caption(self, episode_number: str, videos: List[UploadedVideo]) -> str:
         caption = self.config.caption.format(episode=str(episode_number))
-        videos_sorted = sorted(videos, key=lambda v: v.size_bytes)
+        videos_sorted = sorted(videos, key=lambda v: v.album_sort_key)
 
         for vid in videos_sorted:
             size_mb = int(vid.size_bytes / (1024 * 1024))
             format_name = "HD" if vid.width > 720 else "SD"
+            if vid.total_parts:
+                format_name += f" (parte {vid.part_number}/{vid.total_parts})"
             caption += f"{format_name}: {size_mb} MB\n"
         return caption
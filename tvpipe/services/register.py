@@ -1,10 +1,15 @@
 import json
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import List, Literal, Optional, TypedDict, Union, cast
+from typing import Dict, List, Literal, Optional, Set, TypedDict, Union, cast
 
-EventType = Literal["download", "upload", "publication"]
-Source = Literal["yt_downloader", "uploader", "orchestrator"]
+from typing_extensions import NotRequired
+
+from tvpipe.schemas import DownloadTelemetry
+
+EventType = Literal["download", "upload", "publication", "chat_publication"]
+Source = Literal["yt_downloader", "uploader", "orchestrator", "outbox"]
 
 
 class VideoMeta(TypedDict):
@@ -16,6 +21,9 @@ class VideoMeta(TypedDict):
     file_size: int
 
 
+MigrationStatus = Literal["migrated", "restored", "backup_lost"]
+
+
 class MigrationEntry(TypedDict):
     migration_id: str
     source_chat_id: int
@@ -30,7 +38,14 @@ class MigrationEntry(TypedDict):
     original_caption: Optional[str]
 
     timestamp: str
-    status: Literal["migrated", "restored", "backup_lost"]
+    status: MigrationStatus
+    # Última verificación del respaldo (auditoría)
+    audited_at: NotRequired[str]
+
+
+class MigrationCheckpoint(TypedDict):
+    last_message_id: int
+    updated_at: str
 
 
 class RegisterEntry(TypedDict):
@@ -39,6 +54,8 @@ class RegisterEntry(TypedDict):
     timestamp: str
     source: Source
     file_path: str
+    # Métricas de la descarga (DownloadTelemetry) para analizar tendencias
+    telemetry: NotRequired[dict]
 
 
 class RegisterVideoUpload(TypedDict):
@@ -59,17 +76,37 @@ class RegisterPublication(TypedDict):
     source: Source
 
 
-RegistryEntry = Union[RegisterEntry, RegisterVideoUpload, RegisterPublication]
+class RegisterChatPublication(TypedDict):
+    event: EventType
+    episode_number: str
+    chat_id: Union[int, str]
+    message_ids: List[int]
+    timestamp: str
+    source: Source
+    # Publicación progresiva: posiciones reservadas al final del álbum para el HD
+    pending_slots: NotRequired[int]
+
+
+RegistryEntry = Union[
+    RegisterEntry, RegisterVideoUpload, RegisterPublication, RegisterChatPublication
+]
 REGISTRY_FILE = Path.cwd() / "registry/download_registry.json"
 MIGRATION_REGISTRY_FILE = Path.cwd() / "registry/migration_registry.json"
 
 
 class RegistryManager:
-    def __init__(self, registry_file: Optional[Union[str, Path]] = None):
+    def __init__(
+        self,
+        registry_file: Optional[Union[str, Path]] = None,
+        migration_file: Optional[Union[str, Path]] = None,
+    ):
         self.registry_file = (
             REGISTRY_FILE if registry_file is None else Path(registry_file)
         )
+        self._migration_file = None if migration_file is None else Path(migration_file)
         self.registry_file.parent.mkdir(parents=True, exist_ok=True)
+        # Las subidas y publicaciones pueden registrar desde varios hilos a la vez
+        self._lock = threading.RLock()
 
     def _load(self) -> list[RegistryEntry]:
         if self.registry_file.exists():
@@ -89,7 +126,10 @@ class RegistryManager:
         return f"{path.stat().st_dev}-{path.stat().st_ino}"
 
     def register_episode_downloaded(
-        self, episode: str, file_path: Union[str, Path]
+        self,
+        episode: str,
+        file_path: Union[str, Path],
+        telemetry: Optional[DownloadTelemetry] = None,
     ) -> None:
         file_path = Path(file_path).resolve()
         entry: RegisterEntry = {
@@ -99,9 +139,12 @@ class RegistryManager:
             "source": "yt_downloader",
             "file_path": str(file_path),
         }
-        data = self._load()
-        data.append(entry)
-        self._save(data)
+        if telemetry is not None:
+            entry["telemetry"] = telemetry.model_dump(mode="json")
+        with self._lock:
+            data = self._load()
+            data.append(entry)
+            self._save(data)
 
     def register_video_uploaded(
         self, message_id: int, chat_id: int, video_path: Union[str, Path]
@@ -117,9 +160,10 @@ class RegistryManager:
             "message_id": message_id,
             "chat_id": chat_id,
         }
-        data = self._load()
-        data.append(entry)
-        self._save(data)
+        with self._lock:
+            data = self._load()
+            data.append(entry)
+            self._save(data)
 
     def register_episode_publication(self, episode: str) -> None:
         entry: RegisterPublication = {
@@ -129,11 +173,90 @@ class RegistryManager:
             "timestamp": datetime.now().isoformat(),
             "source": "orchestrator",
         }
-        data = self._load()
-        data.append(entry)
-        self._save(data)
+        with self._lock:
+            data = self._load()
+            data.append(entry)
+            self._save(data)
         print(f"Registro de publicación para el episodio {episode} guardado.")
 
+    def register_chat_publication(
+        self,
+        episode: str,
+        chat_id: Union[int, str],
+        message_ids: List[int],
+        pending_slots: int = 0,
+    ) -> None:
+        """
+        Registra la entrega de un episodio en un chat de destino concreto.
+        `pending_slots` cuenta las posiciones reservadas al final del álbum.
+        """
+        entry: RegisterChatPublication = {
+            "event": "chat_publication",
+            "episode_number": episode,
+            "chat_id": chat_id,
+            "message_ids": message_ids,
+            "timestamp": datetime.now().isoformat(),
+            "source": "outbox",
+        }
+        if pending_slots:
+            entry["pending_slots"] = pending_slots
+        with self._lock:
+            data = self._load()
+            data.append(entry)
+            self._save(data)
+
+    def was_episode_published_in(
+        self, episode_number: str, chat_id: Union[int, str]
+    ) -> bool:
+        """Verifica si un episodio fue entregado a un chat específico."""
+        data = self._load()
+        return any(
+            d.get("event") == "chat_publication"
+            and d.get("episode_number") == episode_number
+            and str(d.get("chat_id")) == str(chat_id)
+            for d in data
+        )
+
+    def get_chat_publications(
+        self, episode_number: str
+    ) -> List[RegisterChatPublication]:
+        """Devuelve las entregas por chat registradas para un episodio."""
+        data = self._load()
+        return [
+            cast(RegisterChatPublication, d)
+            for d in data
+            if d.get("event") == "chat_publication"
+            and d.get("episode_number") == episode_number
+        ]
+
+    def get_pending_slot_publications(
+        self, episode_number: str
+    ) -> List[RegisterChatPublication]:
+        """Entregas de un episodio que todavía tienen posiciones reservadas para el HD."""
+        return [
+            p
+            for p in self.get_chat_publications(episode_number)
+            if p.get("pending_slots")
+        ]
+
+    def resolve_pending_slots(
+        self, episode_number: str, chat_id: Union[int, str], message_ids: List[int]
+    ) -> None:
+        """Cierra las posiciones reservadas de una entrega y guarda sus mensajes finales."""
+        with self._lock:
+            data = self._load()
+            for d in data:
+                if (
+                    d.get("event") == "chat_publication"
+                    and d.get("episode_number") == episode_number
+                    and str(d.get("chat_id")) == str(chat_id)
+                    and d.get("pending_slots")
+                ):
+                    entry = cast(RegisterChatPublication, d)
+                    entry["message_ids"] = message_ids
+                    del entry["pending_slots"]
+            self._save(data)
+
     def was_episode_downloaded(self, episode: str) -> bool:
         data = self._load()
         return any(
@@ -171,33 +294,72 @@ class RegistryManager:
         video_path = Path(video_path).resolve()
 
         inodo = self._get_inodo(video_path)
-        data = self._load()
-        new_data = [
-            d
-            for d in data
-            if not (d.get("inodo") == inodo and d.get("event") == "upload")
-        ]
-
-        if len(new_data) < len(data):
-            self._save(new_data)
-            print(f"Entrada inválida eliminada del registro para: {video_path.name}")
+        with self._lock:
+            data = self._load()
+            new_data = [
+                d
+                for d in data
+                if not (d.get("inodo") == inodo and d.get("event") == "upload")
+            ]
+
+            if len(new_data) < len(data):
+                self._save(new_data)
+                print(
+                    f"Entrada inválida eliminada del registro para: {video_path.name}"
+                )
+
+    @property
+    def migration_file(self) -> Path:
+        return self._migration_file or MIGRATION_REGISTRY_FILE
 
     def _load_migration(self) -> List[MigrationEntry]:
         """Carga específica para el registro de migración."""
-        if MIGRATION_REGISTRY_FILE.exists():
+        if self.migration_file.exists():
             try:
-                with open(MIGRATION_REGISTRY_FILE, "r", encoding="utf-8") as f:
+                with open(self.migration_file, "r", encoding="utf-8") as f:
                     return json.load(f)
             except Exception as e:
                 print(f"Error leyendo registro de migración: {e}")
         return []
 
     def _save_migration(self, data: List[MigrationEntry]) -> None:
-        MIGRATION_REGISTRY_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(MIGRATION_REGISTRY_FILE, "w", encoding="utf-8") as f:
+        self.migration_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.migration_file, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
 
-    def register_migration(
+    @property
+    def checkpoint_file(self) -> Path:
+        """Cursores de escaneo del migrador, junto al registro de migración."""
+        return self.migration_file.with_name("migration_checkpoints.json")
+
+    def _load_checkpoints(self) -> Dict[str, MigrationCheckpoint]:
+        if self.checkpoint_file.exists():
+            try:
+                with open(self.checkpoint_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error leyendo checkpoints de migración: {e}")
+        return {}
+
+    def get_migration_checkpoint(self, source_chat_id: Union[int, str]) -> int:
+        """Último ID de mensaje del chat origen ya procesado por completo (0 si no hay)."""
+        checkpoint = self._load_checkpoints().get(str(source_chat_id))
+        return checkpoint["last_message_id"] if checkpoint else 0
+
+    def save_migration_checkpoint(
+        self, source_chat_id: Union[int, str], last_message_id: int
+    ) -> None:
+        with self._lock:
+            data = self._load_checkpoints()
+            data[str(source_chat_id)] = {
+                "last_message_id": last_message_id,
+                "updated_at": datetime.now().isoformat(),
+            }
+            self.checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.checkpoint_file, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+
+    def build_migration_entry(
         self,
         source_chat_id: int,
         source_msg_id: int,
@@ -207,8 +369,8 @@ class RegistryManager:
         original_caption: Optional[str],
         media_group_id: str,
         batch_id: str,
-    ) -> None:
-        entry: MigrationEntry = {
+    ) -> MigrationEntry:
+        return {
             "migration_id": f"{source_chat_id}_{source_msg_id}",
             "source_chat_id": source_chat_id,
             "source_message_id": source_msg_id,
@@ -222,11 +384,40 @@ class RegistryManager:
             "batch_id": batch_id,
         }
 
-        data = self._load_migration()
-
-        data = [d for d in data if d["migration_id"] != entry["migration_id"]]
-        data.append(entry)
-        self._save_migration(data)
+    def register_migration(
+        self,
+        source_chat_id: int,
+        source_msg_id: int,
+        backup_chat_id: int,
+        backup_msg_id: int,
+        video_meta: VideoMeta,
+        original_caption: Optional[str],
+        media_group_id: str,
+        batch_id: str,
+    ) -> None:
+        entry = self.build_migration_entry(
+            source_chat_id,
+            source_msg_id,
+            backup_chat_id,
+            backup_msg_id,
+            video_meta,
+            original_caption,
+            media_group_id,
+            batch_id,
+        )
+        self.register_migrations([entry])
+
+    def register_migrations(self, entries: List[MigrationEntry]) -> None:
+        """Guarda varias migraciones con una sola escritura del registro."""
+        if not entries:
+            return
+        new_ids = {e["migration_id"] for e in entries}
+        with self._lock:
+            data = self._load_migration()
+
+            data = [d for d in data if d["migration_id"] not in new_ids]
+            data.extend(entries)
+            self._save_migration(data)
 
     def get_entries_by_batch(self, batch_id: str) -> List[MigrationEntry]:
         """Obtiene todos los items de una sesión de migración específica."""
@@ -249,6 +440,15 @@ class RegistryManager:
         data = self._load_migration()
         return any(d["migration_id"] == mid and d["status"] == "migrated" for d in data)
 
+    def get_migrated_message_ids(self, source_chat_id: Union[int, str]) -> Set[int]:
+        """IDs de mensajes del chat origen con estado 'migrated' (una sola lectura)."""
+        return {
+            d["source_message_id"]
+            for d in self._load_migration()
+            if str(d["source_chat_id"]) == str(source_chat_id)
+            and d["status"] == "migrated"
+        }
+
     def get_migration_entry(
         self, source_chat_id: Union[int, str], message_id: int
     ) -> Optional[MigrationEntry]:
@@ -264,21 +464,94 @@ class RegistryManager:
     ):
         """Actualiza el estado de una migración (ej. a 'restored')."""
         mid = f"{source_chat_id}_{message_id}"
-        data = self._load_migration()
-        updated = False
-        for entry in data:
-            if entry["migration_id"] == mid:
-                entry["status"] = status  # type: ignore
-                updated = True
-                break
-        if updated:
+        with self._lock:
+            data = self._load_migration()
+            updated = False
+            for entry in data:
+                if entry["migration_id"] == mid:
+                    entry["status"] = status  # type: ignore
+                    updated = True
+                    break
+            if updated:
+                self._save_migration(data)
+
+    def update_migration_statuses(self, migration_ids: List[str], status: str) -> None:
+        """Actualiza el estado de muchas migraciones con una sola escritura."""
+        if not migration_ids:
+            return
+        targets = set(migration_ids)
+        with self._lock:
+            data = self._load_migration()
+            for entry in data:
+                if entry["migration_id"] in targets:
+                    entry["status"] = status  # type: ignore
+            self._save_migration(data)
+
+    def record_backup_audit(
+        self, results: Dict[str, bool], audited_at: Optional[str] = None
+    ) -> None:
+        """
+        Guarda el resultado de una auditoría de respaldos en una sola escritura.
+        `results` indica, por migration_id, si el respaldo sigue íntegro.
+        """
+        if not results:
+            return
+        audited_at = audited_at or datetime.now().isoformat()
+        with self._lock:
+            data = self._load_migration()
+            for entry in data:
+                ok = results.get(entry["migration_id"])
+                if ok is None:
+                    continue
+                entry["audited_at"] = audited_at
+                if not ok:
+                    entry["status"] = "backup_lost"
             self._save_migration(data)
 
+    def get_migration_entries(
+        self, status: Optional[MigrationStatus] = None
+    ) -> List[MigrationEntry]:
+        """Devuelve las migraciones registradas, opcionalmente filtradas por estado."""
+        data = self._load_migration()
+        if status is None:
+            return data
+        return [d for d in data if d["status"] == status]
+
     def get_entries_by_media_group(self, media_group_id: str) -> List[MigrationEntry]:
         """Obtiene todas las partes de un álbum específico."""
         data = self._load_migration()
         return [d for d in data if d.get("media_group_id") == media_group_id]
 
-    def register_downloads(self, episode_number: str, videos: List[Path]):
+    def register_downloads(
+        self,
+        episode_number: str,
+        videos: List[Path],
+        telemetry: Optional[List[DownloadTelemetry]] = None,
+    ):
+        by_name = {t.file_name: t for t in telemetry or []}
         for video_path in videos:
-            self.register_episode_downloaded(episode_number, video_path)
+            self.register_episode_downloaded(
+                episode_number, video_path, by_name.get(Path(video_path).name)
+            )
+
+    def get_published_downloads(self) -> Set[Path]:
+        """Rutas de los videos descargados cuyo episodio ya fue publicado."""
+        data = self._load()
+        published = {
+            d.get("episode_number") for d in data if d.get("event") == "publication"
+        }
+        return {
+            Path(d["file_path"]).resolve()  # type: ignore
+            for d in data
+            if d.get("event") == "download" and d.get("episode") in published
+        }
+
+    def get_download_telemetry(self, episode: Optional[str] = None) -> List[dict]:
+        """Métricas de descarga registradas (de un episodio o de todos), en orden."""
+        return [
+            d["telemetry"]
+            for d in self._load()
+            if d.get("event") == "download"
+            and "telemetry" in d
+            and (episode is None or d.get("episode") == episode)
+        ]  # type: ignore
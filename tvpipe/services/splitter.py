@@ -0,0 +1,211 @@
+import json
+import logging
+import subprocess
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from tvpipe.exceptions import SplitError
+
+logger = logging.getLogger(__name__)
+
+# Margen para el overhead del contenedor (moov, ftyp) al reempaquetar cada parte.
+CONTAINER_OVERHEAD_RATIO = 0.97
+
+KeyframeMark = Tuple[float, int]
+
+
+def plan_cut_points(
+    keyframes: List[KeyframeMark], total_bytes: int, max_bytes: int
+) -> List[float]:
+    """
+    Calcula los instantes de corte para que ninguna parte supere `max_bytes`.
+
+    Args:
+        keyframes: Lista ordenada de (pts_time, bytes acumulados antes del keyframe).
+        total_bytes: Bytes totales de payload del archivo.
+        max_bytes: Tamaño máximo permitido por parte (ya con margen aplicado).
+
+    Returns:
+        Lista de instantes (segundos) donde empieza cada parte, sin incluir el 0.
+    """
+    cuts: List[float] = []
+    start_bytes = 0
+    candidate: Optional[KeyframeMark] = None
+
+    for time_, cum_bytes in keyframes:
+        if time_ <= 0:
+            continue
+
+        if cum_bytes - start_bytes <= max_bytes:
+            candidate = (time_, cum_bytes)
+            continue
+
+        if candidate is None:
+            raise SplitError(
+                f"El GOP que empieza en {cuts[-1] if cuts else 0.0:.2f}s supera el límite de {max_bytes} bytes."
+            )
+
+        cuts.append(candidate[0])
+        start_bytes = candidate[1]
+        candidate = None
+
+        # El keyframe actual puede ser el primer candidato de la nueva parte
+        if cum_bytes - start_bytes <= max_bytes:
+            candidate = (time_, cum_bytes)
+        else:
+            raise SplitError(
+                f"El GOP que empieza en {cuts[-1]:.2f}s supera el límite de {max_bytes} bytes."
+            )
+
+    if total_bytes - start_bytes > max_bytes:
+        if candidate is None:
+            raise SplitError("La última parte supera el límite y no hay keyframes.")
+        cuts.append(candidate[0])
+        if total_bytes - candidate[1] > max_bytes:
+            raise SplitError(
+                "La última parte supera el límite tras el último keyframe."
+            )
+
+    return cuts
+
+
+class VideoSplitter:
+    """
+    Divide un MP4 en partes por debajo del límite de Telegram.
+    Corta siempre en keyframes y con copia de streams (sin recodificar).
+    """
+
+    def __init__(
+        self,
+        max_part_size: int,
+        ffmpeg_path: str = "ffmpeg",
+        ffprobe_path: str = "ffprobe",
+    ):
+        self.max_part_size = max_part_size
+        self.ffmpeg_path = ffmpeg_path
+        self.ffprobe_path = ffprobe_path
+
+    def needs_split(self, video_path: Path) -> bool:
+        return video_path.stat().st_size > self.max_part_size
+
+    def split_if_needed(self, video_path: Path) -> List[Path]:
+        """
+        Devuelve las rutas a subir para `video_path`.
+        Si el archivo cabe en un solo mensaje, devuelve [video_path].
+        """
+        if not self.needs_split(video_path):
+            return [video_path]
+
+        logger.info(
+            f"{video_path.name} supera el límite de {self.max_part_size // (1024 * 1024)} MB. Dividiendo..."
+        )
+        keyframes, total_bytes = self._probe_keyframes(video_path)
+        cuts = plan_cut_points(
+            keyframes,
+            total_bytes,
+            int(self.max_part_size * CONTAINER_OVERHEAD_RATIO),
+        )
+
+        bounds = list(zip([0.0] + cuts, cuts + [None]))
+        total = len(bounds)
+        parts = []
+        for index, (start, end) in enumerate(bounds, start=1):
+            part_path = self.part_path(video_path, index, total)
+            self._cut_segment(video_path, part_path, start, end)
+            parts.append(part_path)
+
+        logger.info(f"{video_path.name} dividido en {total} partes.")
+        return parts
+
+    def part_path(self, video_path: Path, index: int, total: int) -> Path:
+        return video_path.with_name(
+            f"{video_path.stem}.parte{index}de{total}{video_path.suffix}"
+        )
+
+    def _probe_keyframes(self, video_path: Path) -> Tuple[List[KeyframeMark], int]:
+        """
+        Lee solo las cabeceras de paquetes (sin decodificar) para conocer
+        la posición de cada keyframe de video y los bytes acumulados hasta él.
+        """
+        cmd = [
+            self.ffprobe_path,
+            "-v",
+            "error",
+            "-show_entries",
+            "packet=stream_index,pts_time,size,flags",
+            "-show_entries",
+            "stream=index,codec_type",
+            "-of",
+            "json",
+            str(video_path),
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise SplitError(f"ffprobe falló con {video_path.name}: {result.stderr}")
+
+        data = json.loads(result.stdout)
+        video_indexes = {
+            s["index"] for s in data.get("streams", []) if s["codec_type"] == "video"
+        }
+
+        packets = []
+        for pkt in data.get("packets", []):
+            if pkt.get("pts_time") is None:
+                continue
+            packets.append(
+                (
+                    float(pkt["pts_time"]),
+                    int(pkt["size"]),
+                    pkt["stream_index"] in video_indexes and "K" in pkt["flags"],
+                )
+            )
+        packets.sort(key=lambda p: p[0])
+
+        keyframes: List[KeyframeMark] = []
+        cum_bytes = 0
+        for time_, size, is_keyframe in packets:
+            if is_keyframe:
+                keyframes.append((time_, cum_bytes))
+            cum_bytes += size
+
+        return keyframes, cum_bytes
+
+    def _cut_segment(
+        self, video_path: Path, part_path: Path, start: float, end: Optional[float]
+    ) -> None:
+        if part_path.exists():
+            logger.info(f"Parte ya existe, saltando corte: {part_path.name}")
+            return
+
+        temp_part = part_path.parent / ".temp" / part_path.name
+        temp_part.parent.mkdir(parents=True, exist_ok=True)
+
+        cmd = [self.ffmpeg_path, "-y", "-v", "error", "-ss", f"{start:.6f}"]
+        cmd += ["-i", str(video_path)]
+        if end is not None:
+            cmd += ["-t", f"{end - start:.6f}"]
+        cmd += [
+            "-map",
+            "0",
+            "-c",
+            "copy",
+            "-avoid_negative_ts",
+            "make_zero",
+            "-movflags",
+            "+faststart",
+            str(temp_part),
+        ]
+
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            temp_part.unlink(missing_ok=True)
+            raise SplitError(f"ffmpeg falló cortando {part_path.name}: {result.stderr}")
+
+        size = temp_part.stat().st_size
+        if size > self.max_part_size:
+            temp_part.unlink(missing_ok=True)
+            raise SplitError(
+                f"La parte {part_path.name} ({size} bytes) supera el límite de {self.max_part_size} bytes."
+            )
+
+        temp_part.rename(part_path)
@@ -0,0 +1,192 @@
+import logging
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from tvpipe.exceptions import InsufficientStorageError
+from tvpipe.schemas import StreamPair
+from tvpipe.services.integrity import QUARANTINE_DIR
+from tvpipe.services.register import RegistryManager
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class StorageManager:
+    """
+    Controla el espacio de `download_folder`:
+        - Antes de descargar, estima lo que ocupará el episodio y lo rechaza si
+          no cabe (el orquestador lo reintenta en el siguiente ciclo).
+        - Tras una publicación confirmada, libera primero lo más antiguo y lo
+          menos usado, pero solo archivos de episodios ya publicados.
+        - Limpia restos de `.temp`, cachés de formatos abandonados y la
+          cuarentena de archivos dañados.
+    """
+
+    def __init__(
+        self,
+        download_folder: Path,
+        registry: RegistryManager,
+        min_free_bytes: int = 2048 * MB,
+        safety_margin: float = 1.1,
+        retention_days: float = 7,
+        grace_period: int = 3600,
+        stale_temp_hours: float = 12,
+    ):
+        self.download_folder = Path(download_folder)
+        self.registry = registry
+        self.min_free_bytes = min_free_bytes
+        self.safety_margin = safety_margin
+        self.retention_seconds = retention_days * 86400
+        # Lo recién descargado puede estar subiéndose todavía (publicación progresiva)
+        self.grace_period = grace_period
+        self.stale_temp_seconds = stale_temp_hours * 3600
+
+    # --- Admisión ---
+
+    def estimate_plan_bytes(self, plan: List[Tuple[StreamPair, Path]]) -> int:
+        """
+        Bytes que ocupará un plan de descarga: cada formato único en la caché
+        compartida más cada versión unida, con margen por tamaños aproximados.
+        """
+        formats: Dict[str, int] = {}
+        outputs = 0
+        for stream, output_path in plan:
+            if output_path.exists():
+                continue
+            formats[stream.video.format_id] = stream.video.size_bytes
+            formats[stream.audio.format_id] = stream.audio.size_bytes
+            outputs += stream.video.size_bytes + stream.audio.size_bytes
+        return int((sum(formats.values()) + outputs) * self.safety_margin)
+
+    def free_bytes(self) -> int:
+        self.download_folder.mkdir(parents=True, exist_ok=True)
+        return shutil.disk_usage(self.download_folder).free
+
+    def admit(self, required_bytes: int) -> None:
+        """
+        Verifica que la descarga quepa dejando `min_free_bytes` libres.
+        Si no alcanza, limpia restos y libera episodios publicados; si aun así
+        no alcanza, lanza InsufficientStorageError sin empezar la descarga.
+        """
+        shortfall = required_bytes + self.min_free_bytes - self.free_bytes()
+        if shortfall <= 0:
+            return
+
+        logger.warning(
+            f"Faltan {shortfall / MB:.0f} MB para descargar. Liberando espacio..."
+        )
+        self.clean_stale_temp()
+        self.evict(needed_bytes=shortfall)
+
+        shortfall = required_bytes + self.min_free_bytes - self.free_bytes()
+        if shortfall > 0:
+            raise InsufficientStorageError(
+                f"Espacio insuficiente: se necesitan {required_bytes / MB:.0f} MB "
+                f"(+{self.min_free_bytes / MB:.0f} MB de reserva) y faltan {shortfall / MB:.0f} MB."
+            )
+
+    # --- Retención ---
+
+    def _evictable(self) -> List[Tuple[float, Path]]:
+        """
+        (último uso, ruta) de lo que se puede borrar: videos publicados, sus
+        partes y su miniatura (archivos cuyo nombre es prefijo del video).
+        """
+        published = self.registry.get_published_downloads()
+        if not published:
+            return []
+
+        now = time.time()
+        candidates = []
+        for path in self.download_folder.iterdir():
+            if not path.is_file():
+                continue
+            resolved = path.resolve()
+            owned = resolved in published or any(
+                p.parent == resolved.parent
+                and (
+                    resolved.name.startswith(f"{p.stem}.parte")
+                    or p.name.startswith(f"{resolved.stem}.")
+                )
+                for p in published
+            )
+            if not owned:
+                continue
+
+            stat = path.stat()
+            last_used = max(stat.st_atime, stat.st_mtime)
+            if now - last_used < self.grace_period:
+                continue
+            candidates.append((last_used, path))
+
+        return sorted(candidates)
+
+    def evict(self, needed_bytes: int = 0) -> int:
+        """
+        Borra los archivos publicados que superan la retención y, si hace falta
+        liberar `needed_bytes`, también los menos usados recientemente.
+        Devuelve los bytes liberados.
+        """
+        now = time.time()
+        freed = 0
+        for last_used, path in self._evictable():
+            expired = now - last_used > self.retention_seconds
+            if not expired and freed >= needed_bytes:
+                break
+
+            size = path.stat().st_size
+            path.unlink(missing_ok=True)
+            freed += size
+            logger.info(f"Liberado {path.name} ({size / MB:.0f} MB).")
+
+        if freed:
+            logger.info(f"Espacio liberado: {freed / MB:.0f} MB.")
+        return freed
+
+    def clean_stale_temp(self) -> int:
+        """Borra restos de `.temp` y cachés de formatos sin actividad reciente."""
+        now = time.time()
+        removed = 0
+        stale_dirs = [self.download_folder / ".temp"] + [
+            cache / ".temp" for cache in self._cache_dirs()
+        ]
+        for temp_dir in stale_dirs:
+            if not temp_dir.is_dir():
+                continue
+            for path in temp_dir.iterdir():
+                if (
+                    path.is_file()
+                    and now - path.stat().st_mtime > self.stale_temp_seconds
+                ):
+                    path.unlink(missing_ok=True)
+                    removed += 1
+
+        # La cuarentena se guarda para revisión solo lo que dura la retención
+        quarantine_dir = self.download_folder / QUARANTINE_DIR
+        if quarantine_dir.is_dir():
+            for path in quarantine_dir.iterdir():
+                if now - path.stat().st_mtime > self.retention_seconds:
+                    path.unlink(missing_ok=True)
+                    removed += 1
+
+        # Una caché de formatos vieja ya no sirve: sus URLs y su episodio quedaron atrás
+        for cache in self._cache_dirs():
+            if now - _last_modified(cache) > self.stale_temp_seconds:
+                shutil.rmtree(cache, ignore_errors=True)
+                removed += 1
+
+        if removed:
+            logger.info(f"Limpieza de temporales: {removed} restos eliminados.")
+        return removed
+
+    def _cache_dirs(self) -> List[Path]:
+        root = self.download_folder / ".cache"
+        return [p for p in root.iterdir() if p.is_dir()] if root.is_dir() else []
+
+
+def _last_modified(directory: Path) -> float:
+    times = [p.stat().st_mtime for p in directory.rglob("*")]
+    return max(times, default=directory.stat().st_mtime)
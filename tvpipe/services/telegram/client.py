@@ -1,12 +1,29 @@
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Generator, List, Optional, Union, cast
+from typing import Callable, Dict, Generator, List, Optional, Union, cast
 
 from pyrogram import Client, enums  # type: ignore
-from pyrogram.errors import ChatWriteForbidden, PeerIdInvalid, RPCError  # type: ignore
+from pyrogram.methods.messages.get_chat_history import get_chunk  # type: ignore
+from pyrogram.sync import async_to_sync  # type: ignore
+from pyrogram.errors import (  # type: ignore
+    ChatWriteForbidden,
+    FileReferenceEmpty,
+    FileReferenceExpired,
+    FileReferenceInvalid,
+    FloodWait,
+    MediaEmpty,
+    MediaInvalid,
+    PeerIdInvalid,
+    PhotoInvalid,
+    RPCError,
+)
 from pyrogram.types import (  # type: ignore
     Chat,
     ChatMember,
+    InputMediaDocument,
     InputMediaPhoto,
     InputMediaVideo,
     Message,
@@ -16,24 +33,88 @@ from pyrogram.types import (  # type: ignore
 
 from tvpipe.exceptions import (
     ContentNotFoundError,
+    MediaReferenceError,
     TelegramConnectionError,
     TelegramError,
 )
+from tvpipe.utils import RateLimiter
 
 from .exceptions import AuthenticationError, PermissionDeniedError
 from .schemas import UploadedVideo, UploaderSessionInfo
 from .utils import get_video_metadata
 
+# Errores con los que Telegram rechaza un file_id ya guardado
+STALE_MEDIA_ERRORS = (
+    FileReferenceEmpty,
+    FileReferenceExpired,
+    FileReferenceInvalid,
+    MediaEmpty,
+    MediaInvalid,
+    PhotoInvalid,
+)
+
 logger = logging.getLogger(__name__)
 
+ALBUM_MAX_ITEMS = 10
+HISTORY_PAGE_LIMIT = 100
+GET_MESSAGES_LIMIT = 200
+DELETE_MESSAGES_LIMIT = 100
+
+
+class HistoryClient(Client):
+    """Cliente de Pyrogram que además expone una sola petición GetHistory."""
+
+    async def get_history_chunk(
+        self,
+        chat_id: Union[int, str],
+        limit: int,
+        offset: int = 0,
+        offset_id: int = 0,
+    ) -> List[Message]:
+        # get_chat_history repite la petición mientras el bloque llegue corto,
+        # lo que al final del chat cuesta varias peticiones por página
+        return await get_chunk(
+            client=self,
+            chat_id=chat_id,
+            limit=limit,
+            offset=offset,
+            from_message_id=offset_id,
+        )
+
+
+# Igual que los métodos propios de Pyrogram, se puede llamar de forma síncrona
+async_to_sync(HistoryClient, "get_history_chunk")
+
 
 class TelegramService:
-    def __init__(self, session_name: str, api_id: int, api_hash: str, workdir: Path):
-        self.client = Client(
+    def __init__(
+        self,
+        session_name: str,
+        api_id: int,
+        api_hash: str,
+        workdir: Path,
+        max_workers: int = 4,
+        client: Optional[Client] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        flood_wait_retries: int = 3,
+    ):
+        # `client` permite inyectar otro backend (ej: FakeTelegramClient en benchmarks)
+        self.client = client or HistoryClient(
             name=session_name, api_id=api_id, api_hash=api_hash, workdir=str(workdir)
         )
         self._me = None
 
+        # Pool para llamadas concurrentes (subidas en paralelo, pipelines).
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="telegram"
+        )
+        self._loop_thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        # Ritmo global de llamadas a la API, compartido por todos los hilos
+        self.rate_limiter = rate_limiter
+        self.flood_wait_retries = flood_wait_retries
+
     def __enter__(self):
         self.start()
         return self
@@ -42,14 +123,21 @@ class TelegramService:
         self.stop()
 
     def start(self):
-        """Inicia el cliente y carga la info del usuario."""
-        if not self.client.is_connected:
+        """
+        Inicia el cliente y carga la info del usuario.
+        Debe llamarse primero desde el hilo principal: ahí vive el loop de la sesión.
+        """
+        # Dos hilos podrían intentar conectar a la vez (ej: el worker del outbox)
+        with self._start_lock:
+            if self.client.is_connected:
+                return
             try:
-                self.client.start()  # type: ignore
-                self._me = cast(User, self.client.get_me())
+                self._call(self.client.start)  # type: ignore
+                self._me = cast(User, self._call(self.client.get_me))
                 logger.info(
                     f"Telegram Client iniciado como: {self._me.first_name} (@{self._me.username}) ID: {self._me.id}"
                 )
+                self._start_loop_thread()
             except Exception as e:
                 logger.critical(f"Error al iniciar sesión en Telegram: {e}")
                 raise AuthenticationError(f"No se pudo conectar a Telegram: {e}")
@@ -57,8 +145,67 @@ class TelegramService:
     def stop(self):
         """Detiene el cliente."""
         if self.client.is_connected:
-            self.client.stop()  # type: ignore
+            self._call(self.client.stop)  # type: ignore
             logger.info("Telegram Client detenido.")
+        self._stop_loop_thread()
+
+    def _start_loop_thread(self):
+        """
+        Mantiene el event loop de Pyrogram corriendo en un hilo dedicado.
+        Así el wrapper síncrono de Pyrogram puede atender llamadas desde varios
+        hilos a la vez (ver `_call`).
+        """
+        loop = getattr(self.client, "loop", None)
+        if loop is None or loop.is_running():
+            return
+
+        self._loop_thread = threading.Thread(
+            target=loop.run_forever, name="telegram-loop", daemon=True
+        )
+        self._loop_thread.start()
+
+    def _stop_loop_thread(self):
+        if self._loop_thread is None:
+            return
+        loop = self.client.loop
+        loop.call_soon_threadsafe(loop.stop)
+        self._loop_thread.join(timeout=10)
+        self._loop_thread = None
+
+    def _call(self, func, *args, **kwargs):
+        """
+        Ejecuta un método del cliente respetando el rate limiter.
+        Ante un FloodWait espera lo que pide Telegram (pausando a todos los hilos)
+        y reintenta hasta `flood_wait_retries` veces.
+        """
+        for attempt in range(self.flood_wait_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                return self._dispatch(func, *args, **kwargs)
+            except FloodWait as e:
+                if attempt >= self.flood_wait_retries:
+                    raise
+                wait = int(e.value)  # type: ignore
+                logger.warning(
+                    f"FloodWait de {wait}s en {getattr(func, '__name__', func)}. Esperando..."
+                )
+                if self.rate_limiter:
+                    self.rate_limiter.pause(wait)
+                else:
+                    time.sleep(wait)
+
+    def _dispatch(self, func, *args, **kwargs):
+        """
+        Con el loop en segundo plano, Pyrogram solo despacha bien las llamadas
+        hechas desde hilos secundarios, por eso el hilo principal delega en el pool.
+        """
+        if (
+            self._loop_thread is not None
+            and threading.current_thread() is threading.main_thread()
+        ):
+            return self._executor.submit(func, *args, **kwargs).result()
+        return func(*args, **kwargs)
 
     def get_me(self) -> UploaderSessionInfo:
         """Devuelve la info de la sesión actual."""
@@ -79,8 +226,8 @@ class TelegramService:
             self.start()
 
         try:
-            chat = cast(Chat, self.client.get_chat(chat_id))
-            member: ChatMember = self.client.get_chat_member(chat_id, "me")  # type: ignore
+            chat = cast(Chat, self._call(self.client.get_chat, chat_id))
+            member: ChatMember = self._call(self.client.get_chat_member, chat_id, "me")  # type: ignore
 
             can_write = False
             if chat.type == enums.ChatType.PRIVATE:
@@ -123,13 +270,34 @@ class TelegramService:
         if not self.client.is_connected:
             self.start()
         try:
-            msg = self.client.get_messages(chat_id, message_id)
+            msg = self._call(self.client.get_messages, chat_id, message_id)
             if not msg or msg.empty:  # type: ignore
                 return None
             return cast(Message, msg)
         except Exception:
             return None
 
+    def get_messages(
+        self, chat_id: Union[int, str], message_ids: List[int]
+    ) -> Dict[int, Message]:
+        """
+        Obtiene muchos mensajes en lotes de 200 IDs por petición.
+        Devuelve solo los que existen, indexados por ID.
+        """
+        if not self.client.is_connected:
+            self.start()
+
+        found: Dict[int, Message] = {}
+        for i in range(0, len(message_ids), GET_MESSAGES_LIMIT):
+            chunk = message_ids[i : i + GET_MESSAGES_LIMIT]
+            messages = cast(
+                List[Message], self._call(self.client.get_messages, chat_id, chunk)
+            )
+            for msg in messages:
+                if msg and not msg.empty:
+                    found[msg.id] = msg
+        return found
+
     def upload_video(
         self,
         video_path: Path,
@@ -152,7 +320,8 @@ class TelegramService:
             logger.info(f"Subiendo {video_path.name}")
             msg = cast(
                 Message,
-                self.client.send_video(
+                self._call(
+                    self.client.send_video,
                     chat_id=target_chat_id,
                     video=str(video_path),
                     caption=caption or video_path.name,
@@ -202,33 +371,129 @@ class TelegramService:
         if not valid_chats:
             raise PermissionDeniedError("No hay chats de destino válidos con permisos.")
 
-        # Construir Media Group
-        files.sort(key=lambda x: x.size_bytes)
-        media_group = []
-        for i, vid in enumerate(files):
-            # Solo el primer video lleva el caption final
-            cap = caption if i == 0 else ""
-            media_group.append(InputMediaVideo(media=vid.file_id, caption=cap))
-
         # Enviar
         successful_chats = []
         for chat_id in valid_chats:
             try:
-                logger.info(f"Enviando álbum a {chat_id}")
-                self.client.send_media_group(chat_id, media_group)  # type: ignore
+                self.send_album_to_chat(files, caption, chat_id)
                 successful_chats.append(chat_id)
             except Exception as e:
                 logger.error(f"Error enviando a destino {chat_id}: {e}")
 
         return cast(List[int], successful_chats)
 
+    def send_album_to_chat(
+        self,
+        files: List[UploadedVideo],
+        caption: str,
+        chat_id: Union[int, str],
+        placeholders: Optional[List[str]] = None,
+        already_sent: int = 0,
+        on_chunk_sent: Optional[Callable[[List[Message]], None]] = None,
+    ) -> List[Message]:
+        """
+        Envía el álbum a un único chat y devuelve los mensajes creados.
+        A diferencia de `send_album`, propaga el error para que el llamador decida si reintenta.
+        `placeholders` (file_ids de fotos) reserva posiciones al final del álbum
+        que luego se reemplazan con `edit_album_video`.
+        Un álbum de más de 10 elementos sale en varios bloques: `already_sent` salta
+        los elementos publicados en un intento anterior y `on_chunk_sent` recibe
+        los mensajes de cada bloque apenas se envía.
+        """
+        if not self.client.is_connected:
+            self.start()
+
+        # Construir Media Group (Telegram admite como máximo 10 elementos por álbum)
+        ordered = sorted(files, key=lambda x: x.album_sort_key)
+        items = [InputMediaVideo(media=vid.file_id) for vid in ordered]
+        items += [InputMediaPhoto(media=file_id) for file_id in placeholders or []]
+
+        media_groups = []
+        for i, item in enumerate(items):
+            # Solo el primer video lleva el caption final
+            item.caption = caption if i == 0 else ""
+            if i % ALBUM_MAX_ITEMS == 0:
+                media_groups.append([])
+            media_groups[-1].append(item)
+
+        logger.info(f"Enviando álbum a {chat_id}")
+        sent: List[Message] = []
+        # Solo el último bloque puede quedar incompleto, así que los ya enviados son enteros
+        for media_group in media_groups[already_sent // ALBUM_MAX_ITEMS :]:
+            messages = self._call(self.client.send_media_group, chat_id, media_group)  # type: ignore
+            sent.extend(messages)
+            if on_chunk_sent:
+                on_chunk_sent(messages)
+        return sent
+
+    def edit_album_video(
+        self,
+        chat_id: Union[int, str],
+        message_id: int,
+        file_id: str,
+        caption: str = "",
+    ) -> None:
+        """Reemplaza un elemento de un álbum ya publicado por un video subido."""
+        if not self.client.is_connected:
+            self.start()
+        media = InputMediaVideo(media=file_id, caption=caption, supports_streaming=True)
+        self._call(
+            self.client.edit_message_media,
+            chat_id=chat_id,
+            message_id=message_id,
+            media=media,
+        )
+
+    def edit_caption(
+        self, chat_id: Union[int, str], message_id: int, caption: str
+    ) -> None:
+        if not self.client.is_connected:
+            self.start()
+        self._call(
+            self.client.edit_message_caption,
+            chat_id=chat_id,
+            message_id=message_id,
+            caption=caption,
+        )
+
     def get_history(
         self, chat_id: Union[int, str], limit: int = 50
     ) -> Generator[Message, None, None]:
         """Itera sobre el historial de mensajes."""
         if not self.client.is_connected:
             self.start()
-        return self.client.get_chat_history(chat_id, limit=limit)  # type: ignore
+        return self._call(self.client.get_chat_history, chat_id, limit=limit)  # type: ignore
+
+    def iter_history_pages(
+        self, chat_id: Union[int, str], after_id: int = 0, page_size: int = 100
+    ) -> Generator[List[Message], None, None]:
+        """
+        Recorre el historial del más viejo al más nuevo, en páginas ordenadas por ID.
+        Empieza después de `after_id`; cada página es una sola petición (máx. 100).
+        """
+        if not self.client.is_connected:
+            self.start()
+
+        page_size = max(1, min(page_size, HISTORY_PAGE_LIMIT))
+        cursor = after_id
+        while True:
+            # offset_id=cursor+1 se posiciona en el cursor y el offset negativo
+            # desplaza la ventana hacia los mensajes más nuevos.
+            raw = self._call(
+                self.client.get_history_chunk,  # type: ignore
+                chat_id,
+                limit=page_size,
+                offset_id=cursor + 1,
+                offset=-page_size,
+            )
+            page = sorted((m for m in raw if m.id > cursor), key=lambda m: m.id)
+            if not page:
+                return
+
+            yield page
+            cursor = page[-1].id
+            if len(page) < page_size:
+                return
 
     def copy_message(
         self,
@@ -240,29 +505,64 @@ class TelegramService:
         if not self.client.is_connected:
             self.start()
         try:
-            return self.client.copy_message(  # type: ignore
-                chat_id=target_chat_id, from_chat_id=from_chat_id, message_id=message_id
+            return self._call(  # type: ignore
+                self.client.copy_message,
+                chat_id=target_chat_id,
+                from_chat_id=from_chat_id,
+                message_id=message_id,
             )
         except Exception as e:
             logger.error(f"Error copiando mensaje {message_id}: {e}")
             return None
 
+    def upload_photo(
+        self, target_chat_id: Union[int, str], photo_path: Union[str, Path]
+    ) -> str:
+        """Sube una imagen y devuelve su file_id para reutilizarla."""
+        if not self.client.is_connected:
+            self.start()
+        try:
+            msg = cast(
+                Message,
+                self._call(
+                    self.client.send_photo,
+                    chat_id=target_chat_id,
+                    photo=str(photo_path),
+                    disable_notification=True,
+                ),
+            )
+            return msg.photo.file_id
+        except Exception as e:
+            logger.error(f"Fallo subiendo la imagen {photo_path}: {e}")
+            raise e
+
     def replace_video_with_photo(
         self,
         chat_id: Union[int, str],
         message_id: int,
-        photo_path: Union[str, Path],
+        photo: Union[str, Path],
         caption: str = "",
     ) -> bool:
-        """OFUSCACIÓN: Reemplaza el video por una imagen."""
+        """
+        OFUSCACIÓN: Reemplaza el video por una imagen.
+        `photo` puede ser una ruta local o el file_id de una foto ya subida.
+        Si Telegram rechaza ese file_id lanza MediaReferenceError.
+        """
         if not self.client.is_connected:
             self.start()
         try:
-            media = InputMediaPhoto(media=str(photo_path), caption=caption)
-            self.client.edit_message_media(  # type: ignore
-                chat_id=chat_id, message_id=message_id, media=media
+            media = InputMediaPhoto(media=str(photo), caption=caption)
+            self._call(  # type: ignore
+                self.client.edit_message_media,
+                chat_id=chat_id,
+                message_id=message_id,
+                media=media,
             )
             return True
+        except STALE_MEDIA_ERRORS as e:
+            raise MediaReferenceError(
+                f"Telegram rechazó la foto para el mensaje {message_id}: {e}"
+            ) from e
         except Exception as e:
             logger.error(f"Error ofuscando mensaje {message_id}: {e}")
             return False
@@ -295,16 +595,34 @@ class TelegramService:
             )
             return False
 
+        return self.restore_video(
+            source_chat_id, source_message_id, current_video, caption
+        )
+
+    def restore_video(
+        self,
+        source_chat_id: Union[int, str],
+        source_message_id: int,
+        video: Video,
+        caption: Optional[str] = None,
+    ) -> bool:
+        """Vuelve a poner en el mensaje original un video ya validado del respaldo."""
+        if not self.client.is_connected:
+            self.start()
+
         # Restaurar usando el file_id fresco
         try:
             # supports_streaming=True es importante para videos largos
             media = InputMediaVideo(
-                media=current_video.file_id,
+                media=video.file_id,
                 caption=caption or "",
                 supports_streaming=True,
             )
-            self.client.edit_message_media(  # type: ignore
-                chat_id=source_chat_id, message_id=source_message_id, media=media
+            self._call(  # type: ignore
+                self.client.edit_message_media,
+                chat_id=source_chat_id,
+                message_id=source_message_id,
+                media=media,
             )
             return True
         except Exception as e:
@@ -326,7 +644,7 @@ class TelegramService:
             count = 0
             # Limitamos a 200 por si tienes miles de chats, suele ser suficiente
             # para que aparezcan los recientes (como los canales nuevos).
-            for _ in self.client.get_dialogs(limit=200):  # type: ignore
+            for _ in self._call(self.client.get_dialogs, limit=200):  # type: ignore
                 count += 1
 
             logger.info(f"Caché de peers actualizado. Escaneados {count} diálogos.")
@@ -340,7 +658,7 @@ class TelegramService:
         if not self.client.is_connected:
             self.start()
         try:
-            return self.client.get_media_group(chat_id, message_id)  # type: ignore
+            return self._call(self.client.get_media_group, chat_id, message_id)  # type: ignore
         except Exception as e:
             logger.error(f"Error obteniendo media group {message_id}: {e}")
             return []
@@ -357,7 +675,8 @@ class TelegramService:
         try:
             # copy_media_group devuelve la lista de mensajes generados en el destino
             # TODO: disable_notification en config
-            return self.client.copy_media_group(  # type: ignore
+            return self._call(  # type: ignore
+                self.client.copy_media_group,
                 chat_id=target_chat_id,
                 from_chat_id=from_chat_id,
                 message_id=message_id,
@@ -367,14 +686,72 @@ class TelegramService:
             logger.error(f"Error copiando media group {message_id}: {e}")
             return []
 
+    def copy_album_messages(
+        self, target_chat_id: Union[int, str], messages: List[Message]
+    ) -> List[Message]:
+        """
+        Copia un álbum a partir de sus mensajes ya obtenidos (reenvía por file_id).
+        Evita el get_media_group que hace copy_media_group internamente.
+        """
+        if not self.client.is_connected:
+            self.start()
+
+        media = []
+        for msg in messages:
+            caption = msg.caption or ""
+            entities = getattr(msg, "caption_entities", None)
+            if msg.video:
+                media.append(
+                    InputMediaVideo(
+                        msg.video.file_id, caption=caption, caption_entities=entities
+                    )
+                )
+            elif msg.photo:
+                media.append(
+                    InputMediaPhoto(
+                        msg.photo.file_id, caption=caption, caption_entities=entities
+                    )
+                )
+            elif msg.document:
+                media.append(
+                    InputMediaDocument(
+                        msg.document.file_id,
+                        caption=caption,
+                        caption_entities=entities,
+                    )
+                )
+            else:
+                logger.error(f"Mensaje {msg.id} sin contenido copiable en el álbum.")
+                return []
+
+        try:
+            return self._call(  # type: ignore
+                self.client.send_media_group,
+                chat_id=target_chat_id,
+                media=media,
+                disable_notification=True,
+            )
+        except Exception as e:
+            logger.error(f"Error copiando álbum desde msg {messages[0].id}: {e}")
+            return []
+
     def delete_messages(
         self, chat_id: Union[int, str], message_ids: Union[int, List[int]]
     ) -> bool:
-        """Elimina uno o varios mensajes del chat especificado."""
+        """
+        Elimina uno o varios mensajes del chat especificado.
+        Telegram acepta hasta 100 IDs por petición; las listas largas se parten.
+        """
         if not self.client.is_connected:
             self.start()
+        ids = [message_ids] if isinstance(message_ids, int) else message_ids
         try:
-            self.client.delete_messages(chat_id, message_ids)  # type: ignore
+            for i in range(0, len(ids), DELETE_MESSAGES_LIMIT):
+                self._call(  # type: ignore
+                    self.client.delete_messages,
+                    chat_id,
+                    ids[i : i + DELETE_MESSAGES_LIMIT],
+                )
             return True
         except Exception as e:
             logger.error(f"Error eliminando mensajes en {chat_id}: {e}")
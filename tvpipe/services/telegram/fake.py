@@ -0,0 +1,376 @@
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from pyrogram import enums  # type: ignore
+from pyrogram.errors import FloodWait, InternalServerError  # type: ignore
+from pyrogram.types import InputMediaPhoto  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+HISTORY_CHUNK_SIZE = 100
+GET_MESSAGES_LIMIT = 200
+
+
+@dataclass
+class FakeNetworkProfile:
+    """Comportamiento de red simulado para cada llamada al backend."""
+
+    latency: float = 0.0  # segundos por llamada RPC
+    jitter: float = 0.0  # variación aleatoria (+/-) sobre la latencia
+    bandwidth_bps: Optional[float] = None  # bytes/segundo para subidas, None = infinito
+    flood_wait_rate: float = 0.0  # probabilidad de FloodWait por llamada
+    flood_wait_seconds: int = 5
+    failure_rate: float = 0.0  # probabilidad de error 500 por llamada
+    seed: Optional[int] = None
+
+
+@dataclass
+class FakeVideo:
+    file_id: str
+    file_unique_id: str
+    width: int = 1280
+    height: int = 720
+    duration: int = 3600
+    file_name: Optional[str] = None
+    file_size: int = 0
+
+
+@dataclass
+class FakePhoto:
+    file_id: str
+    file_unique_id: str
+    file_size: int = 0
+
+
+@dataclass
+class FakeMessage:
+    id: int
+    chat: SimpleNamespace
+    date: datetime = field(default_factory=datetime.now)
+    caption: Optional[str] = None
+    media_group_id: Optional[str] = None
+    video: Optional[FakeVideo] = None
+    photo: Optional[FakePhoto] = None
+    document: None = None
+    empty: bool = False
+    service: None = None
+
+
+class FakeTelegramClient:
+    """
+    Sustituto en memoria de `pyrogram.Client` para pruebas de carga y latencia.
+    Implementa la parte del cliente que usa `TelegramService`, así el servicio real
+    (y el migrador y el publicador encima de él) corren sin cuenta ni red.
+    """
+
+    def __init__(
+        self, profile: Optional[FakeNetworkProfile] = None, me_id: int = 777000
+    ):
+        self.profile = profile or FakeNetworkProfile()
+        self.is_connected = False
+        self.calls: Counter = Counter()
+
+        self._me = SimpleNamespace(
+            id=me_id, username="fake", first_name="Fake", is_bot=False
+        )
+        self._random = random.Random(self.profile.seed)
+        self._lock = threading.RLock()
+        self._chats: Dict[str, Dict[int, FakeMessage]] = {}
+        self._next_ids: Dict[str, int] = {}
+        self._files: Dict[str, Union[FakeVideo, FakePhoto]] = {}
+        self._file_ids = itertools.count(1)
+        self._group_ids = itertools.count(10**12)
+
+    # --- Simulación de red ---
+
+    def _rpc(self, name: str, payload_bytes: int = 0) -> None:
+        with self._lock:
+            self.calls[name] += 1
+            roll_flood = self._random.random()
+            roll_fail = self._random.random()
+            jitter = self._random.uniform(-self.profile.jitter, self.profile.jitter)
+
+        delay = max(0.0, self.profile.latency + jitter)
+        if payload_bytes and self.profile.bandwidth_bps:
+            delay += payload_bytes / self.profile.bandwidth_bps
+        if delay:
+            time.sleep(delay)
+
+        if roll_flood < self.profile.flood_wait_rate:
+            raise FloodWait(value=self.profile.flood_wait_seconds)
+        if roll_fail < self.profile.failure_rate:
+            raise InternalServerError()
+
+    # --- Almacén de mensajes ---
+
+    def _chat(self, chat_id: Union[int, str]) -> Dict[int, FakeMessage]:
+        key = str(chat_id)
+        if key not in self._chats:
+            self._chats[key] = {}
+            self._next_ids[key] = 1
+        return self._chats[key]
+
+    def _add_message(self, chat_id: Union[int, str], **fields) -> FakeMessage:
+        with self._lock:
+            messages = self._chat(chat_id)
+            key = str(chat_id)
+            message_id = self._next_ids[key]
+            self._next_ids[key] += 1
+            chat = SimpleNamespace(
+                id=chat_id if isinstance(chat_id, int) else self._me.id
+            )
+            msg = FakeMessage(id=message_id, chat=chat, **fields)
+            messages[message_id] = msg
+            return msg
+
+    def _new_video(self, size: int = 0, **fields) -> FakeVideo:
+        n = next(self._file_ids)
+        video = FakeVideo(
+            file_id=f"video_{n}", file_unique_id=f"uvideo_{n}", file_size=size, **fields
+        )
+        self._files[video.file_id] = video
+        return video
+
+    def _new_photo(self, size: int = 0) -> FakePhoto:
+        n = next(self._file_ids)
+        photo = FakePhoto(
+            file_id=f"photo_{n}", file_unique_id=f"uphoto_{n}", file_size=size
+        )
+        self._files[photo.file_id] = photo
+        return photo
+
+    def _find_file(self, file_id: str) -> Optional[Union[FakeVideo, FakePhoto]]:
+        return self._files.get(file_id)
+
+    def _upload_size(self, media: Union[str, Path]) -> int:
+        return os.path.getsize(media) if os.path.isfile(media) else 0
+
+    def seed_channel(
+        self,
+        chat_id: Union[int, str],
+        albums: int,
+        album_size: int = 2,
+        caption: str = "Capítulo {episode} - Desafío",
+        loose_messages_every: int = 0,
+    ) -> None:
+        """
+        Llena un chat con `albums` álbumes de video (sin coste de red).
+        `loose_messages_every` intercala un mensaje suelto cada N álbumes.
+        """
+        with self._lock:
+            for n in range(1, albums + 1):
+                group_id = str(next(self._group_ids))
+                for part in range(album_size):
+                    self._add_message(
+                        chat_id,
+                        caption=caption.format(episode=n) if part == 0 else None,
+                        media_group_id=group_id,
+                        video=self._new_video(
+                            size=100 * 1024 * 1024, height=360 * (part + 1)
+                        ),
+                    )
+                if loose_messages_every and n % loose_messages_every == 0:
+                    self._add_message(chat_id, caption="Mensaje suelto")
+
+    # --- Superficie de pyrogram.Client usada por TelegramService ---
+
+    def start(self):
+        self._rpc("start")
+        self.is_connected = True
+
+    def stop(self):
+        self.is_connected = False
+
+    def get_me(self):
+        self._rpc("get_me")
+        return self._me
+
+    def get_chat(self, chat_id):
+        self._rpc("get_chat")
+        return SimpleNamespace(
+            id=chat_id, type=enums.ChatType.CHANNEL, permissions=None
+        )
+
+    def get_chat_member(self, chat_id, user_id):
+        self._rpc("get_chat_member")
+        return SimpleNamespace(status=enums.ChatMemberStatus.OWNER, privileges=None)
+
+    def get_dialogs(self, limit: int = 0) -> Iterator[SimpleNamespace]:
+        self._rpc("get_dialogs")
+        for key in list(self._chats)[: limit or None]:
+            yield SimpleNamespace(chat=SimpleNamespace(id=key))
+
+    def get_messages(
+        self, chat_id, message_ids: Union[int, Iterable[int]]
+    ) -> Union[FakeMessage, List[FakeMessage]]:
+        is_single = isinstance(message_ids, int)
+        ids = [message_ids] if is_single else list(message_ids)  # type: ignore
+        if len(ids) > GET_MESSAGES_LIMIT:
+            raise ValueError(f"Máximo {GET_MESSAGES_LIMIT} mensajes por llamada")
+
+        self._rpc("get_messages")
+        messages = self._chat(chat_id)
+        found = [
+            messages.get(i)
+            or FakeMessage(id=i, chat=SimpleNamespace(id=chat_id), empty=True)
+            for i in ids
+        ]
+        return found[0] if is_single else found
+
+    def get_chat_history(
+        self, chat_id, limit: int = 0, offset: int = 0, offset_id: int = 0, **_
+    ) -> Iterator[FakeMessage]:
+        """Del más nuevo al más viejo, con la semántica de offset/offset_id de Telegram."""
+        with self._lock:
+            ids = sorted(self._chat(chat_id), reverse=True)
+
+        start = 0
+        if offset_id:
+            start = next((i for i, mid in enumerate(ids) if mid < offset_id), len(ids))
+        start = max(0, start + offset)
+        selected = ids[start:]
+        if limit:
+            selected = selected[:limit]
+
+        for n, message_id in enumerate(selected):
+            if n % HISTORY_CHUNK_SIZE == 0:
+                self._rpc("get_chat_history")
+            msg = self._chat(chat_id).get(message_id)
+            if msg:
+                yield msg
+
+    def get_history_chunk(
+        self, chat_id, limit: int, offset: int = 0, offset_id: int = 0
+    ) -> List[FakeMessage]:
+        """Un solo bloque de historial (una petición), como `HistoryClient`."""
+        self._rpc("get_history_chunk")
+        with self._lock:
+            messages = self._chat(chat_id)
+            ids = sorted(messages, reverse=True)
+            start = 0
+            if offset_id:
+                start = next(
+                    (i for i, mid in enumerate(ids) if mid < offset_id), len(ids)
+                )
+            start = max(0, start + offset)
+            return [messages[i] for i in ids[start : start + limit]]
+
+    def get_media_group(self, chat_id, message_id: int) -> List[FakeMessage]:
+        self._rpc("get_media_group")
+        messages = self._chat(chat_id)
+        msg = messages.get(message_id)
+        if not msg or not msg.media_group_id:
+            raise ValueError("The message doesn't belong to a media group")
+        return sorted(
+            (m for m in messages.values() if m.media_group_id == msg.media_group_id),
+            key=lambda m: m.id,
+        )
+
+    def copy_message(self, chat_id, from_chat_id, message_id: int, **_) -> FakeMessage:
+        self._rpc("copy_message")
+        src = self._chat(from_chat_id)[message_id]
+        return self._add_message(
+            chat_id, caption=src.caption, video=src.video, photo=src.photo
+        )
+
+    def copy_media_group(
+        self, chat_id, from_chat_id, message_id: int, **_
+    ) -> List[FakeMessage]:
+        sources = self.get_media_group(from_chat_id, message_id)
+        self._rpc("copy_media_group")
+        group_id = str(next(self._group_ids))
+        return [
+            self._add_message(
+                chat_id,
+                caption=src.caption,
+                media_group_id=group_id,
+                video=src.video,
+                photo=src.photo,
+            )
+            for src in sources
+        ]
+
+    def send_video(self, chat_id, video, caption: str = "", progress=None, **fields):
+        size = self._upload_size(video)
+        self._rpc("send_video", payload_bytes=size)
+        if progress:
+            progress(size, size)
+        meta = {k: fields[k] for k in ("width", "height", "duration") if k in fields}
+        return self._add_message(
+            chat_id,
+            caption=caption,
+            video=self._new_video(size=size, file_name=Path(video).name, **meta),
+        )
+
+    def send_photo(self, chat_id, photo, caption: str = "", **_):
+        size = self._upload_size(photo)
+        self._rpc("send_photo", payload_bytes=size)
+        return self._add_message(chat_id, caption=caption, photo=self._new_photo(size))
+
+    def send_media_group(self, chat_id, media: list, **_) -> List[FakeMessage]:
+        self._rpc("send_media_group")
+        group_id = str(next(self._group_ids))
+        sent = []
+        for item in media:
+            existing = self._find_file(item.media)
+            is_photo = isinstance(item, InputMediaPhoto)
+            sent.append(
+                self._add_message(
+                    chat_id,
+                    caption=item.caption or None,
+                    media_group_id=group_id,
+                    video=None if is_photo else existing or self._new_video(),
+                    photo=(existing or self._new_photo()) if is_photo else None,
+                )
+            )
+        return sent
+
+    def edit_message_media(self, chat_id, message_id: int, media, **_) -> FakeMessage:
+        is_file_id = not os.path.isfile(media.media)
+        self._rpc(
+            "edit_message_media",
+            payload_bytes=0 if is_file_id else self._upload_size(media.media),
+        )
+        msg = self._chat(chat_id).get(message_id)
+        if msg is None:
+            raise ValueError(f"Mensaje {message_id} no existe en {chat_id}")
+
+        existing = self._find_file(media.media) if is_file_id else None
+        with self._lock:
+            if isinstance(media, InputMediaPhoto):
+                msg.photo = (
+                    existing if isinstance(existing, FakePhoto) else self._new_photo()
+                )
+                msg.video = None
+            else:
+                msg.video = (
+                    existing if isinstance(existing, FakeVideo) else self._new_video()
+                )
+                msg.photo = None
+            msg.caption = media.caption or None
+        return msg
+
+    def edit_message_caption(self, chat_id, message_id: int, caption: str, **_):
+        self._rpc("edit_message_caption")
+        msg = self._chat(chat_id)[message_id]
+        msg.caption = caption
+        return msg
+
+    def delete_messages(
+        self, chat_id, message_ids: Union[int, Iterable[int]], **_
+    ) -> int:
+        self._rpc("delete_messages")
+        ids = [message_ids] if isinstance(message_ids, int) else list(message_ids)
+        messages = self._chat(chat_id)
+        with self._lock:
+            return sum(1 for i in ids if messages.pop(i, None) is not None)
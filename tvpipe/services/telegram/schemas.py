@@ -16,6 +16,15 @@ class UploadedVideo(BaseModel):
     duration: int
     caption: Optional[str] = None
 
+    # Solo se rellenan cuando el video original se dividió en partes
+    part_number: Optional[int] = None
+    total_parts: Optional[int] = None
+
+    @property
+    def album_sort_key(self) -> tuple:
+        """Orden dentro del álbum: de menor a mayor calidad y cada parte en su orden."""
+        return (self.height, self.part_number or 0, self.size_bytes)
+
 
 class UploaderSessionInfo(BaseModel):
     id: int
@@ -0,0 +1,84 @@
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, TypedDict, Union
+
+from tvpipe.schemas import VideoMetadata
+
+logger = logging.getLogger(__name__)
+
+METADATA_CACHE_FILE = Path.cwd() / "registry/metadata_cache.json"
+
+
+class MetadataCacheEntry(TypedDict):
+    cached_at: str
+    negative: bool
+    meta: dict
+
+
+class MetadataCache:
+    """
+    Caché persistente de metadatos de YouTube por ID de video.
+    Los resultados negativos (videos que nunca van a calificar, como el de ayer)
+    viven más que los positivos, cuyas URLs de descarga terminan venciendo.
+    """
+
+    def __init__(
+        self,
+        cache_file: Optional[Union[str, Path]] = None,
+        positive_ttl: int = 1800,
+        negative_ttl: int = 86400,
+    ):
+        self.cache_file = (
+            METADATA_CACHE_FILE if cache_file is None else Path(cache_file)
+        )
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        self.positive_ttl = timedelta(seconds=positive_ttl)
+        self.negative_ttl = timedelta(seconds=negative_ttl)
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, MetadataCacheEntry] = self._load()
+
+    def _load(self) -> Dict[str, MetadataCacheEntry]:
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except json.JSONDecodeError as e:
+                logger.error(f"Error leyendo la caché de metadatos: {e}")
+        return {}
+
+    def _save(self) -> None:
+        with open(self.cache_file, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+
+    def _is_fresh(self, entry: MetadataCacheEntry, now: datetime) -> bool:
+        ttl = self.negative_ttl if entry["negative"] else self.positive_ttl
+        return now - datetime.fromisoformat(entry["cached_at"]) < ttl
+
+    def get(self, video_id: str) -> Optional[VideoMetadata]:
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is None or not self._is_fresh(entry, datetime.now()):
+                return None
+            return VideoMetadata(**entry["meta"])
+
+    def put(self, meta: VideoMetadata, negative: bool = False) -> None:
+        now = datetime.now()
+        with self._lock:
+            # Se aprovecha cada escritura para descartar lo vencido
+            self._entries = {
+                k: v for k, v in self._entries.items() if self._is_fresh(v, now)
+            }
+            self._entries[meta.id] = {
+                "cached_at": now.isoformat(),
+                "negative": negative,
+                # Un negativo nunca se descarga: no hace falta guardar formatos
+                "meta": meta.model_dump(
+                    mode="json",
+                    exclude={"raw_info", "streams"} if negative else None,
+                ),
+            }
+            self._save()
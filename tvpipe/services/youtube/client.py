@@ -1,41 +1,221 @@
+import copy
 import logging
+import queue
 import shutil
+import subprocess
+import threading
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Any, cast
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Union,
+    cast,
+)
 
 import yt_dlp
 
-from ...schemas import Stream, StreamPair, VideoMetadata
+from ...exceptions import DownloadError, IntegrityError
+from ...schemas import Stream, StreamPair, StreamRow, StreamTable, VideoMetadata
+from ..integrity import QUARANTINE_DIR, check_file
+from .ranged import RangeDownloader
+from .telemetry import DownloadRecorder
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CACHE_DIR = Path.cwd() / "registry/yt_dlp_cache"
+
+# Perfil de sondeo: solo lo necesario para validar un candidato y elegir streams
+PROBE_OPTS: Dict[str, Any] = {
+    "check_formats": False,
+    "writesubtitles": False,
+    "writeautomaticsub": False,
+    "getcomments": False,
+    "extractor_args": {
+        "youtube": {
+            # Con runtime JS, el cliente 'tv' ya entrega los formatos DASH
+            "player_client": ["tv"],
+            # Manifiestos HLS, subtítulos traducidos y la API 'next' no se usan
+            "skip": ["hls", "translated_subs"],
+            "player_skip": ["initial_data"],
+        }
+    },
+}
+
+
+class YoutubeDLPool:
+    """
+    Instancias de YoutubeDL reutilizables entre llamadas.
+    Cada instancia conserva sus extractores ya inicializados (y el player JS que
+    estos guardan en memoria); las opciones de cada llamada se aplican encima
+    mientras dura el préstamo y luego se restauran.
+    """
+
+    def __init__(self, base_opts: Any, size: int = 3):
+        self.base_opts = base_opts
+        self.size = max(1, size)
+
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created: List[yt_dlp.YoutubeDL] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> yt_dlp.YoutubeDL:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._created) < self.size:
+                ydl = yt_dlp.YoutubeDL(copy.deepcopy(self.base_opts))
+                self._created.append(ydl)
+                return ydl
+
+        # Todas las instancias están prestadas: se espera a que vuelva una
+        return self._idle.get()
+
+    @contextmanager
+    def lease(self, **overrides) -> Iterator[yt_dlp.YoutubeDL]:
+        """Presta una instancia con `overrides` aplicados sobre las opciones base."""
+        ydl = self._acquire()
+        saved_params = dict(ydl.params)
+        saved_selector = ydl.format_selector
+        saved_hooks = (ydl._progress_hooks, ydl._postprocessor_hooks)
+        try:
+            # Los hooks se registran al crear la instancia, no se leen de params
+            progress_hooks = overrides.pop("progress_hooks", [])
+            postprocessor_hooks = overrides.pop("postprocessor_hooks", [])
+            ydl._progress_hooks = saved_hooks[0] + progress_hooks
+            ydl._postprocessor_hooks = saved_hooks[1] + postprocessor_hooks
+
+            if overrides:
+                ydl.params.update(overrides)
+                # 'outtmpl' y 'format' se precompilan al crear la instancia
+                if "outtmpl" in overrides:
+                    ydl._parse_outtmpl()
+                if "format" in overrides:
+                    ydl.format_selector = ydl.build_format_selector(overrides["format"])
+            yield ydl
+        finally:
+            ydl.params.clear()
+            ydl.params.update(saved_params)
+            ydl.format_selector = saved_selector
+            ydl._progress_hooks, ydl._postprocessor_hooks = saved_hooks
+            self._idle.put(ydl)
+
+    def warm_up(self) -> None:
+        """Crea todas las instancias e inicializa el extractor de YouTube."""
+        with self._lock:
+            missing = self.size - len(self._created)
+            fresh = [
+                yt_dlp.YoutubeDL(copy.deepcopy(self.base_opts)) for _ in range(missing)
+            ]
+            self._created.extend(fresh)
+
+        for ydl in fresh:
+            ydl.get_info_extractor("Youtube")
+            self._idle.put(ydl)
+
+    def close(self) -> None:
+        """Cierra las instancias (guarda cookies y libera conexiones)."""
+        with self._lock:
+            created, self._created = self._created, []
+        self._idle = queue.LifoQueue()
+        for ydl in created:
+            ydl.close()
+
 
 class YtDlpClient:
-    def __init__(self, check_certificate: bool = False):
+    def __init__(
+        self,
+        check_certificate: bool = False,
+        ffmpeg_path: str = "ffmpeg",
+        cache_dir: Optional[Path] = None,
+        pool_size: int = 3,
+        fast_probe: bool = True,
+        engine: Literal["yt-dlp", "ranged"] = "yt-dlp",
+        range_connections: int = 4,
+        qualities: Optional[Sequence[Union[int, str]]] = None,
+    ):
         node_path = shutil.which("node") or "node"
+        self.ffmpeg_path = ffmpeg_path
+        self.fast_probe = fast_probe
+        # Calidades que el sondeo rápido debe poder cubrir para aceptarse
+        self.qualities = list(qualities or [])
+
+        # Motor para los formatos sueltos de la caché: yt-dlp o rangos en paralelo
+        self.engine = engine
+        self.range_downloader = RangeDownloader(connections=range_connections)
+
+        # Un lock por archivo de la caché de streams compartidos
+        self._path_locks: Dict[Path, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+        # Caché en disco de yt-dlp: player JS y firmas ya resueltas sobreviven reinicios
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
 
         self.base_opts: Any = {
             "quiet": True,
             "nocheckcertificate": not check_certificate,
             "js_runtimes": {"node": {"args": [node_path]}},
+            "cachedir": str(self.cache_dir),
         }
+        self.pool = YoutubeDLPool(self.base_opts, size=pool_size)
+
+    def warm_up(self, sample_url: Optional[str] = None) -> None:
+        """
+        Prepara el pool al arrancar. Con `sample_url` además se extrae un video,
+        lo que descarga el player JS y resuelve sus retos antes del primer sondeo.
+        """
+        self.pool.warm_up()
+        if not sample_url:
+            return
+
+        try:
+            with self.pool.lease() as ydl:
+                ydl.extract_info(sample_url, download=False, process=False)
+            logger.info("Extractor de YouTube precalentado.")
+        except Exception as e:
+            logger.warning(f"No se pudo precalentar el extractor: {e}")
+
+    def close(self) -> None:
+        self.pool.close()
 
     def get_metadata(self, url: str) -> VideoMetadata:
-        """Obtiene metadatos y los sanea en modelos Pydantic."""
+        """
+        Obtiene metadatos y los sanea en modelos Pydantic.
+        Con `fast_probe` primero se usa el perfil liviano (PROBE_OPTS); si su
+        resultado no basta para elegir streams, se repite la extracción completa.
+        """
         logger.info(f"Obteniendo metadatos de: {url}")
 
-        with yt_dlp.YoutubeDL(self.base_opts) as ydl:
-            info = cast(dict, ydl.extract_info(url, download=False))
+        if self.fast_probe:
+            try:
+                meta = self._extract_metadata(url, PROBE_OPTS)
+                self._validate_probe(meta)
+                return meta
+            except Exception as e:
+                logger.warning(
+                    f"Sondeo rápido insuficiente ({e}). Extracción completa."
+                )
 
-        if info is None:
-            raise ValueError("No se encontraron metadatos para la URL")
+        return self._extract_metadata(url, {})
 
-        # Convertimos la lista de diccionarios en objetos Stream validados
-        streams = [
-            Stream(**fmt)
-            for fmt in info.get("formats", [])
-            if fmt.get("format_id")  # Filtrar basura sin ID
-        ]
+    def _extract_metadata(self, url: str, overrides: Dict[str, Any]) -> VideoMetadata:
+        with self.pool.lease(**overrides) as ydl:
+            info = cast(dict, ydl.extract_info(url, download=False))
+            if info is None:
+                raise ValueError("No se encontraron metadatos para la URL")
+            raw_info = cast(dict, ydl.sanitize_info(info))
+
+        # Tabla compacta: los Stream de Pydantic se crean solo si alguien los pide
+        streams = StreamTable.from_formats(info.get("formats") or [])
 
         return VideoMetadata(
             id=info["id"],
@@ -46,39 +226,212 @@ class YtDlpClient:
             timestamp=info["timestamp"],
             was_live=info["is_live"],
             url=url,
+            raw_info=raw_info,
         )
 
-    def download_stream(self, stream: StreamPair, output_path: Path, url: str) -> Path:
+    def _validate_probe(self, meta: VideoMetadata) -> None:
+        """
+        El sondeo rápido sirve solo si trae video H.264 y audio AAC por separado,
+        y un video H.264 con la altura exacta de cada calidad configurada.
+        """
+        heights = {s.height for s in meta.stream_table if s.is_video and s.is_h264}
+        if not heights:
+            raise ValueError("sin streams de video H.264")
+        if not any(s.is_audio_only and s.is_aac for s in meta.stream_table):
+            raise ValueError("sin streams de audio AAC")
+
+        for quality in self.qualities:
+            try:
+                target = self._parse_height(str(quality))
+            except ValueError:
+                # select_best_pair tampoco acepta calidades sin altura ('best')
+                continue
+            if target not in heights:
+                raise ValueError(f"sin video H.264 de {target}p")
+
+    def download_stream(
+        self,
+        stream: StreamPair,
+        output_path: Path,
+        url: str,
+        cache_dir: Optional[Path] = None,
+        info: Optional[dict] = None,
+        recorder: Optional[DownloadRecorder] = None,
+        expected_duration: Optional[float] = None,
+    ) -> Path:
         """
         Descarga un stream específico usando la URL original del video.
+        Con `cache_dir`, video y audio se bajan por separado a una caché compartida
+        (cada formato una sola vez) y se unen localmente sin recodificar.
+        Con `info` (VideoMetadata.raw_info) se reutiliza el sondeo ya hecho.
+        `recorder` acumula bytes, velocidad, reintentos y tiempos de la descarga.
+        Antes de quedar en su ruta final, el archivo se valida contra
+        `expected_duration`; uno dañado va a cuarentena y no se reutiliza.
         """
         if not url.startswith("https://www.youtube.com/watch?"):
             raise ValueError(f"URL inválida: {url}")
 
         temp_video = output_path.parent / ".temp" / output_path.name
+        quarantine_dir = output_path.parent / QUARANTINE_DIR
+        if expected_duration is None and info:
+            expected_duration = info.get("duration")
 
         temp_video.parent.mkdir(parents=True, exist_ok=True)
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
         if output_path.exists():
-            logger.info(f"Archivo ya existe, saltando descarga: {output_path.name}")
-            return output_path
+            if check_file(output_path, expected_duration, quarantine_dir):
+                logger.info(f"Archivo ya existe, saltando descarga: {output_path.name}")
+                return output_path
+            logger.warning(f"Descargando de nuevo {output_path.name}.")
+
+        # Un .temp que sobrevivió a un proceso interrumpido solo sirve si está completo
+        if temp_video.exists():
+            check_file(temp_video, expected_duration, quarantine_dir)
 
         if not temp_video.exists():
-            opts = self.base_opts.copy()
-            opts.update(
-                {
+            if cache_dir is not None:
+                video_file = self.fetch_format(
+                    stream.video, cache_dir, url, info, recorder
+                )
+                audio_file = self.fetch_format(
+                    stream.audio, cache_dir, url, info, recorder
+                )
+                with recorder.timing_merge() if recorder else nullcontext():
+                    self._mux(video_file, audio_file, temp_video)
+            else:
+                opts = {
                     "format": f"{stream.video.format_id}+{stream.audio.format_id}",
                     "outtmpl": str(temp_video),
                 }
-            )
-
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                ydl.download([url])
+                self._run_download(opts, url, info, recorder)
+
+            if not check_file(temp_video, expected_duration, quarantine_dir):
+                if cache_dir is not None:
+                    # La unión salió mal: los formatos en caché tampoco son confiables
+                    for fmt in (stream.video, stream.audio):
+                        (cache_dir / f"{fmt.format_id}.{fmt.ext}").unlink(
+                            missing_ok=True
+                        )
+                raise IntegrityError(
+                    f"{output_path.name} quedó dañado tras la descarga. Se reintentará."
+                )
 
         temp_video.rename(output_path)
         return output_path
 
+    def fetch_format(
+        self,
+        fmt: Stream,
+        cache_dir: Path,
+        url: str,
+        info: Optional[dict] = None,
+        recorder: Optional[DownloadRecorder] = None,
+    ) -> Path:
+        """
+        Descarga un único formato (solo video o solo audio) a la caché.
+        Si otra versión ya lo pidió, espera y reutiliza el mismo archivo.
+        """
+        target = cache_dir / f"{fmt.format_id}.{fmt.ext}"
+
+        with self._lock_for(target):
+            if target.exists():
+                logger.info(f"Formato {fmt.format_id} reutilizado desde la caché.")
+                if recorder:
+                    recorder.reused(fmt.format_id)
+                return target
+
+            temp = cache_dir / ".temp" / target.name
+            temp.parent.mkdir(parents=True, exist_ok=True)
+
+            logger.info(f"Descargando formato {fmt.format_id} ({fmt.ext})...")
+            if self.engine == "ranged" and fmt.url:
+                # Solo `filesize` es exacto; el aproximado se verifica con tolerancia
+                self.range_downloader.download(
+                    fmt.url,
+                    temp,
+                    expected_size=fmt.filesize or 0,
+                    approx_size=fmt.size_bytes,
+                    resolve_url=lambda: self._resolve_format_url(url, fmt.format_id),
+                    on_progress=(
+                        (lambda n: recorder.add_bytes(str(temp), n))
+                        if recorder
+                        else None
+                    ),
+                    on_retry=recorder.count_retry if recorder else None,
+                )
+            else:
+                opts = {"format": fmt.format_id, "outtmpl": str(temp)}
+                self._run_download(opts, url, info, recorder)
+
+            temp.rename(target)
+        return target
+
+    def _resolve_format_url(self, url: str, format_id: str) -> str:
+        """Vuelve a extraer el video para obtener una URL vigente del formato."""
+        meta = self._extract_metadata(url, {})
+        stream = meta.stream_table.find(format_id)
+        if stream and stream.url:
+            return stream.url
+        raise DownloadError(f"El formato {format_id} ya no está disponible en {url}")
+
+    def _run_download(
+        self,
+        opts: Any,
+        url: str,
+        info: Optional[dict],
+        recorder: Optional[DownloadRecorder] = None,
+    ) -> None:
+        """
+        Descarga con yt-dlp usando `opts` sobre las opciones base. Si hay metadatos
+        previos, los reutiliza en lugar de extraer de nuevo; si sus URLs ya
+        vencieron, vuelve a extraer desde `url`.
+        """
+        if recorder:
+            opts = {**opts, **recorder.ydl_overrides()}
+        with self.pool.lease(**opts) as ydl:
+            if info is not None:
+                try:
+                    ydl.process_ie_result(copy.deepcopy(info), download=True)
+                    return
+                except Exception as e:
+                    logger.warning(
+                        f"No se pudieron reutilizar los metadatos ({e}). Extrayendo de nuevo."
+                    )
+            ydl.download([url])
+
+    def _lock_for(self, path: Path) -> threading.Lock:
+        with self._locks_guard:
+            return self._path_locks.setdefault(path, threading.Lock())
+
+    def _mux(self, video_file: Path, audio_file: Path, output_path: Path) -> None:
+        """Une video y audio copiando los streams (sin recodificar)."""
+        cmd = [
+            self.ffmpeg_path,
+            "-y",
+            "-v",
+            "error",
+            "-i",
+            str(video_file),
+            "-i",
+            str(audio_file),
+            "-map",
+            "0:v:0",
+            "-map",
+            "1:a:0",
+            "-c",
+            "copy",
+            "-movflags",
+            "+faststart",
+            str(output_path),
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            output_path.unlink(missing_ok=True)
+            raise DownloadError(
+                f"ffmpeg falló uniendo {output_path.name}: {result.stderr}"
+            )
+
     def select_best_pair(
         self,
         meta: VideoMetadata,
@@ -89,20 +442,22 @@ class YtDlpClient:
         target_height = self._parse_height(quality_preference)
 
         # Seleccionar Video
-        best_video = self._select_video_track(meta.streams, target_height, require_mp4)
+        best_video = self._select_video_track(
+            meta.stream_table, target_height, require_mp4
+        )
         logger.info(
             f"Video seleccionado: {best_video.height}p ({best_video.format_id})"
         )
 
         # Seleccionar Audio (basado en el video elegido)
         best_audio = self._select_smart_audio_track(
-            meta.streams, best_video.height or 0, require_mp4
+            meta.stream_table, best_video.height or 0, require_mp4
         )
         logger.info(
             f"Audio seleccionado: {best_audio.acodec} | Bitrate: {best_audio.abr}k ({best_audio.format_id})"
         )
 
-        return StreamPair(video=best_video, audio=best_audio)
+        return StreamPair(video=best_video.to_model(), audio=best_audio.to_model())
 
     def _parse_height(self, quality_str: str) -> int:
         """Convierte '1080p' o 'best' a un entero numérico."""
@@ -113,8 +468,8 @@ class YtDlpClient:
             raise ValueError(f"Calidad inválida: {quality_str}")
 
     def _select_video_track(
-        self, streams: list[Stream], target_height: int, require_mp4: bool
-    ) -> Stream:
+        self, streams: Iterable[StreamRow], target_height: int, require_mp4: bool
+    ) -> StreamRow:
         """
         Filtra y selecciona el stream de video más cercano a la altura deseada.
         Prioriza H.264 si require_mp4 es True.
@@ -136,8 +491,8 @@ class YtDlpClient:
         return best_video
 
     def _select_smart_audio_track(
-        self, streams: list[Stream], video_height: int, require_mp4: bool
-    ) -> Stream:
+        self, streams: Iterable[StreamRow], video_height: int, require_mp4: bool
+    ) -> StreamRow:
         """
         Selecciona el audio más adecuado proporcionalmente a la calidad del video.
         """
@@ -170,7 +525,7 @@ class YtDlpClient:
             return 128.0  # Calidad estándar
         return 9999.0  # Calidad máxima (HD/4K)
 
-    def _calculate_audio_score(self, stream: Stream, target_abr: float) -> float:
+    def _calculate_audio_score(self, stream: StreamRow, target_abr: float) -> float:
         """
         Calcula una puntuación para el stream de audio.
         Retorna un valor más alto cuanto mejor sea el candidato.
@@ -195,9 +550,41 @@ class YtDlpClient:
         """Obtiene las últimas N entradas de un canal."""
         logger.info(f"Escaneando canal: {channel_url}")
 
-        opts = self.base_opts.copy()
-        opts.update({"extract_flat": True, "playlistend": limit})
-
-        with yt_dlp.YoutubeDL(opts) as ydl:
+        with self.pool.lease(extract_flat=True, playlistend=limit) as ydl:
             info = cast(dict, ydl.extract_info(channel_url, download=False))
             return info.get("entries", []) if info else []
+
+    def iter_channel_pages(
+        self, channel_url: str, page_size: int = 50
+    ) -> Iterator[list[dict]]:
+        """
+        Recorre el canal del más nuevo al más viejo, de a `page_size` entradas
+        (extracción plana). Termina con la primera página incompleta.
+        """
+        start = 1
+        while True:
+            logger.info(
+                f"Escaneando canal: {channel_url} (entradas {start}-{start + page_size - 1})"
+            )
+            with self.pool.lease(
+                extract_flat=True,
+                playliststart=start,
+                playlistend=start + page_size - 1,
+            ) as ydl:
+                info = cast(dict, ydl.extract_info(channel_url, download=False))
+            entries = (info or {}).get("entries") or []
+            if entries:
+                yield list(entries)
+            if len(entries) < page_size:
+                return
+            start += page_size
+
+    def resolve_channel_id(self, channel_url: str) -> str:
+        """Obtiene el ID (UC...) de un canal a partir de su URL (@handle, /c/, etc)."""
+        with self.pool.lease(extract_flat=True, playlistend=1) as ydl:
+            info = cast(dict, ydl.extract_info(channel_url, download=False))
+
+        channel_id = (info or {}).get("channel_id")
+        if not channel_id:
+            raise ValueError(f"No se encontró el ID del canal para {channel_url}")
+        return channel_id
@@ -0,0 +1,104 @@
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+import requests
+from lxml import etree  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+FEED_URL = "https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
+
+NAMESPACES = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "yt": "http://www.youtube.com/xml/schemas/2015",
+}
+
+
+def parse_feed(content: bytes) -> List[dict]:
+    """
+    Convierte el feed Atom del canal en entradas con la misma forma que las de
+    `extract_flat` de yt-dlp (id, title, url) más el `timestamp` de publicación.
+    """
+    root = etree.fromstring(content)
+    entries = []
+    for node in root.findall("atom:entry", NAMESPACES):
+        video_id = node.findtext("yt:videoId", namespaces=NAMESPACES)
+        if not video_id:
+            continue
+
+        published = node.findtext("atom:published", namespaces=NAMESPACES)
+        entries.append(
+            {
+                "id": video_id,
+                "title": node.findtext("atom:title", default="", namespaces=NAMESPACES),
+                "url": f"https://www.youtube.com/watch?v={video_id}",
+                "timestamp": (
+                    int(datetime.fromisoformat(published).timestamp())
+                    if published
+                    else None
+                ),
+            }
+        )
+    return entries
+
+
+class ChannelFeedPoller:
+    """
+    Sondea el feed Atom público del canal con GET condicional (ETag /
+    If-Modified-Since). Es una petición HTTP liviana, sin yt-dlp ni runtime JS;
+    si el feed no responde, devuelve None para que se use yt-dlp como respaldo.
+    """
+
+    def __init__(
+        self,
+        channel_id: Optional[str] = None,
+        feed_url: Optional[str] = None,
+        timeout: int = 15,
+        session: Optional[requests.Session] = None,
+    ):
+        self.channel_id = channel_id
+        self._feed_url = feed_url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._entries: List[dict] = []
+
+    @property
+    def feed_url(self) -> Optional[str]:
+        if self._feed_url:
+            return self._feed_url
+        if self.channel_id:
+            return FEED_URL.format(channel_id=self.channel_id)
+        return None
+
+    def fetch_entries(self, limit: int = 5) -> Optional[List[dict]]:
+        """Últimas `limit` entradas del canal, o None si el feed no está disponible."""
+        url = self.feed_url
+        if not url:
+            return None
+
+        headers = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304:
+                logger.debug("Feed del canal sin cambios (304).")
+                return self._entries[:limit]
+
+            response.raise_for_status()
+            entries = parse_feed(response.content)
+        except Exception as e:
+            logger.warning(f"Feed del canal no disponible ({url}): {e}")
+            return None
+
+        self._etag = response.headers.get("ETag")
+        self._last_modified = response.headers.get("Last-Modified")
+        self._entries = entries
+        return entries[:limit]
@@ -0,0 +1,234 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ...exceptions import DownloadError
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# Códigos con los que YouTube responde cuando la URL firmada ya venció
+EXPIRED_STATUS = (403, 410)
+
+
+class ExpiringUrl:
+    """
+    URL directa compartida por todas las conexiones. Si vence, la primera
+    conexión que lo nota la vuelve a resolver y las demás reutilizan la nueva.
+    """
+
+    def __init__(self, url: str, resolve: Optional[Callable[[], str]] = None):
+        self.url = url
+        self._resolve = resolve
+        self._lock = threading.Lock()
+
+    def refresh(self, stale_url: str) -> str:
+        with self._lock:
+            if self.url != stale_url:
+                return self.url
+            if self._resolve is None:
+                raise DownloadError("La URL del stream venció y no se puede renovar.")
+            logger.info("URL del stream vencida. Resolviendo de nuevo...")
+            self.url = self._resolve()
+            return self.url
+
+
+class RangeDownloader:
+    """
+    Descarga una URL directa con varias conexiones a la vez. Cada conexión pide
+    un rango de bytes y lo escribe en su posición de un archivo preasignado.
+    YouTube limita la velocidad por conexión, así que N conexiones suman ancho de banda.
+    """
+
+    def __init__(
+        self,
+        connections: int = 4,
+        chunk_size: int = 10 * MB,
+        timeout: int = 30,
+        max_retries: int = 3,
+        size_tolerance: float = 0.1,
+        session: Optional[requests.Session] = None,
+    ):
+        self.connections = max(1, connections)
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        # Desvío admitido frente a un tamaño aproximado (filesize_approx)
+        self.size_tolerance = size_tolerance
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=self.connections)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+    def download(
+        self,
+        url: str,
+        target: Path,
+        expected_size: int = 0,
+        resolve_url: Optional[Callable[[], str]] = None,
+        on_progress: Optional[Callable[[int], None]] = None,
+        on_retry: Optional[Callable[[], None]] = None,
+        approx_size: int = 0,
+    ) -> Path:
+        """
+        Descarga `url` en `target`. `resolve_url` entrega una URL nueva si la
+        actual vence a mitad de la descarga. Con `expected_size` se verifica
+        que el tamaño final coincida con el anunciado por los metadatos; si
+        solo se conoce `approx_size`, se admite un desvío de `size_tolerance`.
+        `on_progress` recibe los bytes de cada bloque escrito y `on_retry` se
+        llama en cada reconexión.
+        """
+        source = ExpiringUrl(url, resolve_url)
+        total = self._content_length(source)
+        if expected_size and total != expected_size:
+            raise DownloadError(
+                f"El servidor anuncia {total} bytes, se esperaban {expected_size}."
+            )
+        if (
+            not expected_size
+            and approx_size
+            and abs(total - approx_size) > approx_size * self.size_tolerance
+        ):
+            raise DownloadError(
+                f"El servidor anuncia {total} bytes, se esperaban unos {approx_size}."
+            )
+
+        ranges = self._split(total)
+        workers = min(self.connections, len(ranges)) or 1
+        logger.info(
+            f"Descargando {target.name}: {total / MB:.1f} MB en {len(ranges)} rangos "
+            f"con {workers} conexiones."
+        )
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(target, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0))
+        write_lock = threading.Lock()
+        try:
+            os.ftruncate(fd, total)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                written = sum(
+                    executor.map(
+                        lambda r: self._fetch_range(
+                            source, fd, write_lock, *r, on_progress, on_retry
+                        ),
+                        ranges,
+                    )
+                )
+        except Exception:
+            os.close(fd)
+            target.unlink(missing_ok=True)
+            raise
+        os.close(fd)
+
+        if written != total or target.stat().st_size != total:
+            target.unlink(missing_ok=True)
+            raise DownloadError(
+                f"Descarga incompleta de {target.name}: {written}/{total} bytes."
+            )
+        return target
+
+    def _split(self, total: int) -> List[Tuple[int, int]]:
+        """Rangos [inicio, fin] inclusivos de como máximo `chunk_size` bytes."""
+        return [
+            (start, min(start + self.chunk_size, total) - 1)
+            for start in range(0, total, self.chunk_size)
+        ]
+
+    def _content_length(self, source: ExpiringUrl) -> int:
+        """Tamaño total del recurso, pidiendo solo el primer byte."""
+        for _ in range(self.max_retries):
+            url = source.url
+            response = self.session.get(
+                url, headers={"Range": "bytes=0-0"}, timeout=self.timeout
+            )
+            if response.status_code in EXPIRED_STATUS:
+                source.refresh(url)
+                continue
+            if response.status_code != 206:
+                raise DownloadError(
+                    f"El servidor no admite rangos (HTTP {response.status_code})."
+                )
+            # Content-Range: bytes 0-0/TOTAL
+            return int(response.headers["Content-Range"].rsplit("/", 1)[1])
+        raise DownloadError("No se pudo obtener el tamaño del stream.")
+
+    def _fetch_range(
+        self,
+        source: ExpiringUrl,
+        fd: int,
+        write_lock: threading.Lock,
+        start: int,
+        end: int,
+        on_progress: Optional[Callable[[int], None]] = None,
+        on_retry: Optional[Callable[[], None]] = None,
+    ) -> int:
+        """Descarga [start, end] y lo escribe en su posición. Reanuda tras cortes."""
+        offset = start
+        attempts = 0
+        while offset <= end:
+            if attempts > self.max_retries:
+                raise DownloadError(
+                    f"Rango {offset}-{end} falló tras {self.max_retries} reintentos."
+                )
+            url = source.url
+            try:
+                with self.session.get(
+                    url,
+                    headers={"Range": f"bytes={offset}-{end}"},
+                    stream=True,
+                    timeout=self.timeout,
+                ) as response:
+                    if response.status_code in EXPIRED_STATUS:
+                        attempts += 1
+                        source.refresh(url)
+                        continue
+                    if response.status_code != 206:
+                        raise DownloadError(
+                            f"Respuesta inesperada para el rango {offset}-{end}: "
+                            f"HTTP {response.status_code}"
+                        )
+                    for data in response.iter_content(chunk_size=MB):
+                        _write_at(fd, data, offset, write_lock)
+                        offset += len(data)
+                        if on_progress:
+                            on_progress(len(data))
+                if offset <= end:
+                    # La respuesta terminó sin error pero incompleta: también cuenta
+                    attempts += 1
+                    if on_retry:
+                        on_retry()
+                    logger.warning(
+                        f"Respuesta corta en el rango {offset}-{end}, reanudando."
+                    )
+            except requests.RequestException as e:
+                attempts += 1
+                if on_retry:
+                    on_retry()
+                logger.warning(f"Conexión cortada en el byte {offset}, reanudando: {e}")
+
+        return offset - start
+
+
+def _write_at(fd: int, data: bytes, offset: int, lock: threading.Lock) -> None:
+    """Escritura posicional; sin os.pwrite (Windows) se serializa seek+write."""
+    if hasattr(os, "pwrite"):
+        view = memoryview(data)
+        while view:
+            sent = os.pwrite(fd, view, offset)
+            view = view[sent:]
+            offset += sent
+        return
+
+    with lock:
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
@@ -0,0 +1,80 @@
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Literal, Optional, TypedDict, Union
+
+logger = logging.getLogger(__name__)
+
+SEEN_VIDEOS_FILE = Path.cwd() / "registry/seen_videos.json"
+
+Verdict = Literal["wrong_title", "not_today", "live", "already_published"]
+
+
+class SeenVideo(TypedDict):
+    verdict: Verdict
+    title: str
+    seen_at: str
+
+
+class SeenVideos:
+    """
+    Veredictos persistentes sobre las entradas del canal ya evaluadas.
+    Un video rechazado no se vuelve a sondear; solo `live` se revisa de nuevo
+    pasado `live_recheck`, porque el video cambia de estado al terminar la emisión.
+    """
+
+    def __init__(
+        self,
+        seen_file: Optional[Union[str, Path]] = None,
+        live_recheck: int = 600,
+        retention_days: int = 30,
+    ):
+        self.seen_file = SEEN_VIDEOS_FILE if seen_file is None else Path(seen_file)
+        self.seen_file.parent.mkdir(parents=True, exist_ok=True)
+        self.live_recheck = timedelta(seconds=live_recheck)
+        self.retention = timedelta(days=retention_days)
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, SeenVideo] = self._load()
+
+    def _load(self) -> Dict[str, SeenVideo]:
+        if self.seen_file.exists():
+            try:
+                with open(self.seen_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except json.JSONDecodeError as e:
+                logger.error(f"Error leyendo los videos vistos: {e}")
+        return {}
+
+    def _save(self) -> None:
+        with open(self.seen_file, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=2, ensure_ascii=False)
+
+    def get_verdict(self, video_id: str) -> Optional[Verdict]:
+        """Veredicto vigente del video, o None si hay que evaluarlo."""
+        with self._lock:
+            entry = self._entries.get(video_id)
+        if entry is None:
+            return None
+        if entry["verdict"] == "live":
+            age = datetime.now() - datetime.fromisoformat(entry["seen_at"])
+            if age >= self.live_recheck:
+                return None
+        return entry["verdict"]
+
+    def mark(self, video_id: str, verdict: Verdict, title: str = "") -> None:
+        now = datetime.now()
+        with self._lock:
+            self._entries = {
+                k: v
+                for k, v in self._entries.items()
+                if now - datetime.fromisoformat(v["seen_at"]) < self.retention
+            }
+            self._entries[video_id] = {
+                "verdict": verdict,
+                "title": title,
+                "seen_at": now.isoformat(),
+            }
+            self._save()
@@ -1,20 +1,43 @@
 import logging
-from datetime import datetime
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
 
 from tvpipe.config import DownloaderConfig
 from tvpipe.exceptions import DownloadError
 from tvpipe.interfaces import BaseDownloader, EpisodeParser
-from tvpipe.schemas import DownloadedEpisode, VideoMetadata
+from tvpipe.schemas import (
+    DownloadedEpisode,
+    DownloadTelemetry,
+    StreamPair,
+    VideoMetadata,
+)
 from tvpipe.services.register import RegistryManager
+from tvpipe.services.storage import StorageManager
 from tvpipe.utils import download_thumbnail
 
+from .cache import MetadataCache
 from .client import YtDlpClient
+from .feed import ChannelFeedPoller
+from .seen import SeenVideos, Verdict
+from .telemetry import DownloadRecorder, log_telemetry
 
 logger = logging.getLogger(__name__)
 
 
+def _video_id_from_url(url: str) -> Optional[str]:
+    """Extrae el ID de una URL de YouTube (watch?v=ID o youtu.be/ID)."""
+    parsed = urlparse(url)
+    video_id = parse_qs(parsed.query).get("v", [None])[0]
+    if not video_id and parsed.netloc.endswith("youtu.be"):
+        video_id = parsed.path.strip("/") or None
+    return video_id
+
+
 class YouTubeFetcher(BaseDownloader):
     def __init__(
         self,
@@ -22,11 +45,19 @@ class YouTubeFetcher(BaseDownloader):
         registry: RegistryManager,
         episode_parser: EpisodeParser,
         client: YtDlpClient,
+        metadata_cache: Optional[MetadataCache] = None,
+        seen_videos: Optional[SeenVideos] = None,
+        feed_poller: Optional[ChannelFeedPoller] = None,
+        storage: Optional[StorageManager] = None,
     ):
         self.config = config
         self.registry = registry
         self.client = client
         self.strategy = episode_parser
+        self.metadata_cache = metadata_cache
+        self.seen_videos = seen_videos
+        self.feed_poller = feed_poller
+        self.storage = storage
 
     def fetch_episode(self) -> Optional[VideoMetadata]:
         """
@@ -35,40 +66,218 @@ class YouTubeFetcher(BaseDownloader):
         """
         if self.config.url:
             logger.info("Modo Manual: Obteniendo metadatos de URL provista.")
-            return self.client.get_metadata(self.config.url)
+            return self._get_metadata(
+                self.config.url, _video_id_from_url(self.config.url)
+            )
         return self._find_automatic_candidate()
 
+    def _get_metadata(self, url: str, video_id: Optional[str]) -> VideoMetadata:
+        """get_metadata con caché por ID de video (si hay caché configurada)."""
+        if self.metadata_cache and video_id:
+            cached = self.metadata_cache.get(video_id)
+            if cached:
+                logger.info(f"Metadatos de {video_id} tomados de la caché.")
+                return cached
+
+        meta = self.client.get_metadata(url)
+        # Un video en vivo cambia de estado al terminar: no se guarda, así la
+        # revisión de `live` de SeenVideos consulta de nuevo a YouTube
+        if self.metadata_cache and not meta.was_live:
+            # Solo el video de hoy y ya terminado puede calificar; lo demás es negativo
+            self.metadata_cache.put(meta, negative=not self._is_today(meta))
+        return meta
+
+    def _is_today(self, meta: VideoMetadata) -> bool:
+        video_date = datetime.fromtimestamp(meta.timestamp).date()
+        return video_date == datetime.now().date()
+
     def _find_automatic_candidate(self) -> Optional[VideoMetadata]:
         """
         Itera sobre las últimas entradas del canal y retorna los metadatos
         del primer video que cumpla con la estrategia y sea de hoy.
+        Las entradas ya descartadas en sondeos anteriores se saltan sin consultar.
+        Los candidatos se sondean en paralelo, pero gana el de mejor posición
+        en el canal; en cuanto se confirma, se cancelan los sondeos pendientes.
+        Los sondeos dejan libre una instancia del pool para la descarga que sigue.
         """
-        entries = self.client.get_latest_channel_entries(self.config.channel_url)
+        candidates = self._filter_entries(self._get_channel_entries())
+        if not candidates:
+            return None
 
+        workers = max(
+            1,
+            min(
+                self.config.probe_workers,
+                self.config.ytdlp_pool_size - 1,
+                len(candidates),
+            ),
+        )
+        cancelled = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = [
+                executor.submit(self._probe_candidate, url, video_id, title, cancelled)
+                for url, video_id, title in candidates
+            ]
+            # En orden de canal: un candidato solo gana si los anteriores no califican
+            for future in futures:
+                meta = future.result()
+                if meta is not None:
+                    logger.info(f"¡Candidato encontrado!: {meta.title}")
+                    return meta
+            return None
+        finally:
+            # Los sondeos que ya corren terminan su extracción y abandonan sin validar
+            cancelled.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _filter_entries(
+        self, entries: List[dict]
+    ) -> List[Tuple[str, Optional[str], str]]:
+        """
+        Descarta sin sondear lo que ya se evaluó, no coincide con la estrategia
+        o el feed ya marca como viejo. Devuelve (url, video_id, título) en orden.
+        """
+        candidates = []
         for entry in entries:
             title = entry.get("title", "")
             url = entry.get("url", "")
+            video_id = entry.get("id") or _video_id_from_url(url)
+
+            if self.seen_videos and video_id:
+                verdict = self.seen_videos.get_verdict(video_id)
+                if verdict:
+                    logger.debug(f"Entrada {video_id} ya evaluada ({verdict}).")
+                    continue
 
             if not self.strategy.matches_criteria(title):
+                self._mark_seen(video_id, "wrong_title", title)
                 continue
 
-            try:
-                # Validación extra (Fecha y Live status)
-                meta = self.client.get_metadata(url)
+            # El feed ya trae la fecha de publicación: lo viejo no necesita sondeo
+            published = entry.get("timestamp")
+            if published and datetime.fromtimestamp(published).date() < date.today():
+                self._mark_seen(video_id, "not_today", title)
+                continue
 
-                video_date = datetime.fromtimestamp(meta.timestamp).date()
-                is_today = video_date == datetime.now().date()
+            candidates.append((url, video_id, title))
+        return candidates
 
-                if is_today and not meta.was_live:
-                    logger.info(f"¡Candidato encontrado!: {title}")
-                    return meta
+    def _probe_candidate(
+        self,
+        url: str,
+        video_id: Optional[str],
+        title: str,
+        cancelled: Optional[threading.Event] = None,
+    ) -> Optional[VideoMetadata]:
+        """
+        Sondea un candidato; retorna sus metadatos solo si es de hoy y no es un live.
+        Si `cancelled` se activa (ya hay ganador), abandona antes de cada paso.
+        """
+        if cancelled and cancelled.is_set():
+            return None
+        try:
+            meta = self._get_metadata(url, video_id)
+            if cancelled and cancelled.is_set():
+                return None
 
-            except Exception as e:
-                logger.warning(f"Error verificando candidato {url}: {e}")
-                continue
+            # Validación extra (Fecha y Live status)
+            if not self._is_today(meta):
+                self._mark_seen(video_id, "not_today", title)
+            elif meta.was_live:
+                self._mark_seen(video_id, "live", title)
+            else:
+                return meta
+
+        except Exception as e:
+            logger.warning(f"Error verificando candidato {url}: {e}")
 
         return None
 
+    def _get_channel_entries(self) -> List[dict]:
+        """
+        Últimas entradas del canal: primero por el feed Atom (una petición HTTP
+        liviana) y, si no está disponible, con el escaneo completo de yt-dlp.
+        """
+        if self.feed_poller:
+            if not self.feed_poller.feed_url:
+                # Se resuelve una sola vez; después todos los sondeos van por el feed
+                try:
+                    self.feed_poller.channel_id = self.client.resolve_channel_id(
+                        self.config.channel_url
+                    )
+                except Exception as e:
+                    logger.warning(f"No se pudo resolver el ID del canal: {e}")
+
+            entries = self.feed_poller.fetch_entries()
+            if entries is not None:
+                return entries
+
+        return self.client.get_latest_channel_entries(self.config.channel_url)
+
+    def find_backfill_candidates(
+        self,
+        first: int,
+        last: int,
+        is_done: Optional[Callable[[str], bool]] = None,
+        page_size: int = 50,
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Busca en el historial del canal los episodios con número entre `first`
+        y `last`. El canal lista del más nuevo al más viejo, así que se deja de
+        paginar al aparecer un episodio anterior al rango.
+        `is_done` descarta los que ya no hace falta procesar.
+        Devuelve (número, url, título) del episodio más viejo al más nuevo.
+        """
+        found = {}
+        for page in self.client.iter_channel_pages(
+            self.config.channel_url, page_size=page_size
+        ):
+            reached_start = False
+            for entry in page:
+                title = entry.get("title", "")
+                if not self.strategy.matches_criteria(title):
+                    continue
+                # El texto del parser es la clave del episodio en descargas y
+                # registro; el entero solo sirve para comparar con el rango
+                episode_num = self.strategy.extract_number(title)
+                number = int(episode_num)
+                if number < first:
+                    reached_start = True
+                elif number <= last and number not in found:
+                    # La primera aparición es la subida más reciente
+                    found[number] = (episode_num, entry.get("url", ""), title)
+
+            if reached_start or len(found) == last - first + 1:
+                break
+
+        candidates = []
+        for number in sorted(found):
+            if is_done and is_done(found[number][0]):
+                logger.info(f"Episodio {number} ya publicado. Se omite.")
+                continue
+            candidates.append(found[number])
+
+        missing = sorted(set(range(first, last + 1)) - set(found))
+        if missing:
+            logger.warning(f"Episodios no encontrados en el canal: {missing}")
+        return candidates
+
+    def fetch_metadata(self, url: str) -> VideoMetadata:
+        """
+        Metadatos de un video puntual, sin pasar por la caché del sondeo diario
+        (que recuerda como descartado todo lo que no es de hoy).
+        """
+        return self.client.get_metadata(url)
+
+    def _mark_seen(self, video_id: Optional[str], verdict: Verdict, title: str):
+        if self.seen_videos and video_id:
+            self.seen_videos.mark(video_id, verdict, title)
+
+    def mark_published(self, meta: VideoMetadata) -> None:
+        """Recuerda que este video ya se publicó para no volver a detectarlo."""
+        self._mark_seen(meta.id, "already_published", meta.title)
+
     def download_episode(
         self, meta: VideoMetadata, safe: bool = False
     ) -> DownloadedEpisode:
@@ -83,66 +292,33 @@ class YouTubeFetcher(BaseDownloader):
                - Al pedir "720p", retornará nuevamente el mismo stream de 480p.
                - El set `processed_resolutions` detectará que 480p ya se procesó y evitará
                  descargar el archivo dos veces.
+            4. Las versiones resultantes se descargan en paralelo (`config.download_workers`).
 
         Returns:
             DownloadedEpisode: Objeto con la lista de rutas de los videos descargados
-            (uno por cada resolución única encontrada) y la miniatura.
+            (uno por cada resolución única encontrada, en el orden de `config.qualities`)
+            y la miniatura.
         """
 
         logger.info(f"Iniciando la descarga del Episodio {meta.title}...")
 
         try:
-            downloaded_paths = []
-            processed_resolutions = set()
-
             episode_num = self.strategy.extract_number(meta.title)
-            for quality_pref in self.config.qualities:
-                quality_pref_str = str(quality_pref)
-                try:
-                    stream = self.client.select_best_pair(
-                        meta,
-                        quality_preference=quality_pref_str,
-                        require_mp4=self.config.output_as_mp4,
-                    )
-                except ValueError as e:
-                    logger.warning(f"Saltando calidad '{quality_pref_str}': {e}")
-                    continue
+            plan = self._plan_variants(meta, episode_num)
 
-                if stream.height in processed_resolutions:
-                    logger.info(
-                        f"Omitiendo '{quality_pref_str}' porque la resolución {stream.height}p ya fue procesada."
-                    )
-                    continue
-
-                filename = self.config.generate_video_filename(
-                    episode_num, stream.height
-                )
-                output_path = self.config.download_folder / filename
-
-                try:
-                    logger.info(
-                        f"Descargando versión {stream.height}p (pref: {quality_pref_str})..."
-                    )
-                    self.client.download_stream(stream, output_path, meta.url)
-
-                    downloaded_paths.append(output_path)
-                    processed_resolutions.add(stream.height)
-
-                except Exception as e:
-                    logger.error(f"Error descargando stream {stream.height}p: {e}")
-                    raise DownloadError(
-                        f"Fallo en yt-dlp para {meta.title}: {e}"
-                    ) from e
-
-            if not downloaded_paths:
+            if not plan:
                 raise Exception(
                     f"No se pudo descargar ninguna calidad válida para el episodio {episode_num}."
                 )
 
+            self._admit(plan)
+            telemetry = self._download_variants(meta, plan)
+
             return DownloadedEpisode(
                 episode_number=episode_num,
-                video_paths=downloaded_paths,
+                video_paths=[output_path for _, output_path in plan],
                 source="youtube",
+                telemetry=telemetry,
             )
 
         except DownloadError as e:
@@ -152,6 +328,153 @@ class YouTubeFetcher(BaseDownloader):
             else:
                 raise e
 
+    def iter_progressive_downloads(
+        self, meta: VideoMetadata
+    ) -> Iterator[DownloadedEpisode]:
+        """
+        Descarga por etapas para publicar cuanto antes:
+            1. La versión más liviana, sola (la que menos tarda).
+            2. El resto, que empieza a descargarse en segundo plano apenas se
+               entrega la primera etapa, mientras esta se sube y publica.
+        `pending_variants` indica cuántas versiones faltan tras cada etapa.
+        """
+        episode_num = self.strategy.extract_number(meta.title)
+        plan = sorted(
+            self._plan_variants(meta, episode_num), key=lambda item: item[0].height
+        )
+        if not plan:
+            raise DownloadError(
+                f"No se pudo descargar ninguna calidad válida para el episodio {episode_num}."
+            )
+
+        self._admit(plan)
+        first, rest = plan[:1], plan[1:]
+        # La caché de formatos se conserva: las versiones grandes reutilizan el audio
+        first_telemetry = self._download_variants(meta, first, keep_cache=bool(rest))
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = (
+                executor.submit(self._download_variants, meta, rest) if rest else None
+            )
+
+            yield DownloadedEpisode(
+                episode_number=episode_num,
+                video_paths=[output_path for _, output_path in first],
+                source="youtube",
+                pending_variants=len(rest),
+                telemetry=first_telemetry,
+            )
+
+            if pending is not None:
+                yield DownloadedEpisode(
+                    episode_number=episode_num,
+                    video_paths=[output_path for _, output_path in rest],
+                    source="youtube",
+                    telemetry=pending.result(),
+                )
+
+    def _admit(self, plan: List[Tuple[StreamPair, Path]]) -> None:
+        """Rechaza la descarga antes de empezar si el plan completo no cabe en disco."""
+        if self.storage is None:
+            return
+        required = self.storage.estimate_plan_bytes(plan)
+        logger.info(
+            f"Espacio estimado para el episodio: {required / (1024**2):.0f} MB."
+        )
+        self.storage.admit(required)
+
+    def _plan_variants(
+        self, meta: VideoMetadata, episode_num: str
+    ) -> List[Tuple[StreamPair, Path]]:
+        """Resuelve qué stream y archivo corresponde a cada calidad única."""
+        plan = []
+        processed_resolutions = set()
+
+        for quality_pref in self.config.qualities:
+            quality_pref_str = str(quality_pref)
+            try:
+                stream = self.client.select_best_pair(
+                    meta,
+                    quality_preference=quality_pref_str,
+                    require_mp4=self.config.output_as_mp4,
+                )
+            except ValueError as e:
+                logger.warning(f"Saltando calidad '{quality_pref_str}': {e}")
+                continue
+
+            if stream.height in processed_resolutions:
+                logger.info(
+                    f"Omitiendo '{quality_pref_str}' porque la resolución {stream.height}p ya fue procesada."
+                )
+                continue
+
+            filename = self.config.generate_video_filename(episode_num, stream.height)
+            plan.append((stream, self.config.download_folder / filename))
+            processed_resolutions.add(stream.height)
+
+        return plan
+
+    def _download_variants(
+        self,
+        meta: VideoMetadata,
+        plan: List[Tuple[StreamPair, Path]],
+        keep_cache: bool = False,
+    ) -> List[DownloadTelemetry]:
+        """
+        Descarga todas las versiones en paralelo. Cada una usa su propio `.temp`.
+        Si alguna falla se espera al resto y se informa de todos los errores juntos.
+        La caché de formatos se borra al terminar bien, salvo con `keep_cache`.
+        Devuelve las métricas de cada versión, en el orden del plan.
+        """
+
+        # Varias versiones suelen compartir el mismo audio: cada formato distinto
+        # se descarga una sola vez a esta caché y las versiones se unen localmente.
+        cache_dir = self.config.download_folder / ".cache" / meta.id
+        unique_formats = {s.video.format_id for s, _ in plan} | {
+            s.audio.format_id for s, _ in plan
+        }
+        logger.info(
+            f"{len(plan)} versiones a partir de {len(unique_formats)} formatos únicos."
+        )
+
+        def download(item: Tuple[StreamPair, Path]) -> DownloadTelemetry:
+            stream, output_path = item
+            logger.info(f"Descargando versión {stream.height}p...")
+            recorder = DownloadRecorder(stream, output_path)
+            self.client.download_stream(
+                stream,
+                output_path,
+                meta.url,
+                cache_dir=cache_dir,
+                info=meta.raw_info,
+                recorder=recorder,
+                expected_duration=meta.duration,
+            )
+            return recorder.finish()
+
+        workers = max(1, min(self.config.download_workers, len(plan)))
+        errors = []
+        telemetry = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [(item[0], executor.submit(download, item)) for item in plan]
+            for stream, future in futures:
+                try:
+                    telemetry.append(future.result())
+                    log_telemetry(telemetry[-1])
+                except Exception as e:
+                    logger.error(f"Error descargando stream {stream.height}p: {e}")
+                    errors.append(f"{stream.height}p: {e}")
+
+        if errors:
+            raise DownloadError(
+                f"Fallo en yt-dlp para {meta.title}: {'; '.join(errors)}"
+            )
+
+        # Si algo falló, la caché se conserva para que el reintento la reutilice
+        if not keep_cache:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        return telemetry
+
     def download_thumbnail(self, meta: VideoMetadata) -> Path:
         episode_num = self.strategy.extract_number(meta.title)
         thumb_filename = self.config.generate_thumb_filename(episode_num)
@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+from ...schemas import DownloadTelemetry, StreamPair
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadRecorder:
+    """
+    Acumula las métricas de la descarga de una versión.
+    Se registra en yt-dlp como progress hook, postprocessor hook y logger
+    (los reintentos de fragmentos solo llegan como advertencias).
+    """
+
+    def __init__(self, stream: StreamPair, output_path: Path):
+        self.telemetry = DownloadTelemetry(
+            file_name=output_path.name,
+            height=stream.video.height,
+            video_format_id=stream.video.format_id,
+            audio_format_id=stream.audio.format_id,
+        )
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._file_bytes: Dict[str, int] = {}
+        self._pp_started: Dict[str, float] = {}
+
+    # --- Hooks de yt-dlp ---
+
+    def progress_hook(self, d: dict) -> None:
+        # Ambos eventos traen "filename"; "tmpfilename" (.part) solo llega al descargar
+        filename = d.get("filename") or ""
+        with self._lock:
+            if d.get("status") == "downloading":
+                self._file_bytes[filename] = d.get("downloaded_bytes") or 0
+                speed = d.get("speed")
+                if speed:
+                    self.telemetry.peak_speed = max(
+                        self.telemetry.peak_speed or 0.0, speed
+                    )
+                if self.telemetry.initial_eta is None and d.get("eta") is not None:
+                    self.telemetry.initial_eta = int(d["eta"])
+            elif d.get("status") == "finished":
+                self._file_bytes[filename] = (
+                    d.get("total_bytes") or d.get("downloaded_bytes") or 0
+                )
+
+    def postprocessor_hook(self, d: dict) -> None:
+        # Solo interesa la unión de video y audio (Merger) que hace yt-dlp
+        name = d.get("postprocessor") or ""
+        if name != "Merger":
+            return
+        with self._lock:
+            if d.get("status") == "started":
+                self._pp_started[name] = time.perf_counter()
+            elif d.get("status") == "finished" and name in self._pp_started:
+                self.telemetry.merge_seconds += (
+                    time.perf_counter() - self._pp_started.pop(name)
+                )
+
+    def debug(self, msg: str) -> None:
+        pass
+
+    def info(self, msg: str) -> None:
+        pass
+
+    def warning(self, msg: str) -> None:
+        if "Retrying" in msg:
+            self.count_retry()
+        logger.debug(f"yt-dlp: {msg}")
+
+    def error(self, msg: str) -> None:
+        logger.debug(f"yt-dlp: {msg}")
+
+    # --- Eventos fuera de yt-dlp (motor por rangos, caché, ffmpeg) ---
+
+    def add_bytes(self, key: str, amount: int) -> None:
+        with self._lock:
+            self._file_bytes[key] = self._file_bytes.get(key, 0) + amount
+
+    def count_retry(self) -> None:
+        with self._lock:
+            self.telemetry.fragment_retries += 1
+
+    def reused(self, format_id: str) -> None:
+        with self._lock:
+            self.telemetry.reused_formats.append(format_id)
+
+    @contextmanager
+    def timing_merge(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.telemetry.merge_seconds += time.perf_counter() - start
+
+    def ydl_overrides(self) -> dict:
+        """Opciones para `YoutubeDLPool.lease` que conectan este registro."""
+        return {
+            "progress_hooks": [self.progress_hook],
+            "postprocessor_hooks": [self.postprocessor_hook],
+            "logger": self,
+        }
+
+    def finish(self) -> DownloadTelemetry:
+        with self._lock:
+            data = self.telemetry
+            data.total_seconds = round(time.perf_counter() - self._started, 3)
+            data.merge_seconds = round(data.merge_seconds, 3)
+            data.download_seconds = round(
+                max(0.0, data.total_seconds - data.merge_seconds), 3
+            )
+            data.bytes_downloaded = sum(self._file_bytes.values())
+            if data.bytes_downloaded and data.download_seconds:
+                data.avg_speed = round(data.bytes_downloaded / data.download_seconds, 1)
+            return data.model_copy()
+
+
+def log_telemetry(telemetry: DownloadTelemetry) -> None:
+    speed = (telemetry.avg_speed or 0) / (1024 * 1024)
+    peak = (telemetry.peak_speed or 0) / (1024 * 1024)
+    logger.info(
+        f"{telemetry.file_name}: {telemetry.bytes_downloaded / (1024 * 1024):.1f} MB "
+        f"en {telemetry.total_seconds:.1f}s (media {speed:.2f} MB/s, pico {peak:.2f} MB/s, "
+        f"unión {telemetry.merge_seconds:.1f}s, reintentos {telemetry.fragment_retries})"
+    )
@@ -1,9 +1,10 @@
 import hashlib
 import logging
 import re
+import threading
 from datetime import datetime
 from pathlib import Path
-from time import sleep
+from time import monotonic, sleep
 from types import TracebackType
 from typing import Optional, Type, Union
 
@@ -83,6 +84,47 @@ def download_thumbnail(url: Optional[str], output_path: Path) -> Path:
     return output_path
 
 
+class RateLimiter:
+    """
+    Token bucket seguro entre hilos.
+    `rate` es la cantidad de operaciones por segundo y `burst` cuántas pueden
+    salir seguidas. `pause` bloquea a todos los hilos (ej: tras un FloodWait).
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate debe ser mayor que 0")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._last) * self.rate
+                )
+                self._last = now
+
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, monotonic() + seconds)
+            self._tokens = 0
+
+
 class ReliabilityGuard:
     """
     Gestor de contexto que maneja errores, reintentos y backoff exponencial.